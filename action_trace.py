@@ -0,0 +1,298 @@
+"""
+Action traces for the browser agent fallback.
+A successful agent run is reduced to a replayable sequence of page actions
+(navigate, click, scroll, keys, tab switch) ending with a deterministic column total,
+stored per spreadsheet and layout fingerprint. Later runs on the same layout
+replay it without LLM calls; when a step's postcondition fails, the agent
+re-plans from that step only.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from playwright.async_api import Page
+
+from aggregation import normalize_header
+from extraction import read_headers
+from sheet_export import parse_sheet_url
+from sheet_tabs import SheetTab, switch_to_tab
+
+logger = logging.getLogger(__name__)
+
+# Async callable totalling the column with the given header in the open page
+ColumnReader = Callable[[str], Awaitable[Dict[str, Any]]]
+
+# browser-use action names (across versions) -> trace ops
+_ACTION_OPS = {
+    "go_to_url": "goto",
+    "navigate": "goto",
+    "open_tab": "goto",
+    "click_element_by_index": "click",
+    "click_element": "click",
+    "click": "click",
+    "scroll_down": "scroll",
+    "scroll_up": "scroll",
+    "scroll": "scroll",
+    "send_keys": "keys",
+    "wait": "wait",
+}
+
+STEP_TIMEOUT_MS = 5000
+
+# Keys a trace may press: navigation only, so typed text (possibly credentials)
+# and editing keys such as Delete are never recorded or replayed
+_NAMED_KEYS = {key.lower(): key for key in (
+    "Enter", "Tab", "Escape", "ArrowUp", "ArrowDown", "ArrowLeft", "ArrowRight",
+    "PageUp", "PageDown", "Home", "End",
+)}
+_MODIFIER_KEYS = {key.lower(): key for key in ("Control", "Shift", "Alt", "Meta", "ControlOrMeta")}
+
+
+@dataclass
+class TraceStep:
+    """One replayable action; ``expect_gid`` is the tab the page must show afterwards."""
+    op: str
+    args: Dict[str, Any] = field(default_factory=dict)
+    expect_gid: Optional[str] = None
+
+    def describe(self) -> str:
+        details = ", ".join(f"{key}={value}" for key, value in self.args.items())
+        return f"{self.op}({details})"
+
+
+@dataclass
+class ActionTrace:
+    spreadsheet_id: str
+    fingerprint: str
+    steps: List[TraceStep]
+    recorded_at: float = 0.0
+
+    @property
+    def column(self) -> Optional[str]:
+        """Header of the totalled column (the final ``total`` step)."""
+        if self.steps and self.steps[-1].op == "total":
+            return self.steps[-1].args.get("column")
+        return None
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, text: str) -> "ActionTrace":
+        data = json.loads(text)
+        data["steps"] = [TraceStep(**step) for step in data["steps"]]
+        return cls(**data)
+
+
+@dataclass
+class ReplayOutcome:
+    """Result of a replay; ``failed_step`` is the index the agent re-plans from."""
+    result: Optional[Dict[str, Any]] = None
+    failed_step: Optional[int] = None
+    error: str = ""
+    seconds: float = 0.0
+
+
+async def layout_fingerprint(page: Page, reason: str) -> str:
+    """
+    Fingerprint of what the direct path saw: the rendered header row and why
+    it gave up. Sheets whose layout changes get a new fingerprint (and trace).
+    """
+    try:
+        headers = await read_headers(page)
+    except Exception:
+        headers = []
+    normalized = "|".join(normalize_header(h) for h in headers)
+    return hashlib.sha256(f"{reason}:{normalized}".encode()).hexdigest()[:16]
+
+
+def _element_xpath(element: Any) -> Optional[str]:
+    xpath = getattr(element, "xpath", None) if element is not None else None
+    if not xpath:
+        return None
+    return xpath if xpath.startswith("/") else "/" + xpath
+
+
+def named_key(keys: str) -> Optional[str]:
+    """
+    Playwright name of a navigation key or modifier combo ("ctrl+home" ->
+    "Control+Home"), or None for anything else, including typed text.
+    """
+    *modifiers, key = [part.strip().lower() for part in str(keys).split("+")]
+    aliases = {"ctrl": "control", "cmd": "meta", "esc": "escape", "return": "enter"}
+    key = aliases.get(key, key)
+    modifiers = [aliases.get(m, m) for m in modifiers]
+    if key not in _NAMED_KEYS or any(m not in _MODIFIER_KEYS for m in modifiers):
+        return None
+    return "+".join([_MODIFIER_KEYS[m] for m in modifiers] + [_NAMED_KEYS[key]])
+
+
+def steps_from_history(history: Any) -> Optional[List[TraceStep]]:
+    """
+    Replayable steps of a browser-use AgentHistoryList, or None when a click
+    has no stable selector or keys other than navigation keys were sent.
+
+    Text input is dropped (it may carry credentials) as are LLM-only actions
+    such as content extraction; the trace ends with a ``total`` step instead.
+    """
+    items = list(getattr(history, "history", []) or [])
+    steps: List[TraceStep] = []
+    for i, item in enumerate(items):
+        output = getattr(item, "model_output", None)
+        if output is None:
+            continue
+        elements = list(getattr(getattr(item, "state", None), "interacted_element", None) or [])
+        next_state = getattr(items[i + 1], "state", None) if i + 1 < len(items) else None
+        item_steps = []
+        for j, action in enumerate(getattr(output, "action", []) or []):
+            data = action.model_dump(exclude_unset=True)
+            name, params = next(iter(data.items()), (None, None))
+            op = _ACTION_OPS.get(name)
+            params = params or {}
+            if op == "goto" and params.get("url"):
+                item_steps.append(TraceStep("goto", {"url": params["url"]}))
+            elif op == "click":
+                xpath = _element_xpath(elements[j] if j < len(elements) else None)
+                if xpath is None:
+                    # Without a stable selector the rest of the trace can't be trusted
+                    return None
+                item_steps.append(TraceStep("click", {"xpath": xpath}))
+            elif op == "scroll":
+                pixels = params.get("amount") or params.get("pixels") or 600
+                down = name != "scroll_up" and params.get("down", True)
+                item_steps.append(TraceStep("scroll", {"pixels": pixels if down else -pixels}))
+            elif op == "keys" and params.get("keys"):
+                keys = named_key(params["keys"])
+                if keys is None:
+                    # Typed text can't be stored, and replaying without it would diverge
+                    return None
+                item_steps.append(TraceStep("keys", {"keys": keys}))
+            elif op == "wait":
+                item_steps.append(TraceStep("wait", {"seconds": min(float(params.get("seconds", 1)), 10.0)}))
+        url = getattr(next_state, "url", None)
+        if item_steps and url:
+            try:
+                item_steps[-1].expect_gid = parse_sheet_url(url).gid
+            except ValueError:
+                pass
+        steps += item_steps
+    return steps
+
+
+def _current_gid(page: Page) -> Optional[str]:
+    try:
+        return parse_sheet_url(page.url).gid
+    except ValueError:
+        return None
+
+
+async def _run_step(page: Page, step: TraceStep, read_column: ColumnReader) -> Optional[Dict[str, Any]]:
+    if step.op == "goto":
+        await page.goto(step.args["url"], wait_until="domcontentloaded")
+    elif step.op == "click":
+        await page.locator(f"xpath={step.args['xpath']}").first.click(timeout=STEP_TIMEOUT_MS)
+    elif step.op == "scroll":
+        await page.mouse.wheel(step.args.get("dx", 0), step.args.get("pixels", 0))
+    elif step.op == "tab":
+        await switch_to_tab(page, SheetTab(gid=step.args["gid"], name=step.args.get("name", "")),
+                            timeout_ms=STEP_TIMEOUT_MS)
+    elif step.op == "keys":
+        await page.keyboard.press(step.args["keys"])
+    elif step.op == "wait":
+        await asyncio.sleep(step.args["seconds"])
+    elif step.op == "total":
+        return await read_column(step.args["column"])
+    else:
+        raise ValueError(f"Unknown trace step: {step.op}")
+    return None
+
+
+async def replay_trace(page: Page, trace: ActionTrace, read_column: ColumnReader) -> ReplayOutcome:
+    """Replay ``trace`` on ``page``; stops at the first step whose postcondition fails."""
+    started = time.perf_counter()
+    outcome = ReplayOutcome()
+    for index, step in enumerate(trace.steps):
+        try:
+            result = await _run_step(page, step, read_column)
+        except Exception as e:
+            outcome.failed_step, outcome.error = index, f"{step.describe()} failed: {e}"
+            break
+        if step.expect_gid is not None and _current_gid(page) != step.expect_gid:
+            outcome.failed_step = index
+            outcome.error = f"{step.describe()} left the page on gid {_current_gid(page)}, expected {step.expect_gid}"
+            break
+        if step.op == "total":
+            if result.get("status") != "success":
+                outcome.failed_step, outcome.error = index, result.get("message", "total failed")
+                break
+            outcome.result = result
+    outcome.seconds = round(time.perf_counter() - started, 3)
+    if outcome.failed_step is not None:
+        logger.info(f"↪️ Trace replay stopped at step {outcome.failed_step + 1}/{len(trace.steps)}: {outcome.error}")
+    return outcome
+
+
+class TraceStore:
+    """
+    SQLite store of action traces keyed by spreadsheet ID and layout fingerprint.
+    Without ``path`` the store lives in memory.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        if path:
+            db_path = Path(path).expanduser()
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            location = str(db_path)
+        else:
+            location = ":memory:"
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(location, check_same_thread=False)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS traces (
+                spreadsheet_id TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                trace TEXT NOT NULL,
+                recorded_at REAL NOT NULL,
+                PRIMARY KEY (spreadsheet_id, fingerprint)
+            )"""
+        )
+        self._db.commit()
+
+    def get(self, spreadsheet_id: str, fingerprint: str) -> Optional[ActionTrace]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT trace FROM traces WHERE spreadsheet_id = ? AND fingerprint = ?",
+                (spreadsheet_id, fingerprint),
+            ).fetchone()
+        return ActionTrace.from_json(row[0]) if row else None
+
+    def put(self, trace: ActionTrace):
+        trace.recorded_at = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO traces (spreadsheet_id, fingerprint, trace, recorded_at) "
+                "VALUES (?, ?, ?, ?)",
+                (trace.spreadsheet_id, trace.fingerprint, trace.to_json(), trace.recorded_at),
+            )
+            self._db.commit()
+        logger.info(f"📼 Recorded {len(trace.steps)}-step agent trace for {trace.spreadsheet_id}")
+
+    def invalidate(self, spreadsheet_id: str, fingerprint: str):
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM traces WHERE spreadsheet_id = ? AND fingerprint = ?",
+                (spreadsheet_id, fingerprint),
+            )
+            self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM traces").fetchone()[0]
@@ -1,13 +1,28 @@
+import asyncio
+import json
 import os
 import logging
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
 
+from action_trace import (ActionTrace, ColumnReader, TraceStep, TraceStore, layout_fingerprint,
+                          replay_trace, steps_from_history)
 from config import GoogleSheetConfig
+from extraction import GridData, extract_grid
+from number_parsing import parse_number_list
+from sheet_export import parse_sheet_url
+from sheet_tabs import discover_tabs, switch_to_tab
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Try importing real browser-use, fallback to mock
+# browser-use is optional; without it only the low_cost agent mode is available
 try:
     from browser_use import Agent
     from browser_use.browser import BrowserProfile, BrowserSession
@@ -15,7 +30,7 @@ try:
     logger.info("✅ Real browser-use package detected")
 except ImportError:
     BROWSER_USE_AVAILABLE = False
-    logger.warning("⚠️ browser-use not available, using mock")
+    logger.warning("⚠️ browser-use not installed; browser_use agent mode unavailable")
     
     class BrowserProfile:
         def __init__(self, **kwargs):
@@ -41,8 +56,15 @@ except ImportError:
 
 # Try importing Gemini LLM, fallback to mock
 try:
+    from langchain_core.callbacks import BaseCallbackHandler
     from langchain_google_genai import ChatGoogleGenerativeAI
+    LLM_AVAILABLE = True
 except ImportError:
+    LLM_AVAILABLE = False
+
+    class BaseCallbackHandler:
+        pass
+
     class ChatGoogleGenerativeAI:
         def __init__(self, **kwargs):
             self.__dict__.update(kwargs)
@@ -62,12 +84,7 @@ def create_google_sheet_agent(config: GoogleSheetConfig) -> Agent:
     - Return the total
     """
 
-    llm = ChatGoogleGenerativeAI(
-        model=config.model,
-        temperature=0.7,
-        max_completion_tokens=1000,
-        api_key=os.environ.get("GEMINI_API_KEY"),
-    )
+    llm = get_llm_client(config.model, config.agent_temperature, config.agent_max_output_tokens)
 
     browser_profile = BrowserProfile(
         browser_session="~/.config/google-chrome/Default",
@@ -114,6 +131,537 @@ EXAMPLE OUTPUT:
         },
         enable_memory=False,
         browser_session=browser_session,
+        use_vision=config.agent_use_vision,
     )
 
     return agent
+
+
+FALLBACK_REASONS = ("grid_not_found", "header_not_found")
+
+AGENT_MODES = ("low_cost", "browser_use")
+
+_TOTAL_RE = re.compile(r"total[^0-9$€£(-]*([-($€£]*\s*[\d.,]+\)?)", re.IGNORECASE)
+_COLUMN_RE = re.compile(r"column:\s*\"?([^\"\n]+?)\"?\s*$", re.IGNORECASE | re.MULTILINE)
+_JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+# Shared chat model clients keyed by (model, temperature, max output tokens)
+_llm_clients: Dict[Tuple[str, float, int], Any] = {}
+_llm_lock = threading.Lock()
+
+
+def get_llm_client(model: str, temperature: float = 0.0, max_output_tokens: int = 512,
+                   api_key: Optional[str] = None) -> Any:
+    """Chat model client shared by every agent with the same settings."""
+    key = (model, temperature, max_output_tokens)
+    with _llm_lock:
+        client = _llm_clients.get(key)
+        if client is None:
+            client = _llm_clients[key] = ChatGoogleGenerativeAI(
+                model=model,
+                temperature=temperature,
+                max_completion_tokens=max_output_tokens,
+                api_key=api_key or os.environ.get("GEMINI_API_KEY"),
+            )
+        return client
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class ReplayLLM:
+    """
+    Offline stand-in for the chat model: answers each call with the next
+    canned response. Token usage is estimated from the text lengths.
+    """
+
+    def __init__(self, responses: List[str]):
+        self.responses = list(responses)
+        self.calls = 0
+
+    @classmethod
+    def from_file(cls, path: str) -> "ReplayLLM":
+        """One response per line of a JSON lines file (objects are re-serialized)."""
+        lines = Path(path).expanduser().read_text(encoding="utf-8").splitlines()
+        return cls([line if not line.lstrip().startswith("{") else json.dumps(json.loads(line))
+                    for line in lines if line.strip()])
+
+    async def ainvoke(self, messages: List[Tuple[str, str]]) -> Any:
+        if self.calls >= len(self.responses):
+            raise RuntimeError(f"ReplayLLM ran out of responses after {self.calls} calls")
+        content = self.responses[self.calls]
+        self.calls += 1
+        prompt = sum(_estimate_tokens(text) for _, text in messages)
+        return SimpleNamespace(content=content,
+                               usage_metadata={"input_tokens": prompt, "output_tokens": _estimate_tokens(content)})
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """Adds up the input and output tokens reported by every chat model call."""
+
+    def __init__(self):
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def on_llm_end(self, response: Any, **kwargs: Any):
+        for generations in getattr(response, "generations", None) or []:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                self.input_tokens += int(usage.get("input_tokens") or 0)
+                self.output_tokens += int(usage.get("output_tokens") or 0)
+
+
+def with_usage_callback(llm: Any, callback: TokenUsageCallback) -> Any:
+    """
+    Per-run copy of a shared chat model that also reports to ``callback``.
+    Models that can't be copied (e.g. ReplayLLM) are returned unchanged.
+    """
+    if not callable(getattr(llm, "model_copy", None)):
+        return llm
+    callbacks = llm.callbacks if isinstance(getattr(llm, "callbacks", None), list) else []
+    return llm.model_copy(update={"callbacks": [*callbacks, callback]})
+
+
+@dataclass
+class AgentBudget:
+    """Hard limits for one agent run; whichever is reached first stops it."""
+    max_steps: int = 25
+    max_tokens: int = 20000
+    max_seconds: float = 120.0
+
+
+@dataclass
+class StepUsage:
+    step: int
+    action: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    seconds: float = 0.0
+
+
+class UsageMeter:
+    """Per-step token and latency accounting checked against an AgentBudget."""
+
+    def __init__(self, budget: AgentBudget):
+        self.budget = budget
+        self.steps: List[StepUsage] = []
+        self._t0 = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._t0
+
+    @property
+    def tokens(self) -> int:
+        return sum(s.input_tokens + s.output_tokens for s in self.steps)
+
+    def exceeded(self) -> Optional[str]:
+        """Name of the exhausted budget, or None."""
+        if len(self.steps) >= self.budget.max_steps:
+            return "steps"
+        if self.tokens >= self.budget.max_tokens:
+            return "tokens"
+        if self.elapsed >= self.budget.max_seconds:
+            return "time"
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "steps": len(self.steps),
+            "input_tokens": sum(s.input_tokens for s in self.steps),
+            "output_tokens": sum(s.output_tokens for s in self.steps),
+            "seconds": round(self.elapsed, 3),
+            "step_usage": [asdict(s) for s in self.steps],
+        }
+
+
+def build_task_spec(sheet_url: str, target_column: str, reason: str) -> str:
+    """Compact task for the low-cost agent; the page is described separately."""
+    return json.dumps({
+        "goal": f"pick the column holding the {target_column} amounts to sum",
+        "sheet": parse_sheet_url(sheet_url).spreadsheet_id,
+        "direct_path_failed": reason,
+        "actions": {
+            "total": {"column": "<header exactly as observed>"},
+            "tab": {"name": "<tab name>"},
+            "scroll": {"direction": "right|down"},
+            "fail": {"reason": "<why>"},
+        },
+        "reply": "one JSON object: {\"action\": ..., ...}",
+    }, separators=(",", ":"))
+
+
+_SYSTEM_PROMPT = ("You operate a read-only spreadsheet reader. Each turn you get the task, "
+                  "the visible sheet and earlier actions. Reply with exactly one JSON action.")
+
+
+async def observe_page(page: Any, max_columns: int = 40, sample_rows: int = 3) -> Dict[str, Any]:
+    """DOM-distilled view of the sheet: tab names, headers and a few values per column."""
+    tabs = await discover_tabs(page, timeout_ms=2000)
+    try:
+        grid = await extract_grid(page)
+    except Exception:
+        grid = GridData()
+    columns = {}
+    for index, header in enumerate(grid.headers[:max_columns]):
+        samples = [v[:20] for v in grid.column(index) if v][:sample_rows]
+        columns[header[:40] or f"#{index + 1}"] = samples
+    return {"tabs": [t.name or t.gid for t in tabs], "active_gid": parse_sheet_url(page.url).gid,
+            "columns": columns}
+
+
+def _parse_action(content: Any) -> Dict[str, Any]:
+    text = content if isinstance(content, str) else json.dumps(content)
+    match = _JSON_OBJECT_RE.search(text)
+    if not match:
+        return {"action": "invalid", "text": text[:200]}
+    try:
+        action = json.loads(match.group(0))
+    except ValueError:
+        return {"action": "invalid", "text": text[:200]}
+    return action if isinstance(action, dict) else {"action": "invalid", "text": text[:200]}
+
+
+class LowCostAgent:
+    """
+    Small agent loop over DOM-distilled observations.
+
+    The LLM only chooses among a few structured actions (pick a column,
+    switch tab, scroll, give up); reading and summing the column is done by
+    the deterministic DOM path. Each call carries the task spec, the current
+    observation and a one-line log of earlier actions instead of a growing
+    chat transcript, and the run stops at the first exhausted budget.
+    """
+
+    def __init__(self, llm: Any, budget: AgentBudget):
+        self.llm = llm
+        self.budget = budget
+
+    async def run(self, page: Any, sheet_url: str, target_column: str, reason: str,
+                  read_column: ColumnReader, resume_note: str = "") -> Dict[str, Any]:
+        meter = UsageMeter(self.budget)
+        spec = build_task_spec(sheet_url, target_column, reason)
+        log: List[str] = [resume_note.strip()] if resume_note.strip() else []
+        steps: List[TraceStep] = []
+        outcome: Dict[str, Any] = {"result": None, "column": None, "trace_steps": steps, "stopped": None}
+
+        while True:
+            outcome["stopped"] = meter.exceeded()
+            if outcome["stopped"]:
+                logger.warning(f"⚠️ Agent {outcome['stopped']} budget exhausted")
+                break
+            step_started = time.perf_counter()
+            record = None
+            # Observing, asking the LLM and acting all count against the time budget
+            try:
+                observation = json.dumps(await self._within_budget(meter, observe_page(page)),
+                                         separators=(",", ":"))
+                prompt = f"task:{spec}\npage:{observation}\nlog:{json.dumps(log[-6:])}"
+                messages = [("system", _SYSTEM_PROMPT), ("human", prompt)]
+                response = await self._within_budget(meter, self.llm.ainvoke(messages))
+                usage = getattr(response, "usage_metadata", None) or {}
+                action = _parse_action(getattr(response, "content", response))
+                name = str(action.get("action", "invalid"))
+                record = StepUsage(
+                    step=len(meter.steps) + 1,
+                    action=name,
+                    input_tokens=int(usage.get("input_tokens") or _estimate_tokens(prompt)),
+                    output_tokens=int(usage.get("output_tokens") or _estimate_tokens(str(response))),
+                )
+                meter.steps.append(record)
+                note = await self._within_budget(meter, self._apply(page, action, read_column, outcome))
+            except asyncio.TimeoutError:
+                outcome["stopped"] = "time"
+                logger.warning("⚠️ Agent time budget exhausted mid-step")
+                break
+            finally:
+                if record is not None:
+                    record.seconds = round(time.perf_counter() - step_started, 3)
+            logger.info(f"🧭 Agent step {record.step}: {name} -> {note} "
+                        f"({record.input_tokens}+{record.output_tokens} tokens, {record.seconds:.2f}s)")
+            if outcome["result"] is not None or name == "fail":
+                break
+            log.append(f"{name} {json.dumps({k: v for k, v in action.items() if k != 'action'})}: {note}")
+
+        outcome["usage"] = meter.to_dict()
+        return outcome
+
+    async def _within_budget(self, meter: UsageMeter, awaitable: Awaitable[Any]) -> Any:
+        """Await ``awaitable`` for at most the time left in the budget (asyncio.TimeoutError past it)."""
+        return await asyncio.wait_for(awaitable, timeout=max(0.0, self.budget.max_seconds - meter.elapsed))
+
+    async def _apply(self, page: Any, action: Dict[str, Any], read_column: ColumnReader,
+                     outcome: Dict[str, Any]) -> str:
+        """Run one action; returns a short note for the next prompt's log."""
+        name = action.get("action")
+        steps: List[TraceStep] = outcome["trace_steps"]
+        try:
+            if name == "total" and action.get("column"):
+                result = await read_column(str(action["column"]))
+                if result.get("status") != "success":
+                    return result.get("message", "no total")
+                outcome["result"], outcome["column"] = result, str(action["column"])
+                return f"total {result['total_expense']}"
+            if name == "tab" and action.get("name"):
+                tabs = {t.name.lower(): t for t in await discover_tabs(page, timeout_ms=2000) if t.name}
+                tab = tabs.get(str(action["name"]).lower())
+                if tab is None:
+                    return "no such tab"
+                await switch_to_tab(page, tab, timeout_ms=5000)
+                steps.append(TraceStep("tab", {"gid": tab.gid, "name": tab.name}, expect_gid=tab.gid))
+                return "switched"
+            if name == "scroll":
+                dx, dy = (800, 0) if action.get("direction") == "right" else (0, 800)
+                await page.mouse.wheel(dx, dy)
+                steps.append(TraceStep("scroll", {"pixels": dy, "dx": dx}))
+                return "scrolled"
+            if name == "fail":
+                return str(action.get("reason", "gave up"))
+        except Exception as e:
+            return f"error: {e}"
+        return "invalid action, reply with one JSON action from the spec"
+
+
+def build_fallback_task(sheet_url: str, target_column: str, reason: str, resume_note: str = "") -> str:
+    """Task for a browser-use agent taking over a page the direct path already opened."""
+    problem = ("the spreadsheet grid did not load" if reason == "grid_not_found"
+               else f'no column header matching "{target_column}" was found')
+    return f"""
+The Google Sheet {sheet_url} is already open in the current tab and signed in.
+An automated reader failed because {problem}.
+{resume_note}
+1. Do not navigate away or sign in again unless the sheet is not shown
+2. Find the column that holds the {target_column} amounts (its header may be worded differently)
+3. Scroll to read every value in that column and sum them
+4. Do NOT edit the sheet
+5. Answer exactly two lines: "Total expense: <number>" and "Column: <header text as shown>"
+"""
+
+
+def build_resume_note(replayed: List[TraceStep], failed: TraceStep, error: str) -> str:
+    """Tell a re-planning agent which recorded steps already ran and where replay broke."""
+    done = "\n".join(f"   - {step.describe()}" for step in replayed) or "   (none)"
+    return f"""
+A recording of a previous successful run was replayed. These steps already ran:
+{done}
+The next recorded step, {failed.describe()}, failed: {error}
+Continue from the current page state; do not repeat the steps above.
+"""
+
+
+def _parse_agent_output(output: Any) -> Dict[str, Any]:
+    """Total, column and step count from a browser-use history (or the mock's dict)."""
+    if isinstance(output, dict):
+        return {"total": output.get("total_expense"), "column": output.get("column"),
+                "steps": output.get("steps_taken"), "text": output.get("message", "")}
+    text = ""
+    final_result = getattr(output, "final_result", None)
+    if callable(final_result):
+        text = final_result() or ""
+    steps = len(output) if hasattr(output, "__len__") else None
+    match = _TOTAL_RE.search(text)
+    numbers = parse_number_list([match.group(1)]) if match else []
+    column = _COLUMN_RE.search(text)
+    return {"total": numbers[0] if numbers else None, "column": column.group(1).strip() if column else None,
+            "steps": steps, "text": text}
+
+
+def _history_usage(history: Any) -> List[StepUsage]:
+    """Per-step tokens and latency from a browser-use history's step metadata."""
+    usage = []
+    for i, item in enumerate(getattr(history, "history", []) or []):
+        meta = getattr(item, "metadata", None)
+        if meta is None:
+            continue
+        actions = getattr(getattr(item, "model_output", None), "action", None) or []
+        names = [next(iter(a.model_dump(exclude_unset=True)), "?") for a in actions]
+        start, end = getattr(meta, "step_start_time", 0) or 0, getattr(meta, "step_end_time", 0) or 0
+        usage.append(StepUsage(
+            step=getattr(meta, "step_number", i + 1),
+            action=",".join(names) or "none",
+            input_tokens=getattr(meta, "input_tokens", 0) or 0,
+            output_tokens=getattr(meta, "output_tokens", 0) or 0,
+            seconds=round(max(0.0, end - start), 3),
+        ))
+    return usage
+
+
+@dataclass
+class AgentFallback:
+    """
+    Escalates to an agent when the direct Playwright path cannot find the
+    grid or the target column. The agent drives the page and context the
+    direct path already opened, so navigation and login are not repeated.
+
+    ``mode`` "low_cost" runs LowCostAgent (DOM observations, structured
+    actions, deterministic totals); "browser_use" runs a browser-use Agent.
+    Both share one LLM client per settings and stop at the ``budget``.
+
+    With a ``trace_store``, a successful run's actions are recorded per
+    spreadsheet and layout fingerprint and replayed on later runs without
+    LLM calls; the agent only re-plans from a step whose replay fails.
+    """
+    model: str
+    budget: AgentBudget = field(default_factory=AgentBudget)
+    mode: str = "low_cost"
+    temperature: float = 0.0
+    max_output_tokens: int = 512
+    use_vision: bool = False
+    api_key: Optional[str] = None
+    trace_store: Optional[TraceStore] = None
+    # Chat model to use instead of the shared client (e.g. a ReplayLLM offline)
+    llm: Any = None
+
+    @classmethod
+    def from_config(cls, config: GoogleSheetConfig, trace_store: Optional[TraceStore] = None) -> "AgentFallback":
+        return cls(
+            model=config.model,
+            budget=AgentBudget(max_steps=config.agent_max_steps, max_tokens=config.agent_max_tokens,
+                               max_seconds=config.agent_max_seconds),
+            mode=config.agent_mode,
+            temperature=config.agent_temperature,
+            max_output_tokens=config.agent_max_output_tokens,
+            use_vision=config.agent_use_vision,
+            api_key=os.environ.get("GEMINI_API_KEY"),
+            trace_store=trace_store,
+            llm=ReplayLLM.from_file(config.agent_stub_responses) if config.agent_stub_responses else None,
+        )
+
+    def _llm(self) -> Any:
+        if self.llm is not None:
+            return self.llm
+        return get_llm_client(self.model, self.temperature, self.max_output_tokens, self.api_key)
+
+    async def _run_low_cost(self, page: Any, sheet_url: str, target_column: str, reason: str,
+                            read_column: ColumnReader, resume_note: str) -> Dict[str, Any]:
+        agent = LowCostAgent(self._llm(), self.budget)
+        outcome = await agent.run(page, sheet_url, target_column, reason, read_column, resume_note)
+        result = outcome["result"]
+        return {"total": result["total_expense"] if result else None, "column": outcome["column"],
+                "result": result, "trace_steps": outcome["trace_steps"], "text": "",
+                "usage": outcome["usage"], "stopped": outcome["stopped"]}
+
+    async def _run_browser_use(self, page: Any, context: Any, task: str) -> Dict[str, Any]:
+        # Reuse the open context/page; keep_alive stops the agent from closing them
+        browser_session = BrowserSession(browser_context=context, page=page, keep_alive=True)
+        # Step metadata only carries input tokens in some browser-use versions; the
+        # callback sees every call's usage, input and output
+        token_usage = TokenUsageCallback()
+        agent = Agent(task=task, llm=with_usage_callback(self._llm(), token_usage), enable_memory=False,
+                      browser_session=browser_session, use_vision=self.use_vision)
+        started = time.perf_counter()
+        stopped: Optional[str] = None
+
+        def token_totals(history: Any) -> Tuple[int, int]:
+            steps = _history_usage(history)
+            return (max(token_usage.input_tokens, sum(s.input_tokens for s in steps)),
+                    max(token_usage.output_tokens, sum(s.output_tokens for s in steps)))
+
+        async def enforce_token_budget(running_agent: Any):
+            nonlocal stopped
+            history = getattr(getattr(running_agent, "state", None), "history", None)
+            tokens = sum(token_totals(history))
+            if tokens >= self.budget.max_tokens:
+                logger.warning(f"⚠️ Agent token budget exhausted ({tokens} tokens)")
+                stopped = "tokens"
+                running_agent.stop()
+
+        try:
+            history = await asyncio.wait_for(
+                agent.run(max_steps=self.budget.max_steps, on_step_end=enforce_token_budget)
+                if BROWSER_USE_AVAILABLE else agent.run(max_steps=self.budget.max_steps),
+                timeout=self.budget.max_seconds,
+            )
+        except asyncio.TimeoutError:
+            logger.warning("⚠️ Agent time budget exhausted")
+            stopped = "time"
+            history = getattr(getattr(agent, "state", None), "history", None)
+
+        parsed = _parse_agent_output(history)
+        steps = _history_usage(history)
+        input_tokens, output_tokens = token_totals(history)
+        parsed["trace_steps"] = steps_from_history(history)
+        parsed["stopped"] = stopped
+        parsed["usage"] = {
+            "steps": parsed["steps"] if parsed["steps"] is not None else len(steps),
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "seconds": round(time.perf_counter() - started, 3),
+            "step_usage": [asdict(s) for s in steps],
+        }
+        return parsed
+
+    async def run(self, page: Any, context: Any, sheet_url: str, target_column: str,
+                  reason: str, read_column: Optional[ColumnReader] = None) -> Dict[str, Any]:
+        """
+        Total ``target_column`` on the open page. ``read_column`` totals a column
+        by header deterministically; low-cost mode and trace replay need it.
+        """
+        started = time.perf_counter()
+        traces = self.trace_store if read_column is not None else None
+        spreadsheet_id = parse_sheet_url(sheet_url).spreadsheet_id
+        fingerprint, trace = None, None
+        replayed: List[TraceStep] = []
+        resume_note = ""
+
+        if traces is not None:
+            fingerprint = await layout_fingerprint(page, reason)
+            trace = traces.get(spreadsheet_id, fingerprint)
+        if trace is not None:
+            outcome = await replay_trace(page, trace, read_column)
+            if outcome.result is not None:
+                logger.info(f"📼 Replayed {len(trace.steps)}-step agent trace in {outcome.seconds:.2f}s")
+                return {
+                    **outcome.result,
+                    "message": f"Total of the '{trace.column}' column, replayed from a recorded agent run",
+                    "agent": {"mode": "replay", "steps": 0, "input_tokens": 0, "output_tokens": 0,
+                              "replayed": len(trace.steps), "seconds": outcome.seconds},
+                }
+            replayed = trace.steps[:outcome.failed_step]
+            resume_note = build_resume_note(replayed, trace.steps[outcome.failed_step], outcome.error)
+
+        logger.info(f"🤖 Falling back to the {self.mode} agent ({reason})")
+        if self.mode == "low_cost" and read_column is not None:
+            parsed = await self._run_low_cost(page, sheet_url, target_column, reason, read_column, resume_note)
+        else:
+            task = build_fallback_task(sheet_url, target_column, reason, resume_note)
+            parsed = await self._run_browser_use(page, context, task)
+        agent_info = {"mode": self.mode, **parsed["usage"], "replayed": len(replayed)}
+        if parsed["stopped"]:
+            agent_info["budget_exhausted"] = parsed["stopped"]
+
+        if parsed["total"] is None:
+            logger.warning(f"⚠️ Agent did not report a total: {parsed['text']!r}")
+            if trace is not None:
+                traces.invalidate(spreadsheet_id, fingerprint)
+            agent_info["seconds"] = round(time.perf_counter() - started, 3)
+            return {
+                "status": "error",
+                "total_expense": 0,
+                "message": f"Agent fallback could not determine the total ({reason})",
+                "agent": agent_info,
+            }
+
+        result = {
+            "status": "success",
+            "total_expense": parsed["total"],
+            "message": f"Total calculated by the browser agent after the direct path failed ({reason})",
+        }
+        # Use a total the DOM path reproduces for the column the agent found; record it for replay
+        verified = parsed.get("result")
+        if verified is None and read_column is not None and parsed["column"]:
+            verified = await read_column(parsed["column"])
+        if verified is not None and verified.get("status") == "success":
+            result = {**verified, "message": f"Total of the '{parsed['column']}' column found by the agent"}
+            if traces is not None and parsed["trace_steps"] is not None:
+                total_step = TraceStep("total", {"column": parsed["column"]})
+                traces.put(ActionTrace(spreadsheet_id, fingerprint, replayed + parsed["trace_steps"] + [total_step]))
+                agent_info["recorded"] = True
+        elif trace is not None:
+            traces.invalidate(spreadsheet_id, fingerprint)
+
+        agent_info["seconds"] = round(time.perf_counter() - started, 3)
+        logger.info(f"✅ Agent total: ${result['total_expense']:.2f} "
+                    f"({agent_info['steps']} steps, {agent_info['input_tokens']} input tokens)")
+        return {**result, "agent": agent_info}
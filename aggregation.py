@@ -0,0 +1,165 @@
+"""
+Header index and single-pass aggregation engine.
+Resolves target columns by normalized header name and computes several
+aggregates (optionally grouped by a category column) in one pass over a grid.
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from extraction import GridData
+from number_parsing import parse_numbers
+
+logger = logging.getLogger(__name__)
+
+AGGREGATE_FUNCTIONS = ("sum", "count", "min", "max", "mean")
+_FUNCTION_ALIASES = {"avg": "mean", "average": "mean", "total": "sum"}
+
+_SPEC_RE = re.compile(r"^\s*(\w+)\s+(.+?)(?:\s+by\s+(.+?))?\s*$", re.IGNORECASE)
+
+
+def normalize_header(name: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace ("Cost ($)" -> "cost")."""
+    return " ".join(re.sub(r"[^\w]+", " ", name or "").lower().split())
+
+
+class HeaderIndex:
+    """Maps normalized header names to column positions."""
+
+    def __init__(self, headers: Sequence[str]):
+        self.headers = list(headers)
+        self._normalized = [normalize_header(h) for h in self.headers]
+        self._positions: Dict[str, int] = {}
+        for position, name in enumerate(self._normalized):
+            if name:
+                self._positions.setdefault(name, position)
+
+    def find(self, name: str) -> Optional[int]:
+        """Exact normalized match first, then the first header containing ``name``."""
+        needle = normalize_header(name)
+        if not needle:
+            return None
+        if needle in self._positions:
+            return self._positions[needle]
+        for position, header in enumerate(self._normalized):
+            if needle in header:
+                return position
+        return None
+
+    def label(self, position: int) -> str:
+        return self.headers[position] if 0 <= position < len(self.headers) else ""
+
+
+@dataclass(frozen=True)
+class AggregateSpec:
+    """One requested aggregate, e.g. ``sum cost by category``."""
+    function: str
+    column: str
+    by: Optional[str] = None
+
+    def __str__(self) -> str:
+        text = f"{self.function} {self.column}"
+        return f"{text} by {self.by}" if self.by else text
+
+
+def parse_aggregate_specs(text: str) -> List[AggregateSpec]:
+    """
+    Parse a comma-separated request like ``"sum cost by category, max amount"``.
+    Raises ValueError for unknown functions or malformed entries.
+    """
+    specs = []
+    for part in (text or "").split(","):
+        if not part.strip():
+            continue
+        match = _SPEC_RE.match(part)
+        if not match:
+            raise ValueError(f"Cannot parse aggregate: '{part.strip()}'")
+        function = match.group(1).lower()
+        function = _FUNCTION_ALIASES.get(function, function)
+        if function not in AGGREGATE_FUNCTIONS:
+            raise ValueError(f"Unsupported aggregate function: '{match.group(1)}'")
+        specs.append(AggregateSpec(function, match.group(2).strip(), (match.group(3) or "").strip() or None))
+    return specs
+
+
+class _Stats:
+    __slots__ = ("sum", "count", "min", "max")
+
+    def __init__(self):
+        self.sum = 0.0
+        self.count = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, value: float):
+        self.sum += value
+        self.count += 1
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def value(self, function: str) -> Optional[float]:
+        if function == "mean":
+            return self.sum / self.count if self.count else None
+        return getattr(self, function)
+
+
+def aggregate_grid(grid: GridData, specs: Sequence[AggregateSpec],
+                   index: Optional[HeaderIndex] = None) -> List[Dict[str, Any]]:
+    """
+    Compute every spec in a single pass over the grid's rows.
+
+    Each value column is parsed once, as a vectorized batch, no matter how
+    many specs use it, and specs on the same (column, group) share one
+    accumulator.
+    """
+    index = index or HeaderIndex(grid.headers)
+    results: List[Dict[str, Any]] = []
+    # (value column, group column or None) -> stats (or group -> stats)
+    accumulators: Dict[tuple, Any] = {}
+    bound = []
+    for spec in specs:
+        column = index.find(spec.column)
+        by = index.find(spec.by) if spec.by else None
+        entry: Dict[str, Any] = {"aggregate": str(spec), "function": spec.function,
+                                 "column": index.label(column) if column is not None else spec.column}
+        if column is None or (spec.by and by is None):
+            missing = spec.column if column is None else spec.by
+            entry["error"] = f"No '{missing}' column found in sheet"
+            results.append(entry)
+            continue
+        if spec.by:
+            entry["by"] = index.label(by)
+        key = (column, by)
+        if key not in accumulators:
+            accumulators[key] = {} if by is not None else _Stats()
+        bound.append((entry, key))
+        results.append(entry)
+
+    numbers = {column: parse_numbers(grid.columns[column]) for column, _ in accumulators}
+    for i in range(grid.row_count):
+        for (column, by), acc in accumulators.items():
+            number = numbers[column][i]
+            if np.isnan(number):
+                continue
+            number = float(number)
+            if by is None:
+                acc.add(number)
+            else:
+                group = (grid.columns[by][i] or "").strip()
+                stats = acc.get(group)
+                if stats is None:
+                    stats = acc[group] = _Stats()
+                stats.add(number)
+
+    for entry, key in bound:
+        acc = accumulators[key]
+        if key[1] is None:
+            entry["value"] = acc.value(entry["function"])
+        else:
+            entry["groups"] = {group: stats.value(entry["function"]) for group, stats in acc.items()}
+    logger.info(f"🧮 Computed {len(results)} aggregates over {grid.row_count} rows")
+    return results
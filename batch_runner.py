@@ -0,0 +1,125 @@
+"""
+Concurrent multi-sheet batch runner.
+Processes many sheet URLs as separate browser contexts over one shared
+browser and streams a JSON line per sheet as soon as it finishes.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, TextIO
+
+from browser_pool import BrowserPool, get_browser_pool
+from google_sheet_automation import run_google_sheet_automation
+from result_cache import ResultCache, RevisionProbe
+from session_cache import SessionCache
+
+logger = logging.getLogger(__name__)
+
+
+def read_sheet_urls(lines: Iterable[str]) -> List[str]:
+    """Sheet URLs from lines of text, skipping blanks and # comments."""
+    urls = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            urls.append(line)
+    return urls
+
+
+async def run_batch(
+    sheet_urls: List[str],
+    email: str,
+    password: str,
+    output: TextIO,
+    concurrency: int = 4,
+    per_sheet_timeout: float = 300.0,
+    headless: bool = True,
+    pool: Optional[BrowserPool] = None,
+    session_cache: Optional[SessionCache] = None,
+    result_cache: Optional[ResultCache] = None,
+    revision_probe: Optional[RevisionProbe] = None,
+    **options: Any,
+) -> Dict[str, Any]:
+    """
+    Total many sheets concurrently over one shared browser.
+
+    Args:
+        sheet_urls: Sheets to process
+        email: Google account email
+        password: Google account password
+        output: Stream that receives one JSON line per sheet as it completes
+        concurrency: Maximum sheets processed at the same time
+        per_sheet_timeout: Seconds before a single sheet is abandoned
+        headless: Browser mode when borrowing from the shared pool
+        pool: Browser pool to borrow the shared browser from
+        session_cache: Shared session cache, so login happens at most once
+        result_cache: Cache of previous results, so unchanged sheets are skipped
+        revision_probe: Revision check used to validate cache hits
+        **options: Further GoogleSheetAutomation options
+
+    Returns:
+        Summary dict with succeeded/failed counts and elapsed time
+    """
+    start = time.perf_counter()
+    pool = pool or get_browser_pool(headless=headless)
+    options["inspect_delay"] = 0
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    counts = {"success": 0, "error": 0}
+
+    logger.info(f"📚 Batch of {len(sheet_urls)} sheets (concurrency={concurrency})")
+    pooled = await pool.checkout()
+
+    async def process(index: int, url: str):
+        async with semaphore:
+            sheet_start = time.perf_counter()
+            run = run_google_sheet_automation(url, email, password, headless=headless,
+                                              browser=pooled.browser,
+                                              session_cache=session_cache,
+                                              result_cache=result_cache,
+                                              revision_probe=revision_probe, **options)
+            try:
+                result = await asyncio.wait_for(run, per_sheet_timeout)
+            except asyncio.TimeoutError:
+                result = {"status": "error", "total_expense": 0,
+                          "message": f"Timed out after {per_sheet_timeout:.0f}s"}
+            except Exception as e:
+                logger.error(f"❌ Sheet {index} failed: {e}")
+                result = {"status": "error", "total_expense": 0, "message": str(e)}
+
+            record = {
+                "index": index,
+                "sheet_url": url,
+                "elapsed": round(time.perf_counter() - sheet_start, 3),
+                **result,
+            }
+            counts["success" if record.get("status") == "success" else "error"] += 1
+            output.write(json.dumps(record, default=str) + "\n")
+            output.flush()
+
+    tasks: List[asyncio.Task] = []
+    try:
+        pending = list(enumerate(sheet_urls))
+
+        # Without a cached session, log in once on the first sheet so the
+        # others start from the cached state instead of racing the login form
+        if pending and session_cache and session_cache.load(email) is None:
+            await process(*pending.pop(0))
+
+        tasks = [asyncio.create_task(process(index, url)) for index, url in pending]
+        for finished in asyncio.as_completed(tasks):
+            await finished
+    finally:
+        for task in tasks:
+            task.cancel()
+        await pool.checkin(pooled, healthy=pooled.browser.is_connected())
+
+    summary = {
+        "sheets": len(sheet_urls),
+        "succeeded": counts["success"],
+        "failed": counts["error"],
+        "elapsed": round(time.perf_counter() - start, 3),
+    }
+    logger.info(f"✅ Batch complete: {summary}")
+    return summary
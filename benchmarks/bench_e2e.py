@@ -0,0 +1,232 @@
+"""
+End-to-end benchmark of GoogleSheetAutomation against the local fake Sheets server.
+Runs every (rows x concurrent sheets) scenario through the real automation
+(Playwright + Chromium) and reports p50/p95 latency, rows/sec, peak RSS and
+median phase timings as JSON, so runs can be compared across commits.
+
+Usage:
+    python benchmarks/bench_e2e.py --rows 1,100,10000,100000 --concurrency 1,8,32 \\
+        --mode export --output bench.json [--baseline previous.json]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from browser_pool import BrowserPool  # noqa: E402
+from fake_sheets import FakeSheetsServer  # noqa: E402
+from google_sheet_automation import run_google_sheet_automation  # noqa: E402
+from session_cache import SessionCache  # noqa: E402
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+MODES = ("export", "query", "dom")
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q in 0..100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered) + 0.5) - 1))
+    return round(ordered[rank], 4)
+
+
+class PeakRss:
+    """Samples the RSS of this process and its children (Chromium) in a thread."""
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _current_mb(self) -> float:
+        if psutil is None:
+            # Without psutil only this process' own high-water mark is known (KB on Linux)
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        total = 0
+        try:
+            me = psutil.Process()
+            for process in [me, *me.children(recursive=True)]:
+                try:
+                    total += process.memory_info().rss
+                except psutil.Error:
+                    continue
+        except psutil.Error:
+            pass
+        return total / (1024 * 1024)
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, self._current_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "PeakRss":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, self._current_mb())
+
+
+async def run_scenario(rows: int, concurrency: int, mode: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """Run ``concurrency`` sheets at once, ``args.repeat`` times, and summarize."""
+    server = FakeSheetsServer(rows=rows, latency_ms=args.latency_ms).start()
+    pool = BrowserPool(size=min(args.browsers, concurrency), headless=True)
+    session_dir = tempfile.mkdtemp(prefix="bench-sessions-")
+    session_cache = None if args.login_every_run else SessionCache(session_dir)
+    expected = server.expected_total()
+    options = {
+        "extraction_mode": mode,
+        "request_filter": args.request_filter,
+        "harvest_time_budget": args.harvest_time_budget,
+    }
+
+    async def one(sheet: int) -> Dict[str, Any]:
+        started = time.perf_counter()
+        result = await run_google_sheet_automation(
+            server.sheet_url(f"bench-{sheet}"), "bench@example.com", "password",
+            headless=True, pool=pool, session_cache=session_cache, **options,
+        )
+        return {"seconds": time.perf_counter() - started, "result": result}
+
+    try:
+        # Launch the browsers and log in once; not part of the measurement
+        await asyncio.gather(*(one(-1 - i) for i in range(pool.size)))
+
+        runs: List[Dict[str, Any]] = []
+        with PeakRss() as rss:
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                runs += await asyncio.gather(*(one(sheet) for sheet in range(concurrency)))
+            wall = time.perf_counter() - started
+    finally:
+        await pool.close()
+        server.stop()
+
+    ok = [r for r in runs if r["result"].get("status") == "success"]
+    wrong = [r for r in ok if abs(r["result"].get("total_expense", 0) - expected) > 0.005]
+    latencies = [r["seconds"] for r in runs]
+    phases: Dict[str, List[float]] = {}
+    for run in ok:
+        for name, seconds in (run["result"].get("metrics") or {}).get("phases", {}).items():
+            phases.setdefault(name, []).append(seconds)
+
+    return {
+        "rows": rows,
+        "concurrency": concurrency,
+        "mode": mode,
+        "runs": len(runs),
+        "errors": len(runs) - len(ok),
+        "wrong_totals": len(wrong),
+        "sources": sorted({r["result"].get("source", "?") for r in ok}),
+        "wall_seconds": round(wall, 4),
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "rows_per_sec": round(rows * len(ok) / wall, 1) if wall else None,
+        "sheets_per_sec": round(len(ok) / wall, 3) if wall else None,
+        "peak_rss_mb": round(rss.peak_mb, 1),
+        "phases_p50": {name: percentile(values, 50) for name, values in sorted(phases.items())},
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Ratio of each metric to the baseline scenario with the same (rows, concurrency, mode)."""
+    previous = {(s["rows"], s["concurrency"], s["mode"]): s for s in baseline.get("scenarios", [])}
+    deltas = []
+    for scenario in report["scenarios"]:
+        before = previous.get((scenario["rows"], scenario["concurrency"], scenario["mode"]))
+        if before is None:
+            continue
+        ratios = {}
+        for metric in ("latency_p50", "latency_p95", "rows_per_sec", "peak_rss_mb"):
+            if scenario.get(metric) and before.get(metric):
+                ratios[metric] = round(scenario[metric] / before[metric], 3)
+        deltas.append({"rows": scenario["rows"], "concurrency": scenario["concurrency"],
+                       "mode": scenario["mode"], "vs_baseline": ratios})
+    return deltas
+
+
+def _int_list(text: str) -> List[int]:
+    return [int(part) for part in text.split(",") if part.strip()]
+
+
+async def run_all(args: argparse.Namespace) -> Dict[str, Any]:
+    scenarios = []
+    for mode in args.mode.split(","):
+        for rows in _int_list(args.rows):
+            for concurrency in _int_list(args.concurrency):
+                scenario = await run_scenario(rows, concurrency, mode, args)
+                print(json.dumps(scenario), file=sys.stderr)
+                scenarios.append(scenario)
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "started_at": time.time(),
+        "settings": {"repeat": args.repeat, "latency_ms": args.latency_ms, "browsers": args.browsers,
+                     "request_filter": args.request_filter, "login_every_run": args.login_every_run},
+        "scenarios": scenarios,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", default="1,100,10000,100000", help="Comma-separated row counts")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrent sheet counts")
+    parser.add_argument("--mode", default="export", help=f"Comma-separated extraction modes ({', '.join(MODES)})")
+    parser.add_argument("--repeat", type=int, default=3, help="Rounds of concurrent runs per scenario")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Delay the fake server adds per response")
+    parser.add_argument("--browsers", type=int, default=4, help="Browser pool size")
+    parser.add_argument("--request-filter", default="minimal")
+    parser.add_argument("--harvest-time-budget", type=float, default=600.0)
+    parser.add_argument("--login-every-run", action="store_true", help="Disable the session cache")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Previous report to compare against")
+    args = parser.parse_args()
+
+    unknown = set(args.mode.split(",")) - set(MODES)
+    if unknown:
+        parser.error(f"unknown mode(s): {', '.join(sorted(unknown))}")
+    logging.basicConfig(level=logging.WARNING)
+
+    report = asyncio.run(run_all(args))
+    if args.baseline:
+        report["comparison"] = compare(report, json.loads(Path(args.baseline).read_text()))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Micro-benchmark for number_parsing.parse_numbers.
+Parses 1M displayed cells (plain, currency, accounting negatives, decimal
+commas, blanks and text) and compares against the old per-cell float() loop.
+
+Usage: python benchmarks/bench_number_parsing.py [--cells 1000000]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from number_parsing import parse_numbers  # noqa: E402
+
+
+def make_cells(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    formats = [
+        lambda v: f"{v:.2f}",
+        lambda v: f"${v:,.2f}",
+        lambda v: f"({v:,.2f})",
+        lambda v: f"{v:,.2f} €".replace(",", "X").replace(".", ",").replace("X", "."),
+        lambda v: f"USD {v:,.0f}",
+        lambda v: "",
+        lambda v: "n/a",
+    ]
+    return [rng.choice(formats)(rng.uniform(0, 100000)) for _ in range(count)]
+
+
+def float_loop(cells):
+    values = []
+    for raw in cells:
+        if not raw:
+            continue
+        try:
+            values.append(float(raw))
+        except (ValueError, TypeError):
+            continue
+    return values
+
+
+def timed(fn, *args, repeat: int = 3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cells", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    cells = make_cells(args.cells)
+    vector_time, numbers = timed(parse_numbers, cells, repeat=args.repeat)
+    loop_time, loop_values = timed(float_loop, cells, repeat=args.repeat)
+    parsed = int((~(numbers != numbers)).sum())
+
+    print(json.dumps({
+        "cells": args.cells,
+        "parse_numbers": {
+            "seconds": round(vector_time, 3),
+            "cells_per_sec": round(args.cells / vector_time),
+            "parsed": parsed,
+        },
+        "float_loop": {
+            "seconds": round(loop_time, 3),
+            "cells_per_sec": round(args.cells / loop_time),
+            "parsed": len(loop_values),
+        },
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
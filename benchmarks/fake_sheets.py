@@ -0,0 +1,384 @@
+"""
+Local stand-in for Google Sheets used by the end-to-end benchmarks.
+Serves a login flow, a virtualized grid (data-header-column / data-value
+cells with data-row / data-column, scrolled through .native-scrollbar-y),
+sheet tabs, the CSV/XLSX export endpoint and the gviz query endpoint.
+Cell values are a deterministic function of (tab, row), so every tab has
+a known expected total.
+
+Usage: python benchmarks/fake_sheets.py --rows 10000 --tabs 2 --port 8765
+"""
+
+import argparse
+import csv
+import io
+import json
+import re
+import threading
+import time
+from functools import lru_cache
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+HEADERS = ["Date", "Category", "Description", "Cost"]
+CATEGORIES = ["Travel", "Meals", "Software", "Hardware", "Office"]
+SESSION_COOKIE = "SID"
+ROW_HEIGHT = 21
+
+_SHEET_RE = re.compile(r"^/spreadsheets/d/([A-Za-z0-9_-]+)/(edit|export|gviz/tq)$")
+_AGG_RE = re.compile(r"(sum|count|min|max|avg)\(([A-Z]+)\)", re.IGNORECASE)
+
+
+def tab_gid(tab: int) -> str:
+    return "0" if tab == 0 else str(1000 + tab)
+
+
+def cost_cents(tab: int, row: int) -> int:
+    """Cost of data row ``row`` (0-based) on tab ``tab``, in cents. Mirrored in _SHEET_HTML."""
+    return (row * 7919 + tab * 104729) % 1000000 + 1
+
+
+def format_cost(cents: int, row: int) -> str:
+    """Every third row is shown as currency with grouping, the rest as plain numbers."""
+    if row % 3 == 0:
+        return f"${cents / 100:,.2f}"
+    return f"{cents / 100:.2f}"
+
+
+def row_values(tab: int, row: int) -> List[str]:
+    return [
+        f"2024-{row % 12 + 1:02d}-{row % 28 + 1:02d}",
+        CATEGORIES[row % len(CATEGORIES)],
+        f"Item {row + 1}",
+        format_cost(cost_cents(tab, row), row),
+    ]
+
+
+def expected_total(tab: int, rows: int) -> float:
+    return round(sum(cost_cents(tab, r) for r in range(rows)) / 100, 2)
+
+
+@lru_cache(maxsize=32)
+def export_csv(tab: int, rows: int) -> bytes:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(HEADERS)
+    for row in range(rows):
+        writer.writerow(row_values(tab, row))
+    return out.getvalue().encode("utf-8")
+
+
+@lru_cache(maxsize=8)
+def export_xlsx(tab: int, rows: int) -> bytes:
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(HEADERS)
+    for row in range(rows):
+        sheet.append(row_values(tab, row))
+    out = io.BytesIO()
+    workbook.save(out)
+    return out.getvalue()
+
+
+def gviz_response(tab: int, rows: int, tq: str) -> Dict:
+    """Answer the two query shapes the client sends: column listing and aggregates."""
+    cols = [{"id": chr(ord("A") + i), "label": h, "type": "number" if h == "Cost" else "string"}
+            for i, h in enumerate(HEADERS)]
+    if re.match(r"^\s*select\s+\*\s+limit\s+0\s*$", tq, re.IGNORECASE):
+        return {"status": "ok", "table": {"cols": cols, "rows": []}}
+
+    aggregates = _AGG_RE.findall(tq)
+    if not aggregates:
+        return {"status": "error", "errors": [{"message": f"Unsupported query: {tq}"}]}
+    cells = []
+    for function, letter in aggregates:
+        index = ord(letter.upper()) - ord("A")
+        if HEADERS[index:index + 1] != ["Cost"]:
+            cells.append({"v": rows if function.lower() == "count" else None})
+            continue
+        values = [cost_cents(tab, r) / 100 for r in range(rows)]
+        value = {"sum": lambda: round(sum(values), 2), "count": lambda: len(values),
+                 "min": lambda: min(values, default=None), "max": lambda: max(values, default=None),
+                 "avg": lambda: sum(values) / len(values) if values else None}[function.lower()]()
+        cells.append({"v": value})
+    return {"status": "ok", "table": {"cols": [{"id": f"{f}-{l}"} for f, l in aggregates], "rows": [{"c": cells}]}}
+
+
+_LOGIN_HTML = """<!doctype html>
+<html><head><title>Sign in - Fake Google Accounts</title></head>
+<body>
+<div id="step"></div>
+<script>
+const next = new URLSearchParams(location.search).get('continue') || '/';
+const step = document.getElementById('step');
+const emailStep = () => {
+    step.innerHTML = '<input type="email" id="email"><button type="button">Next</button>';
+    step.querySelector('button').onclick = passwordStep;
+};
+const passwordStep = () => {
+    step.innerHTML = '<input type="password" id="password"><button type="button">Next</button>';
+    step.querySelector('button').onclick = async () => {
+        await fetch('/accounts/session', {method: 'POST', credentials: 'same-origin'});
+        location.href = next;
+    };
+};
+emailStep();
+</script>
+</body></html>
+"""
+
+_SHEET_HTML = """<!doctype html>
+<html><head><title>Fake Sheet %(sheet_id)s</title>
+<style>
+body { margin: 0; font: 13px sans-serif; }
+#waffle-grid-container { position: relative; width: 900px; height: 620px; }
+.header-row { display: flex; height: %(row_height)dpx; }
+.header-row div, .row div { width: 200px; flex: none; overflow: hidden; white-space: nowrap; }
+.native-scrollbar-y { position: relative; height: 560px; overflow-y: scroll; }
+.row { display: flex; position: absolute; left: 0; height: %(row_height)dpx; }
+.docs-sheet-tab { display: inline-block; padding: 4px 12px; cursor: pointer; }
+</style></head>
+<body>
+<div id="waffle-grid-container">
+  <div class="header-row"></div>
+  <div class="native-scrollbar-y"><div class="spacer"></div></div>
+</div>
+<div class="docs-sheet-tab-bar">%(tabs)s</div>
+<script>
+const ROWS = %(rows)d, ROW_HEIGHT = %(row_height)d, OVERSCAN = 5;
+const HEADERS = %(headers)s, CATEGORIES = %(categories)s, TABS = %(tab_gids)s;
+const scroller = document.querySelector('.native-scrollbar-y');
+const spacer = scroller.querySelector('.spacer');
+spacer.style.height = (ROWS * ROW_HEIGHT) + 'px';
+spacer.style.position = 'relative';
+document.querySelector('.header-row').innerHTML =
+    HEADERS.map((h, i) => `<div data-header-column="${i}">${h}</div>`).join('');
+
+const pad = n => String(n).padStart(2, '0');
+const costCents = (tab, row) => (row * 7919 + tab * 104729) %% 1000000 + 1;
+const formatCost = (cents, row) => {
+    const plain = (cents / 100).toFixed(2);
+    if (row %% 3 !== 0) return plain;
+    const [whole, frac] = plain.split('.');
+    return '$' + whole.replace(/\\B(?=(\\d{3})+(?!\\d))/g, ',') + '.' + frac;
+};
+const rowValues = (tab, row) => [
+    `2024-${pad(row %% 12 + 1)}-${pad(row %% 28 + 1)}`,
+    CATEGORIES[row %% CATEGORIES.length],
+    `Item ${row + 1}`,
+    formatCost(costCents(tab, row), row),
+];
+
+let tab = 0;
+const render = () => {
+    const first = Math.max(0, Math.floor(scroller.scrollTop / ROW_HEIGHT) - OVERSCAN);
+    const last = Math.min(ROWS, Math.ceil((scroller.scrollTop + scroller.clientHeight) / ROW_HEIGHT) + OVERSCAN);
+    let html = '';
+    for (let r = first; r < last; r++) {
+        // data-row is the 1-based sheet row (row 1 holds the headers)
+        html += `<div class="row" style="top:${r * ROW_HEIGHT}px">` + rowValues(tab, r).map((v, c) =>
+            `<div data-row="${r + 2}" data-column="${c}" data-value="${v}">${v}</div>`).join('') + '</div>';
+    }
+    spacer.innerHTML = html;
+};
+const activate = () => {
+    const match = /gid=(\\d+)/.exec(location.hash);
+    const index = match ? TABS.indexOf(match[1]) : 0;
+    tab = index < 0 ? 0 : index;
+    scroller.scrollTop = 0;
+    render();
+};
+scroller.addEventListener('scroll', render);
+window.addEventListener('hashchange', activate);
+document.querySelectorAll('.docs-sheet-tab').forEach(el => {
+    el.onclick = () => { location.hash = 'gid=' + el.getAttribute('data-sheet-gid'); };
+});
+activate();
+</script>
+</body></html>
+"""
+
+
+class FakeSheetsServer:
+    """
+    Threaded HTTP server imitating the parts of Google Sheets the automation uses.
+
+    Args:
+        rows: Data rows per tab
+        tabs: Number of worksheet tabs
+        latency_ms: Delay added to every response (simulated network/server time)
+        require_login: Redirect to the fake sign-in page until the session cookie is set
+        host/port: Bind address (port 0 picks a free port)
+    """
+
+    def __init__(self, rows: int = 100, tabs: int = 1, latency_ms: float = 0.0,
+                 require_login: bool = True, host: str = "127.0.0.1", port: int = 0):
+        self.rows = rows
+        self.tabs = max(1, tabs)
+        self.latency_ms = latency_ms
+        self.require_login = require_login
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def origin(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def sheet_url(self, sheet_id: str = "bench", tab: int = 0) -> str:
+        return f"{self.origin}/spreadsheets/d/{sheet_id}/edit#gid={tab_gid(tab)}"
+
+    def expected_total(self, tab: int = 0) -> float:
+        return expected_total(tab, self.rows)
+
+    def start(self) -> "FakeSheetsServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-sheets", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeSheetsServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _tab_index(self, gid: str) -> Optional[int]:
+        for tab in range(self.tabs):
+            if tab_gid(tab) == gid:
+                return tab
+        return None
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes = b"", content_type: str = "text/html; charset=utf-8",
+                      headers: Optional[List[Tuple[str, str]]] = None):
+                if server.latency_ms:
+                    time.sleep(server.latency_ms / 1000)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers or []:
+                    self.send_header(name, value)
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def _signed_in(self) -> bool:
+                if not server.require_login:
+                    return True
+                cookies = SimpleCookie(self.headers.get("Cookie", ""))
+                return SESSION_COOKIE in cookies
+
+            def do_POST(self):
+                with server._lock:
+                    server.requests += 1
+                if urlparse(self.path).path == "/accounts/session":
+                    cookie = f"{SESSION_COOKIE}=bench-session; Path=/; Max-Age=86400; HttpOnly"
+                    self._send(204, headers=[("Set-Cookie", cookie)])
+                else:
+                    self._send(404, b"not found")
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+
+                if url.path == "/accounts/signin":
+                    self._send(200, _LOGIN_HTML.encode())
+                    return
+
+                match = _SHEET_RE.match(url.path)
+                if not match:
+                    self._send(404, b"not found")
+                    return
+                if not self._signed_in():
+                    # Like Google: export and query requests also land on the sign-in page
+                    target = quote(self.path, safe="")
+                    self._send(302, headers=[("Location", f"/accounts/signin?continue={target}")])
+                    return
+
+                sheet_id, endpoint = match.groups()
+                tab = server._tab_index(query.get("gid", ["0"])[0])
+                if endpoint == "edit":
+                    self._send(200, server._sheet_html(sheet_id).encode())
+                elif tab is None:
+                    self._send(400, b"unknown gid", "text/plain")
+                elif endpoint == "export":
+                    fmt = query.get("format", ["csv"])[0]
+                    if fmt == "csv":
+                        self._send(200, export_csv(tab, server.rows), "text/csv; charset=utf-8")
+                    elif fmt == "xlsx":
+                        self._send(200, export_xlsx(tab, server.rows),
+                                   "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+                    else:
+                        self._send(400, b"unsupported format", "text/plain")
+                else:
+                    tq = unquote(query.get("tq", [""])[0])
+                    payload = json.dumps(gviz_response(tab, server.rows, tq))
+                    body = f"/*O_o*/\ngoogle.visualization.Query.setResponse({payload});"
+                    self._send(200, body.encode(), "application/javascript; charset=utf-8")
+
+            do_HEAD = do_GET
+
+        return Handler
+
+    def _sheet_html(self, sheet_id: str) -> str:
+        tabs = "".join(
+            f'<div class="docs-sheet-tab" data-sheet-gid="{tab_gid(t)}">'
+            f'<span class="docs-sheet-tab-name">Sheet{t + 1}</span></div>'
+            for t in range(self.tabs)
+        )
+        return _SHEET_HTML % {
+            "sheet_id": sheet_id,
+            "rows": self.rows,
+            "row_height": ROW_HEIGHT,
+            "headers": json.dumps(HEADERS),
+            "categories": json.dumps(CATEGORIES),
+            "tab_gids": json.dumps([tab_gid(t) for t in range(self.tabs)]),
+            "tabs": tabs,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--tabs", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--no-login", action="store_true", help="Serve sheets without the sign-in step")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = FakeSheetsServer(rows=args.rows, tabs=args.tabs, latency_ms=args.latency_ms,
+                              require_login=not args.no_login, port=args.port)
+    print(f"Serving {args.rows} rows x {args.tabs} tab(s) at {server.sheet_url()}")
+    for tab in range(server.tabs):
+        print(f"  gid={tab_gid(tab)} expected total: {server.expected_total(tab):,.2f}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
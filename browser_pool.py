@@ -0,0 +1,269 @@
+"""
+Warm browser pool for Playwright automation.
+Keeps N Chromium instances alive and hands out lightweight contexts per run.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Set, Tuple
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Playwright
+
+# psutil is optional: without it the RSS ceiling is simply not enforced
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    psutil = None
+    PSUTIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PooledBrowser:
+    """A pooled Chromium instance plus the bookkeeping used for recycling."""
+    browser: Browser
+    pid: Optional[int] = None
+    runs: int = 0
+    created_at: float = field(default_factory=time.monotonic)
+
+    def rss_mb(self) -> Optional[float]:
+        """Resident memory of the browser process tree in MB (None if unknown)."""
+        if not PSUTIL_AVAILABLE or self.pid is None:
+            return None
+        try:
+            root = psutil.Process(self.pid)
+            procs = [root] + root.children(recursive=True)
+            total = 0
+            for proc in procs:
+                try:
+                    total += proc.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+            return total / (1024 * 1024)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+
+
+class BrowserPool:
+    """
+    Long-lived pool of warm Chromium browsers.
+
+    Browsers are launched lazily up to ``size`` and shared through
+    checkout/checkin. Each run should use its own context (see ``context()``),
+    which is cheap compared to launching Chromium. Browsers are recycled after
+    ``max_runs`` checkouts or when their process tree exceeds ``max_rss_mb``.
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        headless: bool = False,
+        max_runs: int = 50,
+        max_rss_mb: Optional[float] = None,
+        launch_options: Optional[Dict[str, Any]] = None,
+    ):
+        self.size = max(1, size)
+        self.headless = headless
+        self.max_runs = max_runs
+        self.max_rss_mb = max_rss_mb
+        self.launch_options = launch_options or {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._playwright: Optional[Playwright] = None
+        self._idle: Deque[PooledBrowser] = deque()
+        self._launched = 0
+        # Guards _idle and _launched; notified whenever a browser or launch slot frees up
+        self._available: asyncio.Condition = None
+        self._closed = False
+
+    async def start(self):
+        """Start the Playwright driver (browsers are launched on demand)."""
+        if self._playwright is not None:
+            return
+        self.loop = asyncio.get_running_loop()
+        self._available = asyncio.Condition()
+        logger.info(f"🌐 Starting browser pool (size={self.size}, headless={self.headless})...")
+        self._playwright = await async_playwright().start()
+
+    async def _launch(self) -> PooledBrowser:
+        """Launch a new browser and work out its root process id."""
+        # Launches are serialized so the new child processes can be attributed
+        before = _child_pids()
+        browser = await self._playwright.chromium.launch(headless=self.headless, **self.launch_options)
+        new_pids = _child_pids() - before
+        pid = _root_pid(new_pids)
+        logger.info(f"✅ Browser launched (pid={pid})")
+        return PooledBrowser(browser=browser, pid=pid)
+
+    async def _is_healthy(self, pooled: PooledBrowser) -> bool:
+        """Check that a browser is still connected and usable."""
+        try:
+            if not pooled.browser.is_connected():
+                return False
+            # is_connected() only tracks the websocket; version confirms the handle is live
+            return bool(pooled.browser.version)
+        except Exception:
+            return False
+
+    def _needs_recycle(self, pooled: PooledBrowser) -> bool:
+        if self.max_runs and pooled.runs >= self.max_runs:
+            logger.info(f"♻️ Recycling browser after {pooled.runs} runs")
+            return True
+        if self.max_rss_mb:
+            rss = pooled.rss_mb()
+            if rss is not None and rss > self.max_rss_mb:
+                logger.info(f"♻️ Recycling browser at {rss:.0f} MB RSS (limit {self.max_rss_mb:.0f} MB)")
+                return True
+        return False
+
+    async def _discard(self, pooled: PooledBrowser):
+        async with self._available:
+            self._launched -= 1
+            # The freed launch slot lets a waiting checkout start a replacement
+            self._available.notify()
+        try:
+            await pooled.browser.close()
+        except Exception as e:
+            logger.debug(f"Ignoring error while closing browser: {e}")
+
+    async def checkout(self, timeout: Optional[float] = None) -> PooledBrowser:
+        """Borrow a healthy browser, launching one if the pool is not full."""
+        if self._closed:
+            raise RuntimeError("Browser pool is closed")
+        await self.start()
+
+        while True:
+            async with self._available:
+                await asyncio.wait_for(
+                    self._available.wait_for(lambda: self._closed or self._idle or self._launched < self.size),
+                    timeout,
+                )
+                if self._closed:
+                    raise RuntimeError("Browser pool is closed")
+                if self._idle:
+                    pooled = self._idle.popleft()
+                else:
+                    self._launched += 1
+                    try:
+                        pooled = await self._launch()
+                    except Exception:
+                        self._launched -= 1
+                        self._available.notify()
+                        raise
+
+            if await self._is_healthy(pooled):
+                pooled.runs += 1
+                return pooled
+
+            logger.warning("⚠️ Discarding unhealthy browser from pool")
+            await self._discard(pooled)
+
+    async def checkin(self, pooled: PooledBrowser, healthy: bool = True):
+        """Return a browser to the pool, recycling it when required."""
+        if self._closed or not healthy or self._needs_recycle(pooled):
+            await self._discard(pooled)
+            return
+        async with self._available:
+            self._idle.append(pooled)
+            self._available.notify()
+
+    @asynccontextmanager
+    async def context(self, **context_options) -> AsyncIterator[BrowserContext]:
+        """Borrow a browser and yield a fresh context that is closed afterwards."""
+        pooled = await self.checkout()
+        healthy = True
+        context = None
+        try:
+            context = await pooled.browser.new_context(**context_options)
+            yield context
+        except Exception:
+            healthy = await self._is_healthy(pooled)
+            raise
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception:
+                    healthy = False
+            await self.checkin(pooled, healthy=healthy)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "launched": self._launched,
+            "idle": len(self._idle),
+        }
+
+    async def close(self):
+        """Close every idle browser and stop the Playwright driver."""
+        self._closed = True
+        if self._available is not None:
+            async with self._available:
+                idle, self._idle = list(self._idle), deque()
+                # Waiting checkouts wake up and fail instead of hanging
+                self._available.notify_all()
+            for pooled in idle:
+                try:
+                    await pooled.browser.close()
+                except Exception:
+                    pass
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+            logger.info("✅ Browser pool closed")
+
+
+def _child_pids() -> Set[int]:
+    if not PSUTIL_AVAILABLE:
+        return set()
+    try:
+        return {p.pid for p in psutil.Process().children(recursive=True)}
+    except psutil.Error:
+        return set()
+
+
+def _root_pid(pids: Set[int]) -> Optional[int]:
+    """Pick the process in ``pids`` whose parent is not also in ``pids``."""
+    if not pids:
+        return None
+    for pid in pids:
+        try:
+            if psutil.Process(pid).ppid() not in pids:
+                return pid
+        except psutil.Error:
+            continue
+    return None
+
+
+# One shared pool per (headless, event loop): a pool is bound to the loop that
+# started its Playwright driver, so each loop thread gets its own
+_pools: Dict[Tuple[bool, asyncio.AbstractEventLoop], BrowserPool] = {}
+
+
+def get_browser_pool(
+    headless: bool = False,
+    size: int = 1,
+    max_runs: int = 50,
+    max_rss_mb: Optional[float] = None,
+) -> BrowserPool:
+    """Return the shared pool for the running event loop, creating it if needed."""
+    loop = asyncio.get_running_loop()
+    pool = _pools.get((headless, loop))
+    if pool is None or pool._closed:
+        pool = BrowserPool(size=size, headless=headless, max_runs=max_runs, max_rss_mb=max_rss_mb)
+        _pools[(headless, loop)] = pool
+    return pool
+
+
+async def close_browser_pools():
+    """Close every pool owned by the running event loop."""
+    loop = asyncio.get_running_loop()
+    for key, pool in list(_pools.items()):
+        if key[1] is loop:
+            await pool.close()
+            _pools.pop(key, None)
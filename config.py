@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import List, Optional
 import os
 
 
@@ -11,6 +12,59 @@ class GoogleSheetConfig:
     base_url: str
     email: str
     password: str
+    pool_size: int = 1
+    max_runs_per_browser: int = 50
+    max_browser_rss_mb: Optional[float] = None
+    session_cache_dir: Optional[str] = None
+    session_ttl_hours: float = 168
+    navigation_timeout_ms: int = 30000
+    grid_timeout_ms: int = 20000
+    inspect_delay: float = 0.0
+    aggregate_in_page: bool = False
+    scroll_harvest: bool = True
+    harvest_time_budget: float = 120.0
+    harvest_viewport_height: Optional[int] = None
+    extraction_mode: str = "auto"
+    export_format: str = "csv"
+    target_column: str = "cost"
+    aggregations: str = ""
+    all_tabs: bool = False
+    result_cache_path: Optional[str] = None
+    result_cache_ttl: float = 900
+    result_cache_max_entries: int = 256
+    incremental_store_path: Optional[str] = None
+    request_filter: str = "minimal"
+    static_asset_cache_dir: Optional[str] = None
+    static_asset_cache_mb: float = 200
+    metrics_jsonl_path: Optional[str] = None
+    metrics_prometheus_path: Optional[str] = None
+    trace_dir: Optional[str] = None
+    trace_sample_rate: float = 0.1
+    trace_keep: int = 5
+    trace_min_seconds: float = 0.0
+    agent_fallback: bool = False
+    agent_max_steps: int = 25
+    agent_mode: str = "low_cost"
+    agent_max_tokens: int = 20000
+    agent_max_seconds: float = 120.0
+    agent_temperature: float = 0.0
+    agent_max_output_tokens: int = 512
+    agent_use_vision: bool = False
+    agent_stub_responses: Optional[str] = None
+    agent_trace_cache_path: Optional[str] = None
+    service_url: Optional[str] = None
+    service_host: str = "127.0.0.1"
+    service_port: int = 8770
+    service_workers: int = 1
+    service_max_queued: int = 100
+    service_queue_path: Optional[str] = None
+    service_token: Optional[str] = None
+    service_token_path: Optional[str] = None
+    service_allowed_origins: List[str] = field(default_factory=list)
+    service_allowed_hosts: List[str] = field(default_factory=list)
+    sheet_urls: List[str] = field(default_factory=list)
+    batch_concurrency: int = 4
+    sheet_timeout: float = 300.0
 
 
 def get_config() -> GoogleSheetConfig:
@@ -27,4 +81,76 @@ def get_config() -> GoogleSheetConfig:
         ),
         email=os.getenv("MAIL_ID", ""),
         password=os.getenv("MAIL_PASSWORD", ""),
+        pool_size=int(os.getenv("BROWSER_POOL_SIZE", "1")),
+        max_runs_per_browser=int(os.getenv("BROWSER_MAX_RUNS", "50")),
+        max_browser_rss_mb=float(os.environ["BROWSER_MAX_RSS_MB"]) if os.getenv("BROWSER_MAX_RSS_MB") else None,
+        session_cache_dir=(
+            None if os.getenv("SESSION_CACHE", "true").lower() == "false"
+            else os.getenv("SESSION_CACHE_DIR", "~/.cache/google-sheet-agent/sessions")
+        ),
+        session_ttl_hours=float(os.getenv("SESSION_TTL_HOURS", "168")),
+        navigation_timeout_ms=int(os.getenv("NAVIGATION_TIMEOUT_MS", "30000")),
+        grid_timeout_ms=int(os.getenv("GRID_TIMEOUT_MS", "20000")),
+        inspect_delay=float(os.getenv("INSPECT_DELAY", "0")),
+        aggregate_in_page=os.getenv("AGGREGATE_IN_PAGE", "false").lower() == "true",
+        scroll_harvest=os.getenv("SCROLL_HARVEST", "true").lower() == "true",
+        harvest_time_budget=float(os.getenv("HARVEST_TIME_BUDGET", "120")),
+        harvest_viewport_height=int(os.environ["HARVEST_VIEWPORT_HEIGHT"]) if os.getenv("HARVEST_VIEWPORT_HEIGHT") else None,
+        extraction_mode=os.getenv("EXTRACTION_MODE", "auto").lower(),
+        export_format=os.getenv("EXPORT_FORMAT", "csv").lower(),
+        target_column=os.getenv("TARGET_COLUMN", "cost"),
+        aggregations=os.getenv("AGGREGATIONS", ""),
+        all_tabs=os.getenv("ALL_TABS", "false").lower() == "true",
+        result_cache_path=(
+            None if os.getenv("RESULT_CACHE", "true").lower() == "false"
+            else os.getenv("RESULT_CACHE_PATH", "~/.cache/google-sheet-agent/results.sqlite3")
+        ),
+        result_cache_ttl=float(os.getenv("RESULT_CACHE_TTL", "900")),
+        result_cache_max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "256")),
+        incremental_store_path=(
+            os.getenv("INCREMENTAL_STORE_PATH", "~/.cache/google-sheet-agent/incremental.sqlite3")
+            if os.getenv("INCREMENTAL", "false").lower() == "true" else None
+        ),
+        request_filter=os.getenv("REQUEST_FILTER", "minimal").lower(),
+        static_asset_cache_dir=(
+            os.getenv("STATIC_ASSET_CACHE_DIR", "~/.cache/google-sheet-agent/static-assets")
+            if os.getenv("STATIC_ASSET_CACHE", "false").lower() == "true" else None
+        ),
+        static_asset_cache_mb=float(os.getenv("STATIC_ASSET_CACHE_MB", "200")),
+        metrics_jsonl_path=os.getenv("METRICS_JSONL") or None,
+        metrics_prometheus_path=os.getenv("METRICS_PROM_FILE") or None,
+        trace_dir=os.getenv("TRACE_DIR") or None,
+        trace_sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "0.1")),
+        trace_keep=int(os.getenv("TRACE_KEEP", "5")),
+        trace_min_seconds=float(os.getenv("TRACE_MIN_SECONDS", "0")),
+        # The agent needs an LLM key, so the fallback defaults on only when one is set
+        agent_fallback=os.getenv("AGENT_FALLBACK", "true" if os.getenv("GEMINI_API_KEY") else "false").lower() == "true",
+        agent_max_steps=int(os.getenv("AGENT_MAX_STEPS", "25")),
+        agent_mode=os.getenv("AGENT_MODE", "low_cost").lower(),
+        agent_max_tokens=int(os.getenv("AGENT_MAX_TOKENS", "20000")),
+        agent_max_seconds=float(os.getenv("AGENT_MAX_SECONDS", "120")),
+        agent_temperature=float(os.getenv("AGENT_TEMPERATURE", "0")),
+        agent_max_output_tokens=int(os.getenv("AGENT_MAX_OUTPUT_TOKENS", "512")),
+        agent_use_vision=os.getenv("AGENT_USE_VISION", "false").lower() == "true",
+        agent_stub_responses=os.getenv("AGENT_STUB_RESPONSES") or None,
+        agent_trace_cache_path=(
+            None if os.getenv("AGENT_TRACE_CACHE", "true").lower() == "false"
+            else os.getenv("AGENT_TRACE_CACHE_PATH", "~/.cache/google-sheet-agent/agent-traces.sqlite3")
+        ),
+        service_url=os.getenv("SERVICE_URL") or None,
+        service_host=os.getenv("SERVICE_HOST", "127.0.0.1"),
+        service_port=int(os.getenv("SERVICE_PORT", "8770")),
+        # One worker slot per warm browser unless set explicitly
+        service_workers=int(os.getenv("SERVICE_WORKERS") or os.getenv("BROWSER_POOL_SIZE", "1")),
+        service_max_queued=int(os.getenv("SERVICE_MAX_QUEUED", "100")),
+        service_queue_path=os.getenv("SERVICE_QUEUE_PATH", "~/.cache/google-sheet-agent/jobs.sqlite3") or None,
+        service_token=os.getenv("SERVICE_TOKEN") or None,
+        service_token_path=os.getenv("SERVICE_TOKEN_PATH", "~/.cache/google-sheet-agent/service.token") or None,
+        # Sheet origins besides https://docs.google.com the service may open, e.g. the benchmark fake server
+        service_allowed_origins=os.getenv("SERVICE_ALLOWED_ORIGINS", "").replace(",", " ").split(),
+        # Host names clients may use besides loopback and SERVICE_HOST, e.g. when serving on 0.0.0.0
+        service_allowed_hosts=os.getenv("SERVICE_ALLOWED_HOSTS", "").replace(",", " ").split(),
+        sheet_urls=os.getenv("GOOGLE_SHEET_URLS", "").replace(",", " ").split(),
+        batch_concurrency=int(os.getenv("BATCH_CONCURRENCY", "4")),
+        sheet_timeout=float(os.getenv("SHEET_TIMEOUT", "300")),
     )
@@ -0,0 +1,180 @@
+"""
+Bulk DOM extraction for the rendered Google Sheets grid.
+Collects headers and cell values in a single page.evaluate round trip.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from playwright.async_api import Page
+
+from number_parsing import NUMBER_PARSER_JS, parse_number_list
+from readiness import CELL_SELECTOR, HEADER_SELECTOR
+
+logger = logging.getLogger(__name__)
+
+# Shared helpers: resolve each value cell to a (row, column) position. Cells
+# may carry data-row/data-column attributes; otherwise the column is inferred
+# from the header whose horizontal span contains the cell centre and the row
+# from the cell's vertical offset (plus `offsetY`, the scroll position).
+# Also brings in parseNumber for formatted cell text.
+GRID_HELPERS_JS = NUMBER_PARSER_JS + """
+const readGrid = (headerSelector, cellSelector, offsetY = window.scrollY) => {
+    const headerEls = Array.from(document.querySelectorAll(headerSelector));
+    const headers = [];
+    const spans = [];
+    headerEls.forEach((el, order) => {
+        const attr = parseInt(el.getAttribute('data-header-column'), 10);
+        const idx = Number.isNaN(attr) ? order : attr;
+        const rect = el.getBoundingClientRect();
+        headers[idx] = (el.textContent || '').trim();
+        spans[idx] = [rect.left, rect.right];
+    });
+    for (let i = 0; i < headers.length; i++) {
+        if (headers[i] === undefined) { headers[i] = ''; spans[i] = null; }
+    }
+
+    const intAttr = (el, names) => {
+        for (const name of names) {
+            const raw = el.getAttribute(name);
+            if (raw !== null && raw !== '') {
+                const n = parseInt(raw, 10);
+                if (!Number.isNaN(n)) return n;
+            }
+        }
+        return null;
+    };
+
+    const cells = [];
+    for (const el of document.querySelectorAll(cellSelector)) {
+        const value = el.getAttribute('data-value');
+        const raw = value !== null && value !== '' ? value : (el.textContent || '').trim();
+        let col = intAttr(el, ['data-column', 'aria-colindex']);
+        let row = intAttr(el, ['data-row', 'aria-rowindex']);
+        if (row === null && el.parentElement) row = intAttr(el.parentElement, ['data-row', 'aria-rowindex']);
+        if (col === null || row === null) {
+            const rect = el.getBoundingClientRect();
+            if (col === null) {
+                const cx = (rect.left + rect.right) / 2;
+                col = spans.findIndex(s => s && cx >= s[0] && cx < s[1]);
+            }
+            if (row === null) row = -Math.round(rect.top + offsetY) - 1;
+        }
+        cells.push([row, col, raw]);
+    }
+    return {headers, cells};
+};
+"""
+
+# Header texts only, positioned like readGrid does (data-header-column or order)
+_READ_HEADERS_JS = """
+(headerSelector) => {
+    const headers = [];
+    Array.from(document.querySelectorAll(headerSelector)).forEach((el, order) => {
+        const attr = parseInt(el.getAttribute('data-header-column'), 10);
+        headers[Number.isNaN(attr) ? order : attr] = (el.textContent || '').trim();
+    });
+    return Array.from(headers, h => h === undefined ? '' : h);
+}
+"""
+
+# Returns a compact columnar payload: one array per header column aligned
+# with `rows`, plus values whose column could not be resolved.
+_EXTRACT_GRID_JS = "({headerSelector, cellSelector}) => {" + GRID_HELPERS_JS + """
+    const {headers, cells} = readGrid(headerSelector, cellSelector);
+    const rowPos = new Map();
+    const rows = [];
+    const loose = [];
+    for (const [row, col, raw] of cells) {
+        if (col < 0 || col >= headers.length) { loose.push(raw); continue; }
+        if (!rowPos.has(row)) { rowPos.set(row, rows.length); rows.push(row); }
+    }
+    const order = rows.map((r, i) => i).sort((a, b) => rows[a] - rows[b]);
+    const position = new Array(rows.length);
+    order.forEach((orig, sorted) => { position[orig] = sorted; });
+    const columns = headers.map(() => new Array(rows.length).fill(null));
+    for (const [row, col, raw] of cells) {
+        if (col < 0 || col >= headers.length) continue;
+        columns[col][position[rowPos.get(row)]] = raw;
+    }
+    return {headers, rows: order.map(i => rows[i]), columns, loose};
+}
+"""
+
+# Aggregates numeric cells without sending them back to Python.
+# column < 0 aggregates every numeric cell on the grid.
+_AGGREGATE_JS = "({headerSelector, cellSelector, column}) => {" + GRID_HELPERS_JS + """
+    const {cells} = readGrid(headerSelector, cellSelector);
+    let sum = 0, count = 0, min = null, max = null;
+    for (const [row, col, raw] of cells) {
+        if (column >= 0 && col !== column) continue;
+        const num = parseNumber(raw);
+        if (num === null) continue;
+        sum += num;
+        count += 1;
+        min = min === null ? num : Math.min(min, num);
+        max = max === null ? num : Math.max(max, num);
+    }
+    return {sum, count, min, max};
+}
+"""
+
+
+@dataclass
+class GridData:
+    """Columnar snapshot of the rendered grid."""
+    headers: List[str] = field(default_factory=list)
+    rows: List[int] = field(default_factory=list)
+    columns: List[List[Optional[str]]] = field(default_factory=list)
+    loose: List[str] = field(default_factory=list)
+    # Size of the downloaded payload the grid was parsed from (0 for the DOM)
+    source_bytes: int = 0
+
+    @property
+    def row_count(self) -> int:
+        return len(self.rows)
+
+    def column(self, index: int) -> List[Optional[str]]:
+        """Raw values of one column, aligned with ``rows``."""
+        if 0 <= index < len(self.columns):
+            return self.columns[index]
+        return []
+
+    def all_values(self) -> List[str]:
+        """Every non-empty raw value on the grid, column by column."""
+        values = [v for col in self.columns for v in col if v]
+        values.extend(v for v in self.loose if v)
+        return values
+
+
+async def extract_grid(page: Page) -> GridData:
+    """Read headers and every rendered value cell in one round trip."""
+    payload = await page.evaluate(
+        _EXTRACT_GRID_JS,
+        {"headerSelector": HEADER_SELECTOR, "cellSelector": CELL_SELECTOR},
+    )
+    grid = GridData(**payload)
+    logger.info(f"📦 Extracted {grid.row_count} rows x {len(grid.headers)} columns "
+                f"({len(grid.loose)} unplaced cells)")
+    return grid
+
+
+async def read_headers(page: Page) -> List[str]:
+    """Header texts of the rendered grid, indexed by column position."""
+    return await page.evaluate(_READ_HEADERS_JS, HEADER_SELECTOR)
+
+
+async def aggregate_in_page(page: Page, column: int = -1) -> Dict[str, Any]:
+    """Compute sum/count/min/max of numeric cells inside the page."""
+    return await page.evaluate(
+        _AGGREGATE_JS,
+        {"headerSelector": HEADER_SELECTOR, "cellSelector": CELL_SELECTOR, "column": column},
+    )
+
+
+def parse_values(raw_values: List[Optional[str]]) -> List[float]:
+    """Parse raw cell strings (formatted or not) as floats, skipping anything non-numeric."""
+    if not raw_values:
+        return []
+    return parse_number_list(raw_values)
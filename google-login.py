@@ -1,10 +1,22 @@
 """
 CLI entry point for Google Sheet Expense Agent.
 Run this to test browser automation from the command line.
+
+Batch mode totals many sheets concurrently and prints one JSON line per sheet:
+    python google-login.py --batch sheets.txt --concurrency 8 --output results.jsonl
+
+With SERVICE_URL (or --service) set, runs are handed to a running service.py
+instead of starting a browser in this process.
 """
 
+import argparse
 import logging
-from run import run_agent_sync
+import sys
+
+from batch_runner import read_sheet_urls
+from config import get_config
+from result_values import without_buffers
+from service_client import ServiceClient
 
 # Setup logging
 logging.basicConfig(
@@ -14,13 +26,76 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Google Sheet Expense Agent")
+    parser.add_argument(
+        "--batch", nargs="?", const="", metavar="FILE",
+        help="Process many sheets: URLs from FILE ('-' for stdin) or GOOGLE_SHEET_URLS",
+    )
+    parser.add_argument("--concurrency", type=int, help="Sheets processed at the same time (batch mode)")
+    parser.add_argument("--timeout", type=float, help="Seconds allowed per sheet (batch mode)")
+    parser.add_argument("--output", metavar="FILE", help="Write JSON lines here instead of stdout (batch mode)")
+    parser.add_argument("--service", metavar="URL", default=get_config().service_url,
+                        help="Submit to a running automation service (default: SERVICE_URL)")
+    parser.add_argument("--local", action="store_true", help="Run in this process even if SERVICE_URL is set")
+    return parser.parse_args()
+
+
+def service_client(args):
+    """Client for the automation service, or None to run in-process."""
+    if args.local or not args.service:
+        return None
+    return ServiceClient.from_config(get_config(), args.service)
+
+
+def run_batch_mode(args):
+    if args.batch == "-":
+        urls = read_sheet_urls(sys.stdin)
+    elif args.batch:
+        with open(args.batch) as f:
+            urls = read_sheet_urls(f)
+    else:
+        urls = get_config().sheet_urls
+
+    if not urls:
+        logger.error("❌ No sheet URLs given (use --batch FILE or set GOOGLE_SHEET_URLS)")
+        exit(1)
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    client = service_client(args)
+    try:
+        if client is not None:
+            # Per-sheet timeouts and concurrency are the service's; --timeout bounds the wait
+            summary = client.run_batch(urls, output, timeout=args.timeout and args.timeout * len(urls))
+        else:
+            from run import run_batch_sync
+            summary = run_batch_sync(urls, output, concurrency=args.concurrency, per_sheet_timeout=args.timeout)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    logger.info(f"📊 Batch summary: {summary}")
+    if summary["failed"]:
+        exit(2)
+
+
 def main():
+    args = parse_args()
+    if args.batch is not None:
+        run_batch_mode(args)
+        return
+
     logger.info("=" * 60)
     logger.info("🤖 Google Sheet Expense Agent - CLI Mode")
     logger.info("=" * 60)
     
     try:
-        result = run_agent_sync()
+        client = service_client(args)
+        if client is not None:
+            result = client.run(get_config().base_url, label="cli")
+        else:
+            from run import run_agent_sync
+            result = run_agent_sync()
         
         logger.info("=" * 60)
         logger.info("✅ Agent finished successfully!")
@@ -28,7 +103,8 @@ def main():
         
         if isinstance(result, dict):
             logger.info("📊 Results:")
-            for key, value in result.items():
+            # The values buffer is base64 of every number found; log its size only
+            for key, value in without_buffers(result).items():
                 logger.info(f"  {key}: {value}")
         else:
             logger.info(f"Result: {result}")
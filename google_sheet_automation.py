@@ -5,8 +5,28 @@ This module handles real browser automation with visible window.
 
 import asyncio
 import logging
-from typing import Dict, List, Any
-from playwright.async_api import async_playwright, Page, Browser
+from typing import TYPE_CHECKING, Dict, List, Any, Optional
+from playwright.async_api import Page, Browser, BrowserContext, TimeoutError as PlaywrightTimeoutError
+
+from aggregation import HeaderIndex, aggregate_grid, parse_aggregate_specs
+from browser_pool import BrowserPool, PooledBrowser, get_browser_pool
+from extraction import GridData, aggregate_in_page, extract_grid, parse_values, read_headers
+from harvester import harvest_grid
+from incremental import IncrementalStore, fold_prefix, fold_tail, full_fold, incremental_key
+from metrics import RunMetrics, TraceSampler, annotate, timed
+from progress import ProgressCallback, ProgressEvent
+from readiness import ReadinessTimeouts, wait_for_sheet_ready
+from request_filter import RequestFilter, StaticAssetCache, get_filter_profile
+from result_cache import ResultCache, RevisionProbe, result_cache_key
+from result_values import attach_values
+from session_cache import SessionCache
+from sheet_export import ExportBlocked, SheetRef, export_grid, parse_sheet_url
+from sheet_query import PlaywrightQueryTransport, QueryError, QueryTransport, SheetQuery
+from sheet_tabs import SheetTab, discover_tabs, switch_to_tab
+
+if TYPE_CHECKING:
+    # agent_builder pulls in browser-use/LLM clients; only needed when a fallback is passed
+    from agent_builder import AgentFallback
 
 logger = logging.getLogger(__name__)
 
@@ -14,41 +34,236 @@ logger = logging.getLogger(__name__)
 class GoogleSheetAutomation:
     """Automate Google Sheets interaction with visible browser."""
     
-    def __init__(self, sheet_url: str, email: str, password: str, headless: bool = False):
+    def __init__(
+        self,
+        sheet_url: str,
+        email: str,
+        password: str,
+        headless: bool = False,
+        pool: Optional[BrowserPool] = None,
+        session_cache: Optional[SessionCache] = None,
+        timeouts: Optional[ReadinessTimeouts] = None,
+        inspect_delay: float = 0.0,
+        aggregate_in_page: bool = False,
+        scroll_harvest: bool = True,
+        harvest_time_budget: float = 120.0,
+        harvest_viewport_height: Optional[int] = None,
+        extraction_mode: str = "auto",
+        export_format: str = "csv",
+        target_column: str = "cost",
+        query_transport: Optional[QueryTransport] = None,
+        browser: Optional[Browser] = None,
+        all_tabs: bool = False,
+        incremental_store: Optional[IncrementalStore] = None,
+        aggregations: Optional[str] = None,
+        progress_callback: Optional[ProgressCallback] = None,
+        request_filter: str = "off",
+        static_asset_cache: Optional[StaticAssetCache] = None,
+        trace_sampler: Optional[TraceSampler] = None,
+        agent_fallback: Optional["AgentFallback"] = None,
+    ):
+        """
+        Args:
+            sheet_url: Full URL to Google Sheet
+            email: Google account email
+            password: Google account password
+            headless: If False, browser window is visible
+            pool: Browser pool to borrow from (defaults to the shared pool)
+            session_cache: Cache of logged-in sessions used to skip the login form
+            timeouts: Per-phase readiness timeouts
+            inspect_delay: Seconds to keep the page open after the run (0 = close immediately)
+            aggregate_in_page: Compute the total inside the page instead of returning every value
+            scroll_harvest: Scroll the virtualized grid so rows below the fold are included
+            harvest_time_budget: Seconds the scroll harvest may take
+            harvest_viewport_height: Taller viewport used while harvesting (more rows per step)
+            extraction_mode: "auto" (export, then DOM), "query" (server-side
+                aggregation, then export, then DOM), "export" or "dom"
+            export_format: "csv" or "xlsx"
+            target_column: Header text identifying the column to total
+            query_transport: Transport for visualization queries (defaults to the
+                browser context's request API)
+            browser: Running browser to open this run's context on instead of
+                borrowing from the pool (the caller keeps ownership)
+            all_tabs: Total every worksheet tab instead of only the one in the URL
+            incremental_store: Per-tab state of previous runs; when set, only rows
+                appended since the last run are read and folded into the stored total
+            aggregations: Extra aggregates computed in the same pass, e.g.
+                "sum cost by category, max amount"
+            progress_callback: Receives a ProgressEvent per phase (launch, navigate,
+                login, header, rows, total); called from the automation's thread
+            request_filter: Request filter profile for the page ("off", "minimal",
+                "aggressive"); see request_filter.PROFILES
+            static_asset_cache: Disk cache serving versioned static assets across runs
+            trace_sampler: Records Playwright traces for a sample of runs and keeps
+                those of the slowest ones
+            agent_fallback: Browser agent that takes over the open page when the
+                grid or the target column can't be found (single-tab runs only)
+        """
         self.sheet_url = sheet_url
         self.email = email
         self.password = password
         self.headless = headless
-        self.browser: Browser = None
+        self.pool = pool
+        self.session_cache = session_cache
+        self.session_restored = False
+        self.timeouts = timeouts or ReadinessTimeouts()
+        self.inspect_delay = inspect_delay
+        self.aggregate_in_page = aggregate_in_page
+        self.scroll_harvest = scroll_harvest
+        self.harvest_time_budget = harvest_time_budget
+        self.harvest_viewport_height = harvest_viewport_height
+        self.harvest_complete: Optional[bool] = None
+        self.extraction_mode = extraction_mode
+        self.export_format = export_format
+        self.target_column = target_column
+        self.query_transport = query_transport
+        self._export_blocked = False
+        self._query_blocked = False
+        self.all_tabs = all_tabs
+        self.incremental_store = incremental_store
+        self.aggregate_specs = parse_aggregate_specs(aggregations or "")
+        self._header_indexes: Dict[tuple, HeaderIndex] = {}
+        self.progress_callback = progress_callback
+        self.request_filter = RequestFilter(get_filter_profile(request_filter), static_asset_cache)
+        self.metrics = RunMetrics()
+        self.trace_sampler = trace_sampler
+        self.agent_fallback = agent_fallback
+        self.trace_path: Optional[str] = None
+        self._tracing = False
+        self._dom_lock = asyncio.Lock()
+        self.browser: Browser = browser
+        self.context: BrowserContext = None
         self.page: Page = None
+        self._pooled: Optional[PooledBrowser] = None
+    
+    def _emit(self, phase: str, message: str, **data: Any):
+        """Send a progress event; a failing consumer never breaks the run."""
+        if self.progress_callback is None:
+            return
+        try:
+            self.progress_callback(ProgressEvent(phase=phase, message=message, **data))
+        except Exception as e:
+            logger.debug(f"Progress callback failed: {e}")
     
+    def _on_harvest_step(self, rows: int, fraction: float):
+        total_rows = round(rows / fraction) if fraction > 0 else None
+        self._emit("rows", f"Read {rows:,} rows", rows=rows, total_rows=total_rows, fraction=fraction)
+    
+    @timed("launch")
     async def start_browser(self):
-        """Start Playwright browser (visible window)."""
-        logger.info("🌐 Starting Chrome browser...")
-        playwright = await async_playwright().start()
-        self.browser = await playwright.chromium.launch(headless=self.headless)
-        self.page = await self.browser.new_page()
-        logger.info("✅ Browser started successfully")
+        """Borrow a warm browser from the pool and open a fresh context."""
+        self._emit("launch", "Starting browser")
+        if self.browser is None:
+            logger.info("🌐 Borrowing Chrome browser from pool...")
+            if self.pool is None:
+                self.pool = get_browser_pool(headless=self.headless)
+            self._pooled = await self.pool.checkout()
+            self.browser = self._pooled.browser
+        
+        storage_state = None
+        if self.session_cache:
+            storage_state = self.session_cache.load(self.email)
+        self.session_restored = storage_state is not None
+        
+        self.context = await self.browser.new_context(storage_state=storage_state)
+        await self.request_filter.attach(self.context)
+        if self.trace_sampler is not None and self.trace_sampler.should_trace():
+            await self.context.tracing.start(screenshots=True, snapshots=True)
+            self._tracing = True
+        self.page = await self.context.new_page()
+        logger.info("✅ Browser context ready")
+    
+    async def stop_browser(self):
+        """Close this run's context and return the browser to the pool."""
+        healthy = True
+        if self.context and self._tracing:
+            await self._stop_tracing()
+        if self.context:
+            try:
+                await self.context.close()
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to close browser context: {e}")
+                healthy = False
+            self.context = None
+            self.page = None
+        if self._pooled:
+            await self.pool.checkin(self._pooled, healthy=healthy)
+            self._pooled = None
+            self.browser = None
+            logger.info("✅ Browser returned to pool")
     
+    async def _stop_tracing(self):
+        """Save the trace when this run is among the slowest sampled, else drop it."""
+        self._tracing = False
+        try:
+            path = self.trace_sampler.claim(self.metrics.run_id, self.metrics.elapsed)
+            await self.context.tracing.stop(path=str(path) if path else None)
+            if path:
+                self.trace_path = str(path)
+                logger.info(f"🧵 Saved Playwright trace: {path}")
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to stop tracing: {e}")
+    
+    @timed("navigate")
     async def navigate_to_sheet(self) -> bool:
         """Navigate to Google Sheet URL."""
         try:
             logger.info(f"📍 Navigating to: {self.sheet_url}")
-            await self.page.goto(self.sheet_url, wait_until="networkidle", timeout=30000)
+            self._emit("navigate", "Opening the sheet")
+            # Sheets long-polls, so networkidle is slow to arrive; readiness
+            # is checked against the grid itself in wait_for_sheet_ready
+            await self.page.goto(self.sheet_url, wait_until="domcontentloaded",
+                                 timeout=self.timeouts.navigation_ms)
             logger.info("✅ Page loaded")
-            await asyncio.sleep(2)
             return True
         except Exception as e:
             logger.error(f"❌ Failed to navigate: {e}")
+            annotate(status="error")
             return False
     
+    async def is_login_page(self) -> bool:
+        """Check whether the current page is asking for credentials."""
+        if "accounts.google.com" in self.page.url:
+            return True
+        return await self.page.query_selector('input[type="email"]') is not None
+    
+    @timed("login")
+    async def ensure_logged_in(self) -> bool:
+        """Reuse the cached session when accepted, otherwise log in and cache it."""
+        if self.session_restored:
+            if not await self.is_login_page():
+                logger.info("✓ Cached session accepted, skipping login")
+                self._emit("login", "Cached session accepted")
+                annotate(cached_session=True)
+                return True
+            logger.info("🔄 Cached session rejected, logging in again...")
+            annotate(retries=1)
+            self.session_cache.invalidate(self.email)
+            # Requests refused with the stale session may work after logging in
+            self._export_blocked = False
+            self._query_blocked = False
+        
+        self._emit("login", "Logging in")
+        logged_in = await self.handle_login()
+        await self.save_session()
+        return logged_in
+    
+    async def save_session(self):
+        """Persist the context's storage_state once we are past the login page."""
+        if not self.session_cache or not self.email:
+            return
+        try:
+            if await self.is_login_page():
+                logger.info("⚠️ Still on login page, not caching session")
+                return
+            self.session_cache.save(self.email, await self.context.storage_state())
+        except Exception as e:
+            logger.warning(f"⚠️ Could not cache session: {e}")
+    
     async def handle_login(self) -> bool:
         """Handle Google login if needed."""
         try:
-            # Check if login page is present
-            login_button = await self.page.query_selector('button[type="button"]')
-            
-            if login_button or "accounts.google.com" in self.page.url:
+            if await self.is_login_page():
                 logger.info("🔐 Google login detected, attempting login...")
                 
                 # Enter email
@@ -57,18 +272,17 @@ class GoogleSheetAutomation:
                     logger.info("📧 Entering email...")
                     await email_input.fill(self.email)
                     await self.page.click('button:has-text("Next")')
-                    await asyncio.sleep(2)
                 
-                # Enter password
-                password_input = await self.page.query_selector('input[type="password"]')
+                # Enter password once the password step is shown
+                password_input = await self._wait_for_optional('input[type="password"]', "visible")
                 if password_input:
                     logger.info("🔑 Entering password...")
                     await password_input.fill(self.password)
                     await self.page.click('button:has-text("Next")')
-                    await asyncio.sleep(3)
+                    
+                    # Wait for the login form to go away
+                    await self._wait_for_optional('input[type="password"]', "detached")
                 
-                # Wait for page to load after login
-                await self.page.wait_for_load_state("networkidle", timeout=30000)
                 logger.info("✅ Login successful")
                 return True
             else:
@@ -78,93 +292,515 @@ class GoogleSheetAutomation:
             logger.warning(f"⚠️ Login attempt: {e}")
             return True  # Continue anyway
     
+    async def _wait_for_optional(self, selector: str, state: str):
+        """Wait for ``selector`` to reach ``state``; None if it doesn't in time."""
+        try:
+            return await self.page.wait_for_selector(selector, state=state,
+                                                     timeout=self.timeouts.login_step_ms)
+        except PlaywrightTimeoutError:
+            return None
+    
+    def _header_index(self, headers: List[str]) -> HeaderIndex:
+        """Header index for a header row, built once per sheet layout."""
+        key = tuple(headers)
+        index = self._header_indexes.get(key)
+        if index is None:
+            index = self._header_indexes[key] = HeaderIndex(headers)
+        return index
+    
+    @timed("header")
     async def find_cost_column(self) -> int:
-        """Find 'cost' column index."""
+        """Find the target ('cost') column index from the rendered headers."""
+        target = self.target_column
         try:
-            logger.info("🔍 Scanning for 'cost' column header...")
-            
-            # Get all header cells
-            headers = await self.page.query_selector_all('div[data-header-column]')
+            logger.info(f"🔍 Scanning for '{target}' column header...")
             
-            for idx, header in enumerate(headers):
-                text = await header.text_content()
-                if text and "cost" in text.lower():
-                    logger.info(f"✅ Found 'cost' column at index: {idx}")
-                    return idx
+            # All header texts in one round trip
+            column = self._header_index(await read_headers(self.page)).find(target)
+            if column is None:
+                logger.warning(f"⚠️ '{target}' column not found")
+                return -1
             
-            # Fallback: search all text
-            page_text = await self.page.text_content()
-            if "cost" in page_text.lower():
-                logger.info("📍 'cost' column found on page")
-                return 0
-            
-            logger.warning("⚠️ 'cost' column not found")
-            return -1
+            logger.info(f"✅ Found '{target}' column at index: {column}")
+            self._emit("header", f"Found '{target}' column at index {column}")
+            return column
         except Exception as e:
             logger.error(f"❌ Error finding column: {e}")
             return -1
     
-    async def read_cost_values(self) -> List[float]:
+    @timed("query")
+    async def query_total(self, ref: Optional[SheetRef] = None) -> Optional[Dict[str, Any]]:
+        """
+        Push the aggregation down to the visualization query endpoint.
+        Returns None when querying is blocked so the caller can fall back.
+        """
+        if self._query_blocked:
+            return None
+        try:
+            transport = self.query_transport or PlaywrightQueryTransport(
+                self.context.request, timeout_ms=self.timeouts.navigation_ms)
+            query = SheetQuery(transport, ref or parse_sheet_url(self.sheet_url))
+            
+            column = await query.resolve_column(self.target_column)
+            if column is None:
+                logger.warning(f"⚠️ '{self.target_column}' column not found via query")
+                return {
+                    "status": "error",
+                    "total_expense": 0,
+                    "message": f"No '{self.target_column}' column found in sheet",
+                    "fallback_reason": "header_not_found",
+                }
+            
+            self._emit("header", f"Found '{column['label']}' column ({column['letter']})")
+            stats = await query.aggregate(column["letter"], ("sum", "count", "min", "max"))
+        except (QueryError, ValueError) as e:
+            logger.info(f"↪️ Query pushdown unavailable: {e}")
+            self._query_blocked = True
+            return None
+        
+        count = int(stats["count"] or 0)
+        if not count:
+            logger.warning("⚠️ No values found")
+            return {
+                "status": "error",
+                "total_expense": 0,
+                "message": "No cost values found in sheet",
+            }
+        
+        total = stats["sum"] or 0
+        logger.info(f"✅ Total from query: ${total:.2f} (column {column['letter']})")
+        return {
+            "status": "success",
+            "total_expense": total,
+            "message": f"Successfully calculated total from {count} cost entries",
+            "count": count,
+            "min": stats["min"],
+            "max": stats["max"],
+            "column": column["label"],
+        }
+    
+    async def _request_strategies(self, ref: Optional[SheetRef] = None) -> Optional[Dict[str, Any]]:
+        """Try the request-based strategies (no DOM) allowed by extraction_mode."""
+        if self.extraction_mode == "query" and self.aggregate_specs:
+            logger.info("↪️ Extra aggregations need the rows, skipping query pushdown")
+        elif self.extraction_mode == "query":
+            result = await self.query_total(ref)
+            if result is not None:
+                result["source"] = "query"
+                return result
+        
+        if self.extraction_mode in ("auto", "query", "export"):
+            grid = await self.read_export_grid(ref)
+            if grid is not None:
+                if self.incremental_store is not None and not self.aggregate_specs:
+                    result = await self._incremental_total(ref, grid=grid)
+                else:
+                    result = await self.calculate_total(grid=grid)
+                result["source"] = "export"
+                return result
+        
+        return None
+    
+    @timed("export")
+    async def read_export_grid(self, ref: Optional[SheetRef] = None) -> Optional[GridData]:
+        """Download the tab through the export endpoint; None when export is blocked."""
+        if self._export_blocked:
+            return None
+        try:
+            ref = ref or parse_sheet_url(self.sheet_url)
+            grid = await export_grid(self.context.request, ref, fmt=self.export_format,
+                                     timeout_ms=self.timeouts.navigation_ms)
+            self._emit("rows", f"Downloaded {grid.row_count:,} rows", rows=grid.row_count,
+                       total_rows=grid.row_count, fraction=1.0)
+            annotate(rows=grid.row_count, bytes=grid.source_bytes)
+            return grid
+        except (ExportBlocked, ValueError) as e:
+            logger.info(f"↪️ Export unavailable, using DOM extraction: {e}")
+            annotate(status="blocked")
+            self._export_blocked = True
+            return None
+    
+    @timed("harvest")
+    async def read_grid(self) -> GridData:
+        """Read the tab shown in the page."""
+        if self.scroll_harvest:
+            # Scroll through the virtualized grid so off-screen rows are included
+            harvest = await harvest_grid(
+                self.page,
+                time_budget=self.harvest_time_budget,
+                viewport_height=self.harvest_viewport_height,
+                on_step=self._on_harvest_step,
+            )
+            self.harvest_complete = harvest.complete
+            annotate(rows=harvest.grid.row_count, complete=harvest.complete)
+            return harvest.grid
+        # Whole rendered grid in one round trip
+        grid = await extract_grid(self.page)
+        annotate(rows=grid.row_count)
+        return grid
+    
+    async def read_cost_values(self, grid: Optional[GridData] = None,
+                               column: Optional[int] = None) -> List[float]:
         """Read all numeric values from cost column."""
         try:
             logger.info("💰 Reading cost values...")
             
-            # Get all cells with numeric values
-            cells = await self.page.query_selector_all('div[data-value]')
-            values = []
-            
-            for cell in cells:
-                try:
-                    value_attr = await cell.get_attribute('data-value')
-                    if value_attr:
-                        # Try to parse as number
-                        num_value = float(value_attr)
-                        values.append(num_value)
-                        logger.info(f"  📊 Found value: {num_value}")
-                except (ValueError, TypeError):
-                    continue
+            if grid is None:
+                grid = await self.read_grid()
+            if column is None:
+                column = self._header_index(grid.headers).find(self.target_column)
+            if column is None or column < 0:
+                logger.warning(f"⚠️ '{self.target_column}' column not found")
+                return []
+            values = parse_values(grid.column(column))
+            logger.info(f"  📊 Found {len(values)} numeric values in column {column}")
             
             return values
         except Exception as e:
             logger.error(f"❌ Error reading values: {e}")
             return []
     
-    async def calculate_total(self) -> Dict[str, Any]:
-        """Calculate total expense."""
+    async def calculate_total(self, grid: Optional[GridData] = None,
+                              column: Optional[int] = None) -> Dict[str, Any]:
+        """Calculate total expense (plus any requested aggregations)."""
         try:
             logger.info("🧮 Calculating total...")
             
-            values = await self.read_cost_values()
+            if self.aggregate_in_page and grid is None and not self.aggregate_specs:
+                return await self._calculate_total_in_page(column)
             
-            if not values:
-                logger.warning("⚠️ No values found")
-                return {
-                    "status": "error",
-                    "total_expense": 0,
-                    "message": "No cost values found in sheet",
-                    "values_found": []
+            harvested = grid is None
+            if grid is None:
+                grid = await self.read_grid()
+            
+            with self.metrics.span("aggregate", rows=grid.row_count):
+                values = await self.read_cost_values(grid, column)
+                
+                if not values:
+                    logger.warning("⚠️ No values found")
+                    return {
+                        "status": "error",
+                        "total_expense": 0,
+                        "message": "No cost values found in sheet",
+                    }
+                
+                total = sum(values)
+                logger.info(f"✅ Total calculated: ${total:.2f}")
+                
+                result = {
+                    "status": "success",
+                    "total_expense": total,
+                    "message": f"Successfully calculated total from {len(values)} cost entries",
+                    "count": len(values)
                 }
+                attach_values(result, values)
+                if self.aggregate_specs:
+                    result["aggregations"] = aggregate_grid(grid, self.aggregate_specs,
+                                                            self._header_index(grid.headers))
+            return self._with_completeness(result, self.harvest_complete if harvested else None)
+        except Exception as e:
+            logger.error(f"❌ Error calculating: {e}")
+            return {
+                "status": "error",
+                "total_expense": 0,
+                "message": str(e)
+            }
+    
+    @timed("harvest", in_page=True)
+    async def _calculate_total_in_page(self, column: Optional[int] = None) -> Dict[str, Any]:
+        """Sum inside the page so individual values never leave the browser."""
+        if column is None:
+            column = await self.find_cost_column()
+        if column < 0:
+            return {
+                "status": "error",
+                "total_expense": 0,
+                "message": f"No '{self.target_column}' column found in sheet",
+            }
+        if self.scroll_harvest:
+            harvest = await harvest_grid(
+                self.page,
+                time_budget=self.harvest_time_budget,
+                viewport_height=self.harvest_viewport_height,
+                on_step=self._on_harvest_step,
+                aggregate_column=column,
+            )
+            self.harvest_complete = harvest.complete
+            stats = harvest.stats
+            annotate(rows=harvest.grid.row_count, complete=harvest.complete)
+        else:
+            stats = await aggregate_in_page(self.page, column)
+        if not stats["count"]:
+            logger.warning("⚠️ No values found")
+            return {
+                "status": "error",
+                "total_expense": 0,
+                "message": "No cost values found in sheet",
+            }
+        
+        logger.info(f"✅ Total calculated in page: ${stats['sum']:.2f}")
+        complete = self.harvest_complete if self.scroll_harvest else None
+        return self._with_completeness({
+            "status": "success",
+            "total_expense": stats["sum"],
+            "message": f"Successfully calculated total from {stats['count']} cost entries",
+            "count": stats["count"],
+            "min": stats["min"],
+            "max": stats["max"],
+        }, complete)
+    
+    @timed("incremental")
+    async def _incremental_total(self, ref: Optional[SheetRef] = None,
+                                 grid: Optional[GridData] = None,
+                                 column: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Fold rows appended since the last run into the stored total.
+        
+        An export grid has every row, so the stored prefix checksum is verified
+        and only new rows are parsed. In the page, the harvest resumes a few rows
+        before the last processed one and those rows must be unchanged;
+        otherwise the whole tab is read again.
+        """
+        ref = ref or parse_sheet_url(self.sheet_url)
+        key = incremental_key(ref, self.target_column)
+        state = self.incremental_store.get(key)
+        complete = None
+        
+        if column is None and grid is not None:
+            column = self._header_index(grid.headers).find(self.target_column)
+        if column is None or column < 0:
+            logger.warning(f"⚠️ '{self.target_column}' column not found")
+            return {
+                "status": "error",
+                "total_expense": 0,
+                "message": f"No '{self.target_column}' column found in sheet",
+            }
+        
+        if grid is not None:
+            fold = fold_prefix(state, grid, "export", column)
+        else:
+            fold = None
+            if state is not None and state.source == "dom":
+                logger.info(f"⏩ Resuming harvest at row {state.resume_row}")
+                harvest = await harvest_grid(
+                    self.page,
+                    time_budget=self.harvest_time_budget,
+                    viewport_height=self.harvest_viewport_height,
+                    on_step=self._on_harvest_step,
+                    start_row=state.resume_row,
+                )
+                complete = harvest.complete
+                fold = fold_tail(state, harvest.grid, column)
+            if fold is None:
+                harvest = await harvest_grid(
+                    self.page,
+                    time_budget=self.harvest_time_budget,
+                    viewport_height=self.harvest_viewport_height,
+                    on_step=self._on_harvest_step,
+                )
+                complete = harvest.complete
+                fold = full_fold(harvest.grid, "dom", column)
+        
+        # A harvest cut short by the time budget may have gaps, so it is not stored
+        if complete is not False:
+            self.incremental_store.put(key, fold.state)
+        
+        if not fold.state.count:
+            logger.warning("⚠️ No values found")
+            return {
+                "status": "error",
+                "total_expense": 0,
+                "message": "No cost values found in sheet",
+            }
+        
+        logger.info(f"✅ Total ({fold.mode}, {fold.new_rows} new rows): ${fold.state.total:.2f}")
+        annotate(rows=fold.new_rows, mode=fold.mode)
+        result = {
+            "status": "success",
+            "total_expense": fold.state.total,
+            "message": f"Successfully calculated total from {fold.state.count} cost entries",
+            "count": fold.state.count,
+            "incremental": {
+                "mode": fold.mode,
+                "new_rows": fold.new_rows,
+                "rows": fold.state.row_count,
+            },
+        }
+        if fold.mode == "full":
+            attach_values(result, fold.new_values)
+        return self._with_completeness(result, complete)
+    
+    def _with_completeness(self, result: Dict[str, Any], complete: Optional[bool]) -> Dict[str, Any]:
+        """Flag results from a harvest that ran out of time budget."""
+        if complete is not None:
+            result["complete"] = complete
+            if not complete:
+                result["message"] += " (harvest time budget reached, total may be incomplete)"
+        return result
+    
+    async def _total_current_tab(self) -> Dict[str, Any]:
+        """Total the tab named in sheet_url, preferring request-based strategies."""
+        # With a cached session, query/export usually work without loading the sheet UI
+        result = await self._request_strategies() if self.session_restored else None
+        
+        if result is None:
+            # Navigate to sheet
+            if not await self.navigate_to_sheet():
+                return {"status": "error", "message": "Failed to navigate to sheet"}
             
-            total = sum(values)
-            logger.info(f"✅ Total calculated: ${total:.2f}")
+            # Handle login (skipped when the cached session is accepted)
+            await self.ensure_logged_in()
             
+            result = await self._request_strategies()
+        
+        if result is None and self.extraction_mode == "export":
+            return {"status": "error", "message": "Sheet export is blocked", "total_expense": 0}
+        
+        if result is None:
+            result = await self._total_from_dom()
+        
+        return result
+    
+    async def _total_from_dom(self, ref: Optional[SheetRef] = None) -> Dict[str, Any]:
+        """Total the tab currently shown in the page."""
+        # Wait for the grid to render
+        logger.info("⏳ Waiting for sheet to be ready...")
+        with self.metrics.span("ready"):
+            ready = await wait_for_sheet_ready(self.page, self.timeouts)
+        if not ready.grid_found:
+            # The grid never attached, so there is nothing to read
             return {
-                "status": "success",
-                "total_expense": total,
-                "message": f"Successfully calculated total from {len(values)} cost entries",
-                "values_found": values,
-                "count": len(values)
+                "status": "error",
+                "total_expense": 0,
+                "message": "Sheet grid not found",
+                "source": "dom",
+                "fallback_reason": "grid_not_found",
             }
-        except Exception as e:
-            logger.error(f"❌ Error calculating: {e}")
+        
+        # Find cost column
+        cost_col = await self.find_cost_column()
+        if cost_col < 0:
             return {
                 "status": "error",
                 "total_expense": 0,
-                "message": str(e)
+                "message": f"No '{self.target_column}' column found in sheet",
+                "source": "dom",
+                "fallback_reason": "header_not_found",
             }
+        
+        # Calculate total
+        if self.incremental_store is not None and self.scroll_harvest and not self.aggregate_specs:
+            result = await self._incremental_total(ref, column=cost_col)
+        else:
+            result = await self.calculate_total(column=cost_col)
+        result["source"] = "dom"
+        return result
+    
+    async def _total_all_tabs(self) -> Dict[str, Any]:
+        """
+        Discover every worksheet and total them in parallel.
+        
+        The workbook is loaded and logged into once. Query/export requests for
+        each tab run concurrently over the shared context; tabs that need DOM
+        extraction are switched to one at a time in the already-loaded page.
+        """
+        if not await self.navigate_to_sheet():
+            return {"status": "error", "message": "Failed to navigate to sheet"}
+        await self.ensure_logged_in()
+        
+        base_ref = parse_sheet_url(self.sheet_url)
+        with self.metrics.span("tabs") as span:
+            tabs = await discover_tabs(self.page, timeout_ms=self.timeouts.grid_ms)
+            span.rows = len(tabs)
+        if not tabs:
+            tabs = [SheetTab(gid=base_ref.gid)]
+        
+        tab_results = await asyncio.gather(
+            *(self._total_for_tab(tab, base_ref.with_gid(tab.gid)) for tab in tabs)
+        )
+        
+        succeeded = [r for r in tab_results if r.get("status") == "success"]
+        grand_total = sum(r["total_expense"] for r in succeeded)
+        count = sum(r.get("count", 0) for r in succeeded)
+        logger.info(f"✅ Grand total over {len(succeeded)}/{len(tabs)} tabs: ${grand_total:.2f}")
+        
+        result = {
+            "status": "success" if succeeded else "error",
+            "total_expense": grand_total,
+            "count": count,
+            "message": f"Totalled {len(succeeded)} of {len(tabs)} tabs ({count} cost entries)",
+            "tabs": tab_results,
+        }
+        # The grand total is partial when a tab failed or its harvest ran out of time
+        result["complete"] = len(succeeded) == len(tabs) and all(r.get("complete") is not False for r in succeeded)
+        return result
+    
+    async def _total_for_tab(self, tab: SheetTab, ref: SheetRef) -> Dict[str, Any]:
+        try:
+            result = await self._request_strategies(ref)
+            if result is None and self.extraction_mode == "export":
+                result = {"status": "error", "message": "Sheet export is blocked", "total_expense": 0}
+            if result is None:
+                # The page can only show one tab at a time
+                async with self._dom_lock:
+                    await switch_to_tab(self.page, tab, timeout_ms=self.timeouts.grid_ms)
+                    result = await self._total_from_dom(ref)
+        except Exception as e:
+            logger.error(f"❌ Tab {tab.name or tab.gid} failed: {e}")
+            result = {"status": "error", "message": str(e), "total_expense": 0}
+        
+        # Per-tab value buffers would bloat the combined result; summaries stay
+        result.pop("values", None)
+        return {"gid": tab.gid, "name": tab.name, **result}
+    
+    async def _total_for_column(self, label: str) -> Dict[str, Any]:
+        """DOM total of the column headed ``label``; replays and checks agent traces."""
+        target_column, self.target_column = self.target_column, label
+        try:
+            return await self._total_from_dom()
+        finally:
+            self.target_column = target_column
+    
+    async def _escalate_to_agent(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Hand the open page to the agent fallback when the direct path could not
+        find the grid or the target column; records which path produced the result.
+        """
+        reason = result.get("fallback_reason")
+        if self.agent_fallback is None or reason is None or self.page is None:
+            result["path"] = "direct"
+            return result
+        
+        self._emit("agent", "Direct extraction failed, handing over to the browser agent")
+        with self.metrics.span("agent", reason=reason) as span:
+            # Query-only runs may never have loaded the sheet UI
+            if self.page.url == "about:blank":
+                if not await self.navigate_to_sheet():
+                    result["path"] = "direct"
+                    return result
+                await self.ensure_logged_in()
+            try:
+                agent_result = await self.agent_fallback.run(
+                    page=self.page,
+                    context=self.context,
+                    sheet_url=self.sheet_url,
+                    target_column=self.target_column,
+                    reason=reason,
+                    read_column=self._total_for_column,
+                )
+            except Exception as e:
+                logger.error(f"❌ Agent fallback failed: {e}")
+                span.status = "error"
+                agent_result = {"status": "error", "total_expense": 0, "message": f"Agent fallback failed: {e}"}
+            usage = agent_result.get("agent") or {}
+            span.attrs.update(steps=usage.get("steps"), tokens=usage.get("input_tokens", 0) + usage.get("output_tokens", 0))
+        
+        agent_result.update({"source": "agent", "path": "agent", "fallback_reason": reason})
+        return agent_result
     
     async def run(self) -> Dict[str, Any]:
         """Execute complete automation workflow."""
+        result: Optional[Dict[str, Any]] = None
         try:
             logger.info("=" * 60)
             logger.info("🚀 Starting Google Sheet Automation")
@@ -173,22 +809,15 @@ class GoogleSheetAutomation:
             # Start browser
             await self.start_browser()
             
-            # Navigate to sheet
-            if not await self.navigate_to_sheet():
-                return {"status": "error", "message": "Failed to navigate to sheet"}
-            
-            # Handle login
-            await self.handle_login()
-            
-            # Wait for sheet to fully load
-            logger.info("⏳ Waiting for sheet to fully load...")
-            await asyncio.sleep(3)
-            
-            # Find cost column
-            cost_col = await self.find_cost_column()
-            
-            # Calculate total
-            result = await self.calculate_total()
+            if self.all_tabs:
+                result = await self._total_all_tabs()
+            else:
+                result = await self._total_current_tab()
+                result = await self._escalate_to_agent(result)
+            self._emit("total", result.get("message", "Done"))
+            if self.request_filter.active:
+                result["network"] = self.request_filter.stats.to_dict()
+                logger.info(f"🚦 Request filter: {self.request_filter.summary()}")
             
             logger.info("=" * 60)
             logger.info("✅ Automation Complete")
@@ -198,27 +827,40 @@ class GoogleSheetAutomation:
         
         except Exception as e:
             logger.error(f"❌ Automation failed: {e}", exc_info=True)
-            return {
+            result = {
                 "status": "error",
                 "message": str(e),
                 "total_expense": 0
             }
+            return result
         
         finally:
-            # Keep browser open for user to see
-            logger.info("🔍 Browser window staying open for inspection...")
-            await asyncio.sleep(5)
+            # Optionally keep browser open for user to see
+            if self.inspect_delay > 0:
+                logger.info(f"🔍 Browser window staying open for inspection ({self.inspect_delay:.0f}s)...")
+                await asyncio.sleep(self.inspect_delay)
+            
+            await self.stop_browser()
             
-            if self.browser:
-                await self.browser.close()
-                logger.info("✅ Browser closed")
+            # Timings cover the whole run, including closing the context
+            if result is not None:
+                result["metrics"] = self.metrics.to_dict()
+                if self.trace_path:
+                    result["metrics"]["trace"] = self.trace_path
+                phases = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in result["metrics"]["phases"].items())
+                logger.info(f"⏱️ Phases: {phases}")
 
 
 async def run_google_sheet_automation(
     sheet_url: str,
     email: str,
     password: str,
-    headless: bool = False
+    headless: bool = False,
+    pool: Optional[BrowserPool] = None,
+    session_cache: Optional[SessionCache] = None,
+    result_cache: Optional[ResultCache] = None,
+    revision_probe: Optional[RevisionProbe] = None,
+    **options: Any,
 ) -> Dict[str, Any]:
     """
     Run Google Sheet automation with visible browser.
@@ -228,9 +870,48 @@ async def run_google_sheet_automation(
         email: Google account email
         password: Google account password
         headless: If False, browser window is visible
+        pool: Browser pool to borrow from (defaults to the shared pool)
+        session_cache: Cache of logged-in sessions used to skip the login form
+        result_cache: Cache of previous results; a hit skips the browser entirely
+        revision_probe: Cheap check of the sheet's revision; results are only cached
+            and served when it reports one
+        **options: Further GoogleSheetAutomation options (timeouts, extraction_mode, ...)
     
     Returns:
-        Dict with automation results
+        Dict with automation results; "cache" is "cached" or "fresh"
     """
-    automation = GoogleSheetAutomation(sheet_url, email, password, headless=headless)
-    return await automation.run()
+    key = revision = None
+    if result_cache is not None:
+        try:
+            key = result_cache_key(sheet_url, options.get("target_column", "cost"),
+                                   options.get("all_tabs", False), options.get("aggregations"), account=email)
+        except ValueError:
+            key = None
+    
+    if key is not None and revision_probe is not None:
+        # Probe before the run: an edit made while it runs then shows up as a newer revision
+        revision = await revision_probe(parse_sheet_url(sheet_url))
+    if revision is None:
+        # Without a revision a cached total can't be checked against the sheet
+        key = None
+    
+    if key is not None:
+        entry = result_cache.get(key)
+        if entry is not None and entry.revision == revision:
+            logger.info(f"♻️ Result cache hit for {key}")
+            if options.get("progress_callback"):
+                options["progress_callback"](ProgressEvent("total", "Served from the result cache"))
+            # Timings and network stats describe the run that filled the cache, not this one
+            cached = {k: v for k, v in entry.result.items() if k not in ("metrics", "network")}
+            return {**cached, "cache": "cached", "cached_at": entry.stored_at}
+    
+    automation = GoogleSheetAutomation(sheet_url, email, password, headless=headless, pool=pool,
+                                       session_cache=session_cache, **options)
+    result = await automation.run()
+    
+    # A harvest cut short by its time budget is a partial total; don't serve it again
+    if key is not None and result.get("status") == "success" and result.get("complete") is not False:
+        result_cache.put(key, result, revision)
+    
+    result["cache"] = "fresh"
+    return result
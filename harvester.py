@@ -0,0 +1,230 @@
+"""
+Scroll harvester for virtualized Google Sheets grids.
+Sheets only renders the visible rows, so the grid is scrolled in
+viewport-sized steps and newly rendered rows are collected at each step.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from playwright.async_api import Page
+
+from extraction import GridData, GRID_HELPERS_JS
+from readiness import CELL_SELECTOR, GRID_SELECTOR, HEADER_SELECTOR
+
+logger = logging.getLogger(__name__)
+
+# Sheets scrolls its grid through a dedicated scrollbar element
+SCROLL_SELECTOR = f".native-scrollbar-y, {GRID_SELECTOR}"
+
+# One harvest step: wait for the previous scroll to render, collect rows not
+# seen yet (tracked in the page), then issue the next scroll. Because the next
+# scroll is issued before returning, the browser renders step N+1 while Python
+# merges step N. With aggregateColumn set, values are folded in the page and
+# only counters are returned. On the first step, startRow (if given) jumps the
+# scroller to that row using the height of a rendered row.
+_HARVEST_STEP_JS = (
+    "async ({headerSelector, cellSelector, scrollSelector, token, step, aggregateColumn, startRow}) => {"
+    + GRID_HELPERS_JS + """
+    const scroller = Array.from(document.querySelectorAll(scrollSelector))
+        .find(el => el.scrollHeight > el.clientHeight + 1) || document.scrollingElement;
+
+    let h = window.__sheetHarvest;
+    if (!h || h.token !== token) {
+        h = window.__sheetHarvest = {token, seen: new Set(), sum: 0, count: 0, min: null, max: null};
+        if (startRow !== null) {
+            const ref = Array.from(document.querySelectorAll(cellSelector))
+                .find(el => el.getAttribute('data-row') !== null);
+            if (ref) {
+                const rect = ref.getBoundingClientRect();
+                const refRow = parseInt(ref.getAttribute('data-row'), 10);
+                scroller.scrollTop = Math.max(0, scroller.scrollTop + (startRow - refRow) * rect.height);
+            }
+        }
+    }
+    await new Promise(resolve => requestAnimationFrame(() => requestAnimationFrame(resolve)));
+
+    const {headers, cells} = readGrid(headerSelector, cellSelector, scroller.scrollTop);
+
+    const fresh = new Map();
+    for (const [row, col, raw] of cells) {
+        if (h.seen.has(row)) continue;
+        if (!fresh.has(row)) fresh.set(row, []);
+        fresh.get(row).push([col, raw]);
+    }
+    for (const row of fresh.keys()) h.seen.add(row);
+
+    const rows = [];
+    const columns = [];
+    const loose = [];
+    if (aggregateColumn === null) {
+        headers.forEach(() => columns.push([]));
+        for (const [row, entries] of fresh) {
+            const i = rows.length;
+            rows.push(row);
+            columns.forEach(col => col.push(null));
+            for (const [col, raw] of entries) {
+                if (col >= 0 && col < headers.length) columns[col][i] = raw;
+                else loose.push(raw);
+            }
+        }
+    } else {
+        for (const entries of fresh.values()) {
+            for (const [col, raw] of entries) {
+                if (aggregateColumn >= 0 && col !== aggregateColumn) continue;
+                const num = parseNumber(raw);
+                if (num === null) continue;
+                h.sum += num;
+                h.count += 1;
+                h.min = h.min === null ? num : Math.min(h.min, num);
+                h.max = h.max === null ? num : Math.max(h.max, num);
+            }
+        }
+    }
+
+    const before = scroller.scrollTop;
+    scroller.scrollTop = before + Math.max(1, Math.floor(scroller.clientHeight * step));
+    return {
+        headers, rows, columns, loose,
+        newRows: fresh.size,
+        seenRows: h.seen.size,
+        atBottom: scroller.scrollTop <= before,
+        scrollFraction: Math.min(1, (scroller.scrollTop + scroller.clientHeight) / Math.max(scroller.scrollHeight, 1)),
+        stats: {sum: h.sum, count: h.count, min: h.min, max: h.max},
+    };
+}
+""")
+
+
+@dataclass
+class HarvestResult:
+    """Rows collected by a harvest plus how the harvest ended."""
+    grid: GridData
+    complete: bool
+    steps: int
+    elapsed: float
+    stats: Optional[Dict[str, Any]] = None
+
+
+class _GridAccumulator:
+    """Merges per-step payloads, keeping the first copy of each row."""
+
+    def __init__(self):
+        self.headers: List[str] = []
+        self.rows: Dict[int, List[Optional[str]]] = {}
+        self.loose: List[str] = []
+
+    def merge(self, payload: Dict[str, Any]):
+        if len(payload["headers"]) > len(self.headers):
+            self.headers = payload["headers"]
+        columns = payload["columns"]
+        for i, row in enumerate(payload["rows"]):
+            if row not in self.rows:
+                self.rows[row] = [col[i] for col in columns]
+        self.loose.extend(payload["loose"])
+
+    def to_grid(self) -> GridData:
+        width = len(self.headers)
+        rows = sorted(self.rows)
+        columns = [[None] * len(rows) for _ in range(width)]
+        for i, row in enumerate(rows):
+            for c, value in enumerate(self.rows[row][:width]):
+                columns[c][i] = value
+        return GridData(headers=self.headers, rows=rows, columns=columns, loose=self.loose)
+
+
+async def harvest_grid(
+    page: Page,
+    time_budget: float = 120.0,
+    step: float = 0.9,
+    stable_steps: int = 2,
+    max_steps: int = 100000,
+    aggregate_column: Optional[int] = None,
+    viewport_height: Optional[int] = None,
+    start_row: Optional[int] = None,
+    on_step: Optional[Callable[[int, float], None]] = None,
+) -> HarvestResult:
+    """
+    Scroll through the grid and collect every row exactly once.
+
+    Args:
+        page: Page showing the sheet, scrolled to the top
+        time_budget: Seconds after which the harvest stops (result marked incomplete)
+        step: Fraction of the viewport scrolled per step (<1 overlaps steps)
+        stable_steps: Consecutive steps at the bottom with no new rows before stopping
+        max_steps: Hard cap on scroll steps
+        aggregate_column: If set, aggregate this column in the page (-1 = all cells)
+            instead of returning values
+        viewport_height: Temporarily enlarge the viewport so each step renders more rows
+        start_row: Jump to this row (data-row index) before harvesting, e.g. to
+            read only rows appended since the last run
+        on_step: Called after every step with (rows seen so far, scrolled fraction)
+
+    Returns:
+        HarvestResult with the merged grid (empty when aggregating in page)
+    """
+    start = time.perf_counter()
+    original_viewport = page.viewport_size
+    if viewport_height and original_viewport:
+        await page.set_viewport_size({"width": original_viewport["width"], "height": viewport_height})
+
+    args = {
+        "headerSelector": HEADER_SELECTOR,
+        "cellSelector": CELL_SELECTOR,
+        "scrollSelector": SCROLL_SELECTOR,
+        "token": uuid.uuid4().hex,
+        "step": step,
+        "aggregateColumn": aggregate_column,
+        "startRow": start_row,
+    }
+    accumulator = _GridAccumulator()
+    steps = 0
+    quiet_steps = 0
+    complete = False
+    payload: Dict[str, Any] = {}
+
+    try:
+        pending = asyncio.ensure_future(page.evaluate(_HARVEST_STEP_JS, args))
+        while True:
+            payload = await pending
+            steps += 1
+
+            if payload["atBottom"] and payload["newRows"] == 0:
+                quiet_steps += 1
+            else:
+                quiet_steps = 0
+
+            complete = quiet_steps >= stable_steps
+            out_of_budget = time.perf_counter() - start > time_budget or steps >= max_steps
+            if not complete and not out_of_budget:
+                # Start the next step before merging so both overlap
+                pending = asyncio.ensure_future(page.evaluate(_HARVEST_STEP_JS, args))
+
+            accumulator.merge(payload)
+            if on_step:
+                on_step(payload["seenRows"], 1.0 if complete else payload.get("scrollFraction", 0.0))
+
+            if complete or out_of_budget:
+                break
+    finally:
+        if viewport_height and original_viewport:
+            await page.set_viewport_size(original_viewport)
+
+    elapsed = time.perf_counter() - start
+    if complete:
+        logger.info(f"🧾 Harvested {payload.get('seenRows', 0)} rows in {steps} steps ({elapsed:.1f}s)")
+    else:
+        logger.warning(f"⚠️ Harvest stopped after {steps} steps ({elapsed:.1f}s) with "
+                       f"{payload.get('seenRows', 0)} rows; results may be incomplete")
+
+    return HarvestResult(
+        grid=accumulator.to_grid(),
+        complete=complete,
+        steps=steps,
+        elapsed=round(elapsed, 3),
+        stats=payload.get("stats") if aggregate_column is not None else None,
+    )
@@ -0,0 +1,204 @@
+"""
+Incremental totals for append-only sheets.
+Stores the last processed row, a checksum of the rows before it and the
+running total of the target column per tab, so later runs only fold in
+rows appended since.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from extraction import GridData, parse_values
+from sheet_export import SheetRef
+
+logger = logging.getLogger(__name__)
+
+# Rows re-read before the resume point to confirm the stored rows are unchanged
+TAIL_ROWS = 5
+
+_EMPTY_CHECKSUM = hashlib.sha256(b"").hexdigest()
+
+
+@dataclass
+class IncrementalState:
+    """What a tab looked like at the end of the previous run."""
+    source: str
+    last_row: int
+    row_count: int
+    checksum: str
+    total: float
+    count: int
+    tail: List[Tuple[int, str]] = field(default_factory=list)
+    updated_at: float = 0.0
+
+    @property
+    def resume_row(self) -> int:
+        """First row to read on the next run, including the verification tail."""
+        return self.tail[0][0] if self.tail else self.last_row + 1
+
+
+@dataclass
+class FoldResult:
+    state: IncrementalState
+    mode: str
+    new_rows: int
+    new_values: List[float]
+
+
+def incremental_key(ref: SheetRef, target_column: str = "cost") -> str:
+    return f"{ref.spreadsheet_id}:{ref.gid}:{target_column.strip().lower()}"
+
+
+def iter_grid_rows(grid: GridData) -> Iterator[Tuple[int, List[Optional[str]]]]:
+    """(row number, cells) pairs in sheet order."""
+    order = sorted(range(grid.row_count), key=lambda i: grid.rows[i])
+    for i in order:
+        yield grid.rows[i], [column[i] for column in grid.columns]
+
+
+def row_fingerprint(cells: Sequence[Optional[str]]) -> str:
+    payload = "\x1f".join("" if cell is None else str(cell) for cell in cells)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def chain_checksum(checksum: str, fingerprint: str) -> str:
+    """Extend a running checksum by one row, so the prefix hash is order-sensitive."""
+    return hashlib.sha256((checksum + fingerprint).encode("ascii")).hexdigest()
+
+
+def _fold_rows(state: IncrementalState, rows: List[Tuple[int, List[Optional[str]]]],
+               column: Optional[int] = None) -> List[float]:
+    """
+    Append rows to ``state`` in place and return the numeric values of
+    ``column`` (every cell when None). Checksums always cover whole rows.
+    """
+    raw: List[Optional[str]] = []
+    for row, cells in rows:
+        fingerprint = row_fingerprint(cells)
+        state.checksum = chain_checksum(state.checksum, fingerprint)
+        state.tail.append((row, fingerprint))
+        state.last_row = row
+        state.row_count += 1
+        if column is None:
+            raw.extend(cells)
+        elif column < len(cells):
+            raw.append(cells[column])
+    # One vectorized parse for all new rows
+    new_values = parse_values(raw)
+    state.tail = state.tail[-TAIL_ROWS:]
+    state.total += sum(new_values)
+    state.count += len(new_values)
+    state.updated_at = time.time()
+    return new_values
+
+
+def full_fold(grid: GridData, source: str, column: Optional[int] = None) -> FoldResult:
+    """Build a fresh state from every row of ``grid``."""
+    state = IncrementalState(source=source, last_row=0, row_count=0,
+                             checksum=_EMPTY_CHECKSUM, total=0.0, count=0)
+    rows = list(iter_grid_rows(grid))
+    values = _fold_rows(state, rows, column)
+    return FoldResult(state=state, mode="full", new_rows=len(rows), new_values=values)
+
+
+def fold_prefix(state: Optional[IncrementalState], grid: GridData, source: str,
+                column: Optional[int] = None) -> FoldResult:
+    """
+    Fold a grid holding every row (e.g. an export). The rows up to
+    ``state.last_row`` are only hashed and compared with the stored checksum;
+    values are parsed for new rows alone. Any mismatch recomputes from scratch.
+    """
+    if state is None or state.source != source:
+        return full_fold(grid, source, column)
+
+    checksum, seen, new_rows = _EMPTY_CHECKSUM, 0, []
+    for row, cells in iter_grid_rows(grid):
+        if row <= state.last_row:
+            checksum = chain_checksum(checksum, row_fingerprint(cells))
+            seen += 1
+        else:
+            new_rows.append((row, cells))
+
+    if seen != state.row_count or checksum != state.checksum:
+        logger.info("🔁 Earlier rows changed, recomputing from scratch")
+        return full_fold(grid, source, column)
+
+    state = IncrementalState(**{**asdict(state), "tail": list(state.tail)})
+    values = _fold_rows(state, new_rows, column)
+    return FoldResult(state=state, mode="incremental", new_rows=len(new_rows), new_values=values)
+
+
+def fold_tail(state: IncrementalState, grid: GridData,
+              column: Optional[int] = None) -> Optional[FoldResult]:
+    """
+    Fold a grid read from ``state.resume_row`` onwards (e.g. a partial scroll
+    harvest). The stored tail rows must reappear unchanged; returns None when
+    they don't, meaning the caller has to read the whole tab again.
+    """
+    rows = dict(iter_grid_rows(grid))
+    for row, fingerprint in state.tail:
+        cells = rows.get(row)
+        if cells is None or row_fingerprint(cells) != fingerprint:
+            logger.info(f"🔁 Row {row} changed or missing, recomputing from scratch")
+            return None
+
+    new_rows = [(row, rows[row]) for row in sorted(rows) if row > state.last_row]
+    state = IncrementalState(**{**asdict(state), "tail": list(state.tail)})
+    values = _fold_rows(state, new_rows, column)
+    return FoldResult(state=state, mode="incremental", new_rows=len(new_rows), new_values=values)
+
+
+class IncrementalStore:
+    """SQLite-backed IncrementalState per tab (in memory without ``path``)."""
+
+    def __init__(self, path: Optional[str] = None):
+        if path:
+            db_path = Path(path).expanduser()
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            location = str(db_path)
+        else:
+            location = ":memory:"
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(location, check_same_thread=False)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS incremental (
+                key TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[IncrementalState]:
+        with self._lock:
+            row = self._db.execute("SELECT state FROM incremental WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        try:
+            data: Dict[str, Any] = json.loads(row[0])
+            data["tail"] = [tuple(item) for item in data.get("tail", [])]
+            return IncrementalState(**data)
+        except (ValueError, TypeError) as e:
+            logger.warning(f"⚠️ Discarding unreadable incremental state for {key}: {e}")
+            self.invalidate(key)
+            return None
+
+    def put(self, key: str, state: IncrementalState):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO incremental (key, state, updated_at) VALUES (?, ?, ?)",
+                (key, json.dumps(asdict(state)), state.updated_at),
+            )
+            self._db.commit()
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._db.execute("DELETE FROM incremental WHERE key = ?", (key,))
+            self._db.commit()
@@ -0,0 +1,223 @@
+"""
+Persistent priority queue of automation jobs.
+Jobs live in SQLite so queued work survives restarts; worker slots claim
+the most urgent job atomically and store its result when it finishes.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from jobs import DONE, FAILED, QUEUED, RUNNING
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """Raised by JobQueue.enqueue when ``max_queued`` jobs are already waiting."""
+
+    def __init__(self, queued: int):
+        super().__init__(f"Job queue is full ({queued} jobs waiting)")
+        self.queued = queued
+
+
+@dataclass
+class QueuedJob:
+    id: str
+    sheet_url: str
+    label: str
+    priority: int
+    status: str
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+    attempts: int = 0
+
+    @property
+    def done(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def to_dict(self, include_result: bool = False) -> Dict[str, Any]:
+        data = {
+            "id": self.id,
+            "sheet_url": self.sheet_url,
+            "label": self.label,
+            "priority": self.priority,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "attempts": self.attempts,
+        }
+        if include_result:
+            data["result"] = self.result
+        return data
+
+
+_COLUMNS = "id, sheet_url, label, priority, status, created_at, started_at, finished_at, result, error, attempts"
+
+
+def _row_to_job(row: tuple) -> QueuedJob:
+    job = QueuedJob(*row)
+    job.result = json.loads(job.result) if job.result else None
+    return job
+
+
+class JobQueue:
+    """
+    SQLite-backed job queue; higher ``priority`` runs first, FIFO within a priority.
+
+    Without ``path`` the queue lives in memory. At most ``max_queued`` jobs may
+    wait; the newest ``keep_finished`` finished jobs are kept for polling. A job
+    interrupted ``max_attempts`` times (e.g. one that crashes the process) is
+    failed on recovery instead of being requeued again.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_queued: int = 100, keep_finished: int = 1000,
+                 max_attempts: int = 3):
+        self.max_queued = max(1, max_queued)
+        self.keep_finished = keep_finished
+        self.max_attempts = max(1, max_attempts)
+        if path:
+            db_path = Path(path).expanduser()
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            location = str(db_path)
+        else:
+            location = ":memory:"
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(location, check_same_thread=False)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                sheet_url TEXT NOT NULL,
+                label TEXT NOT NULL DEFAULT '',
+                priority INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, priority DESC, created_at)")
+        self._db.commit()
+
+    def enqueue(self, sheet_url: str, label: str = "", priority: int = 0) -> QueuedJob:
+        """Add a job; raises QueueFull when the queue is at capacity."""
+        job = QueuedJob(id=uuid.uuid4().hex[:12], sheet_url=sheet_url, label=label or sheet_url,
+                        priority=int(priority), status=QUEUED, created_at=time.time())
+        with self._lock:
+            queued = self._db.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+            if queued >= self.max_queued:
+                raise QueueFull(queued)
+            self._db.execute(
+                "INSERT INTO jobs (id, sheet_url, label, priority, status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job.id, job.sheet_url, job.label, job.priority, job.status, job.created_at),
+            )
+            self._db.commit()
+        logger.info(f"📨 Queued job {job.id} (priority {job.priority}): {job.label}")
+        return job
+
+    def claim(self) -> Optional[QueuedJob]:
+        """Mark the most urgent queued job as running and return it (None when idle)."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE status = ? ORDER BY priority DESC, created_at LIMIT 1",
+                (QUEUED,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                (RUNNING, now, row[0]),
+            )
+            self._db.commit()
+        job = _row_to_job(row)
+        job.status, job.started_at, job.attempts = RUNNING, now, job.attempts + 1
+        return job
+
+    def finish(self, job_id: str, result: Any):
+        self._close(job_id, DONE, result=json.dumps(result, default=str))
+
+    def fail(self, job_id: str, error: str):
+        self._close(job_id, FAILED, error=error)
+
+    def _close(self, job_id: str, status: str, result: Optional[str] = None, error: Optional[str] = None):
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, result = ?, error = ? WHERE id = ?",
+                (status, time.time(), result, error, job_id),
+            )
+            # Keep only the newest finished jobs
+            self._db.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND id NOT IN "
+                "(SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY finished_at DESC LIMIT ?)",
+                (DONE, FAILED, DONE, FAILED, self.keep_finished),
+            )
+            self._db.commit()
+
+    def recover(self) -> int:
+        """
+        Requeue jobs left running by a previous process; returns how many.
+        Jobs that already used ``max_attempts`` attempts are marked failed.
+        """
+        with self._lock:
+            failed = self._db.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, error = ? WHERE status = ? AND attempts >= ?",
+                (FAILED, time.time(), f"Interrupted {self.max_attempts} times, giving up", RUNNING,
+                 self.max_attempts),
+            ).rowcount
+            count = self._db.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?", (QUEUED, RUNNING)
+            ).rowcount
+            self._db.commit()
+        if failed:
+            logger.warning(f"⚠️ Failed {failed} job(s) interrupted {self.max_attempts} times")
+        if count:
+            logger.info(f"♻️ Requeued {count} interrupted job(s)")
+        return count
+
+    def get(self, job_id: str) -> Optional[QueuedJob]:
+        with self._lock:
+            row = self._db.execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[QueuedJob]:
+        """Most recent jobs first, optionally filtered by status (results not loaded)."""
+        query = f"SELECT {_COLUMNS.replace('result', 'NULL')} FROM jobs"
+        params: tuple = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        with self._lock:
+            rows = self._db.execute(query, params + (limit,)).fetchall()
+        return [_row_to_job(row) for row in rows]
+
+    def position(self, job: QueuedJob) -> int:
+        """Queued jobs that will run before ``job`` (0 when running or next in line)."""
+        if job.status != QUEUED:
+            return 0
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND "
+                "(priority > ? OR (priority = ? AND created_at < ?))",
+                (QUEUED, job.priority, job.priority, job.created_at),
+            ).fetchone()[0]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0, **dict(rows)}
@@ -0,0 +1,124 @@
+"""
+Background job runner for automations.
+Runs jobs on worker threads so callers (Streamlit sessions) get a handle
+immediately and poll its progress instead of blocking on the run.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from progress import ProgressEvent
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+@dataclass
+class Job:
+    """Handle of one submitted run; updated from the worker thread."""
+    id: str
+    label: str = ""
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+    events: Deque[ProgressEvent] = field(default_factory=lambda: deque(maxlen=200))
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def record(self, event: ProgressEvent):
+        """Progress callback handed to the automation."""
+        with self._lock:
+            self.events.append(event)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Consistent, JSON-friendly view of the job for polling clients."""
+        with self._lock:
+            events = list(self.events)
+        latest = events[-1] if events else None
+        end = self.finished_at or time.time()
+        return {
+            "id": self.id,
+            "label": self.label,
+            "status": self.status,
+            "progress": 1.0 if self.done else (latest.overall if latest else 0.0),
+            "message": latest.message if latest else "Waiting for a free worker",
+            "phase": latest.phase if latest else self.status,
+            "rows": latest.rows if latest else None,
+            "total_rows": latest.total_rows if latest else None,
+            "elapsed": round(end - (self.started_at or end), 3),
+            "events": [event.to_dict() for event in events[-20:]],
+            "error": self.error,
+        }
+
+
+class JobRunner:
+    """
+    Runs submitted callables on a bounded worker pool.
+
+    ``target`` is called with ``progress_callback=job.record`` plus the given
+    arguments; jobs beyond ``max_workers`` wait in FIFO order.
+    """
+
+    def __init__(self, max_workers: int = 1, keep_finished: int = 100):
+        self.max_workers = max(1, max_workers)
+        self.keep_finished = keep_finished
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="automation-job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, target: Callable[..., Any], *args: Any, label: str = "", **kwargs: Any) -> Job:
+        job = Job(id=uuid.uuid4().hex[:12], label=label)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, target, args, kwargs)
+        logger.info(f"📨 Queued job {job.id} {label}")
+        return job
+
+    def _run(self, job: Job, target: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]):
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = target(*args, progress_callback=job.record, **kwargs)
+            job.status = DONE
+        except Exception as e:
+            logger.error(f"❌ Job {job.id} failed: {e}", exc_info=True)
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def queue_position(self, job: Job) -> int:
+        """Jobs queued ahead of ``job`` (0 when running or next in line)."""
+        with self._lock:
+            queued = [j.id for j in self._jobs.values() if j.status == QUEUED]
+        return queued.index(job.id) if job.id in queued else 0
+
+    def jobs(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job_id]
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
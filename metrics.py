@@ -0,0 +1,235 @@
+"""
+Per-phase timing for automation runs.
+Each run records a span per phase (launch, navigate, login, ready, header,
+export, harvest, aggregate) that is attached to the result, appended to a
+JSON lines file and folded into process-wide Prometheus metrics. Playwright
+traces can be sampled and kept for the slowest runs.
+"""
+
+import functools
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the phase duration histogram buckets
+DURATION_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# Innermost open span of the current task (asyncio tasks get their own copy)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    """One timed phase of a run."""
+    name: str
+    start: float
+    duration: float = 0.0
+    status: str = "ok"
+    retries: int = 0
+    rows: Optional[int] = None
+    bytes: Optional[int] = None
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["start"] = round(self.start, 4)
+        data["duration"] = round(self.duration, 4)
+        return {k: v for k, v in data.items() if v not in (None, {})}
+
+
+class RunMetrics:
+    """Spans of one run; ``start`` offsets are seconds since the run started."""
+
+    def __init__(self, run_id: Optional[str] = None):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.spans: List[Span] = []
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._t0
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Span]:
+        """Time the enclosed block; set ``retries``/``rows``/``bytes`` on the yielded span."""
+        fields = {key: attrs.pop(key) for key in ("retries", "rows", "bytes") if key in attrs}
+        span = Span(name=name, start=self.elapsed, attrs=attrs, **fields)
+        self.spans.append(span)
+        token = _current_span.set(span)
+        begin = time.perf_counter()
+        try:
+            yield span
+        except BaseException:
+            span.status = "error"
+            raise
+        finally:
+            span.duration = time.perf_counter() - begin
+            _current_span.reset(token)
+
+    def phase_totals(self) -> Dict[str, float]:
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            totals[span.name] = totals.get(span.name, 0.0) + span.duration
+        return {name: round(seconds, 4) for name, seconds in totals.items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "started_at": self.started_at,
+            "total_seconds": round(self.elapsed, 4),
+            "phases": self.phase_totals(),
+            "spans": [span.to_dict() for span in self.spans],
+        }
+
+
+def annotate(**fields: Any):
+    """Set fields (status, retries, rows, bytes or extra attrs) on the current span."""
+    span = _current_span.get()
+    if span is None:
+        return
+    for key, value in fields.items():
+        if key in ("status", "retries", "rows", "bytes"):
+            setattr(span, key, value)
+        else:
+            span.attrs[key] = value
+
+
+def timed(phase: str, **attrs: Any) -> Callable:
+    """Decorate an async method of an object with a ``metrics`` RunMetrics to record a span."""
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        async def wrapper(self, *args: Any, **kwargs: Any) -> Any:
+            with self.metrics.span(phase, **attrs):
+                return await method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class MetricsRegistry:
+    """Process-wide counters and phase duration histograms in Prometheus text format."""
+
+    def __init__(self, prefix: str = "sheet_agent"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._runs: Dict[str, int] = {}
+        self._paths: Dict[str, int] = {}
+        # phase -> [bucket counts..., count, sum]
+        self._durations: Dict[str, List[float]] = {}
+        self._counters: Dict[Tuple[str, str], float] = {}
+
+    def record(self, metrics: Dict[str, Any], status: str = "success", path: Optional[str] = None):
+        """
+        Fold one run's ``metrics`` dict (RunMetrics.to_dict()) into the registry;
+        ``path`` is the extraction path ("direct" or "agent") that produced the result.
+        """
+        with self._lock:
+            self._runs[status] = self._runs.get(status, 0) + 1
+            if path:
+                self._paths[path] = self._paths.get(path, 0) + 1
+            self._observe("run", metrics.get("wall_seconds", metrics.get("total_seconds", 0.0)))
+            for span in metrics.get("spans", []):
+                self._observe(span["name"], span.get("duration", 0.0))
+                for counter in ("retries", "rows", "bytes"):
+                    if span.get(counter):
+                        key = (counter, span["name"])
+                        self._counters[key] = self._counters.get(key, 0) + span[counter]
+
+    def _observe(self, phase: str, seconds: float):
+        histogram = self._durations.setdefault(phase, [0.0] * (len(DURATION_BUCKETS) + 2))
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if seconds <= bound:
+                histogram[i] += 1
+        histogram[-2] += 1
+        histogram[-1] += seconds
+
+    def render_prometheus(self) -> str:
+        p = self.prefix
+        lines = [f"# HELP {p}_runs_total Automation runs by result status",
+                 f"# TYPE {p}_runs_total counter"]
+        with self._lock:
+            for status, count in sorted(self._runs.items()):
+                lines.append(f'{p}_runs_total{{status="{status}"}} {count}')
+            if self._paths:
+                lines += [f"# HELP {p}_runs_by_path_total Automation runs by extraction path (agent = fallback)",
+                          f"# TYPE {p}_runs_by_path_total counter"]
+                for path, count in sorted(self._paths.items()):
+                    lines.append(f'{p}_runs_by_path_total{{path="{path}"}} {count}')
+            lines += [f"# HELP {p}_phase_duration_seconds Time spent per phase",
+                      f"# TYPE {p}_phase_duration_seconds histogram"]
+            for phase, histogram in sorted(self._durations.items()):
+                for bound, count in zip(DURATION_BUCKETS, histogram):
+                    lines.append(f'{p}_phase_duration_seconds_bucket{{phase="{phase}",le="{bound}"}} {count:g}')
+                lines.append(f'{p}_phase_duration_seconds_bucket{{phase="{phase}",le="+Inf"}} {histogram[-2]:g}')
+                lines.append(f'{p}_phase_duration_seconds_count{{phase="{phase}"}} {histogram[-2]:g}')
+                lines.append(f'{p}_phase_duration_seconds_sum{{phase="{phase}"}} {histogram[-1]:.6f}')
+            for counter in ("retries", "rows", "bytes"):
+                entries = sorted((phase, v) for (c, phase), v in self._counters.items() if c == counter)
+                if not entries:
+                    continue
+                lines += [f"# TYPE {p}_phase_{counter}_total counter"]
+                for phase, value in entries:
+                    lines.append(f'{p}_phase_{counter}_total{{phase="{phase}"}} {value:g}')
+        return "\n".join(lines) + "\n"
+
+
+class JsonlExporter:
+    """Appends one JSON line per run to ``path``."""
+
+    def __init__(self, path: str):
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def export(self, record: Dict[str, Any]):
+        line = json.dumps(record, default=str)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class TraceSampler:
+    """
+    Decides which runs record a Playwright trace and which traces are kept.
+
+    A ``sample_rate`` fraction of runs is traced; a trace is kept when the run
+    took at least ``min_seconds`` and is among the ``keep`` slowest seen so far.
+    """
+
+    def __init__(self, trace_dir: str, sample_rate: float = 0.1, keep: int = 5, min_seconds: float = 0.0):
+        self.trace_dir = Path(trace_dir).expanduser()
+        self.trace_dir.mkdir(parents=True, exist_ok=True)
+        self.sample_rate = sample_rate
+        self.keep = max(1, keep)
+        self.min_seconds = min_seconds
+        self._lock = threading.Lock()
+        # (duration, path) of kept traces, fastest first
+        self._kept: List[Tuple[float, Path]] = []
+
+    def should_trace(self) -> bool:
+        return random.random() < self.sample_rate
+
+    def claim(self, run_id: str, duration: float) -> Optional[Path]:
+        """Path to save a finished run's trace to, or None to discard it."""
+        if duration < self.min_seconds:
+            return None
+        with self._lock:
+            if len(self._kept) >= self.keep:
+                fastest, path = self._kept[0]
+                if duration <= fastest:
+                    return None
+                self._kept.pop(0)
+                path.unlink(missing_ok=True)
+            path = self.trace_dir / f"trace-{run_id}-{duration:.1f}s.zip"
+            self._kept.append((duration, path))
+            self._kept.sort(key=lambda kept: kept[0])
+            return path
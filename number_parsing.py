@@ -0,0 +1,174 @@
+"""
+Vectorized parsing of displayed number/currency text.
+Turns whole columns of strings like "$1,234.50", "(120.00)" or "1.234,50 €"
+into float64 arrays in one batch; the same rules are ported to the page as
+NUMBER_PARSER_JS for in-browser aggregation.
+"""
+
+import json
+import logging
+from typing import Any, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    # Arrow-backed strings run the .str operations below in native code
+    _STRING_DTYPE = "string[pyarrow]"
+except ImportError:
+    _STRING_DTYPE = "string"
+
+logger = logging.getLogger(__name__)
+
+DECIMAL_MARKS = ("auto", ".", ",")
+
+# ISO 4217 codes accepted next to a number; any other letters ("INV 1001",
+# "ABC1") mean the cell is an identifier, not an amount
+CURRENCY_CODES = (
+    "AUD", "BRL", "CAD", "CHF", "CNY", "CZK", "DKK", "EUR", "GBP", "HKD", "HUF", "IDR", "ILS",
+    "INR", "JPY", "KRW", "MXN", "NOK", "NZD", "PLN", "RUB", "SEK", "SGD", "THB", "TRY", "UAH",
+    "USD", "ZAR",
+)
+# Currency symbols, the codes above and common abbreviations seen in cells
+_CURRENCY = r"(?:[$€£¥₹₩₽₺₴₪฿¢]|US\$|[ACR]\$|" + "|".join(CURRENCY_CODES) + r"|kr|zł|Fr)"
+# Digits of a displayed number: thousands groups of exactly three digits
+# ("1,234,567", "1.234.567", "1'234", "1 234", also with no-break spaces)
+# with a decimal part after the other mark, or an ungrouped run with at most
+# one decimal mark
+_DIGITS = (
+    r"(?:\d{1,3}(?:,\d{3})+(?:\.\d*)?|\d{1,3}(?:\.\d{3})+(?:,\d*)?"
+    r"|\d{1,3}(?:'\d{3})+(?:[.,]\d*)?|\d{1,3}(?:[\s  ]\d{3})+(?:[.,]\d*)?"
+    r"|\d+(?:[.,]\d*)?|[.,]\d+)"
+)
+# A displayed number: optional parentheses, sign, currency on either side,
+# the digits, trailing minus or percent (at most one sign overall, checked
+# separately because RE2 under pyarrow has no lookahead)
+NUMBER_PATTERN = (
+    r"^[(\s]*[-+−]?\s*" + _CURRENCY + r"?\s*[-+−]?\s*"
+    + _DIGITS + r"\s*" + _CURRENCY + r"?\s*[-−]?\s*%?[)\s]*$"
+)
+_SIGN_PATTERN = r"[-+−]"
+_PLAIN_PATTERN = r"^[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?$"
+# On digits-and-separators text: "1.234,50" (comma after a dot) or a single
+# comma not followed by exactly three digits ("12,5") is a decimal comma;
+# "1,234" and "1,234,567" group thousands
+_DECIMAL_COMMA_PATTERN = r"\.[0-9]*,[0-9]*$|^[0-9]*,(?:[0-9]{0,2}|[0-9]{4,})$"
+
+
+def _to_float(text: pd.Series) -> np.ndarray:
+    """Cast number strings to float64 in one native call (NaN for stragglers)."""
+    try:
+        return text.astype("float64").to_numpy(dtype="float64", na_value=np.nan, copy=True)
+    except (ValueError, TypeError):
+        return pd.to_numeric(text, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+
+def _parse_formatted(text: pd.Series, decimal: str) -> np.ndarray:
+    """Parse stripped strings that are not plain numbers; non-numbers become NaN."""
+    valid = (text.str.match(NUMBER_PATTERN).fillna(False)
+             & (text.str.count(_SIGN_PATTERN).fillna(0) <= 1)).to_numpy(dtype=bool)
+    out = np.full(len(text), np.nan)
+    if not valid.any():
+        return out
+
+    text = text[valid]
+    negative = (text.str.startswith("(") | text.str.contains("[-−]")).to_numpy(dtype=bool)
+    percent = text.str.contains("%", regex=False).to_numpy(dtype=bool)
+    digits = text.str.replace(r"[^0-9.,]", "", regex=True)
+
+    if decimal == ",":
+        comma_decimal = digits.str.contains(",", regex=False)
+        several_dots = pd.Series(True, index=digits.index)
+    elif decimal == ".":
+        comma_decimal = pd.Series(False, index=digits.index)
+        several_dots = digits.str.contains(r"\..*\.")
+    else:
+        comma_decimal = digits.str.contains(_DECIMAL_COMMA_PATTERN)
+        several_dots = digits.str.contains(r"\..*\.")
+
+    # Dots are grouping when the comma is the decimal mark or when there are
+    # several of them ("1.234.567"); commas are grouping otherwise
+    drop_dots = comma_decimal | several_dots
+    normalized = digits.where(~drop_dots, digits.str.replace(".", "", regex=False))
+    normalized = normalized.where(comma_decimal, normalized.str.replace(",", "", regex=False))
+    normalized = normalized.str.replace(",", ".", regex=False)
+
+    numbers = _to_float(normalized)
+    numbers[negative] = -numbers[negative]
+    numbers[percent] /= 100.0
+    out[valid] = numbers
+    return out
+
+
+def parse_numbers(values: Iterable[Any], decimal: str = "auto") -> np.ndarray:
+    """
+    Parse a column of cell values into a float64 array (NaN = not a number).
+
+    Plain numbers are cast in one native call; only the remaining strings
+    take the formatted path (currency, separators, accounting negatives,
+    percentages). Installing pyarrow moves the string work to native code.
+
+    Args:
+        values: Cell values (strings, numbers or None), e.g. a DataFrame column
+        decimal: Decimal mark, "." or ","; "auto" infers it per cell
+    """
+    if decimal not in DECIMAL_MARKS:
+        raise ValueError(f"Unsupported decimal mark: {decimal}")
+    series = values if isinstance(values, pd.Series) else pd.Series(list(values), dtype=object)
+    series = series.reset_index(drop=True)
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        result = series.to_numpy(dtype="float64", na_value=np.nan, copy=True)
+        result[~np.isfinite(result)] = np.nan
+        return result
+
+    text = series.astype(object).where(series.notna(), None)
+    text = pd.Series(text, dtype=_STRING_DTYPE).str.strip()
+    result = np.full(len(text), np.nan)
+    if decimal != ",":
+        # With a decimal comma, "1.234" means one thousand two hundred thirty-four
+        plain = text.str.match(_PLAIN_PATTERN).fillna(False).to_numpy(dtype=bool)
+        if plain.any():
+            result[plain] = _to_float(text[plain])
+
+    todo = np.isnan(result) & (text.fillna("").str.len().to_numpy() > 0)
+    if todo.any():
+        result[todo] = _parse_formatted(text[todo], decimal)
+    result[~np.isfinite(result)] = np.nan
+    return result
+
+
+def parse_number_list(values: Iterable[Any], decimal: str = "auto") -> List[float]:
+    """Numeric values of ``values`` as a list, non-numbers dropped."""
+    numbers = parse_numbers(values, decimal)
+    return numbers[~np.isnan(numbers)].tolist()
+
+
+# In-page port of the rules above. Defines parseNumber(raw) -> number | null.
+NUMBER_PARSER_JS = """
+const NUMBER_RE = new RegExp(%s);
+const PLAIN_RE = new RegExp(%s);
+const DECIMAL_COMMA_RE = new RegExp(%s);
+const SIGN_RE = new RegExp(%s, 'g');
+const parseNumber = (raw) => {
+    if (raw === null || raw === undefined) return null;
+    const text = String(raw).trim();
+    if (text === '') return null;
+    if (PLAIN_RE.test(text)) {
+        const plain = Number(text);
+        return Number.isFinite(plain) ? plain : null;
+    }
+    if (!NUMBER_RE.test(text) || (text.match(SIGN_RE) || []).length > 1) return null;
+    const negative = text.startsWith('(') || /[-\\u2212]/.test(text);
+    let digits = text.replace(/[^0-9.,]/g, '');
+    const commaDecimal = DECIMAL_COMMA_RE.test(digits);
+    if (commaDecimal || /\\..*\\./.test(digits)) digits = digits.replace(/\\./g, '');
+    if (!commaDecimal) digits = digits.replace(/,/g, '');
+    let num = Number(digits.replace(',', '.'));
+    if (!Number.isFinite(num)) return null;
+    if (negative) num = -num;
+    if (text.includes('%%')) num /= 100;
+    return num;
+};
+""" % (json.dumps(NUMBER_PATTERN), json.dumps(_PLAIN_PATTERN), json.dumps(_DECIMAL_COMMA_PATTERN),
+       json.dumps(_SIGN_PATTERN))
@@ -0,0 +1,44 @@
+"""
+Structured progress events emitted by the automation.
+Consumers (the job runner, the UI) receive one ProgressEvent per phase step.
+"""
+
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+# Phases in the order a run goes through them, with the overall progress
+# reached when each starts
+PHASE_PROGRESS = {
+    "queued": 0.0,
+    "launch": 0.05,
+    "navigate": 0.15,
+    "login": 0.25,
+    "header": 0.35,
+    "rows": 0.4,
+    "total": 1.0,
+}
+
+
+@dataclass
+class ProgressEvent:
+    """One step of a run. ``rows``/``total_rows`` are set while reading rows."""
+    phase: str
+    message: str
+    rows: Optional[int] = None
+    total_rows: Optional[int] = None
+    fraction: Optional[float] = None
+    timestamp: float = field(default_factory=time.time)
+
+    @property
+    def overall(self) -> float:
+        """Overall progress 0..1; the rows phase spans 0.4 to 0.95."""
+        if self.phase == "rows" and self.fraction is not None:
+            return 0.4 + 0.55 * max(0.0, min(self.fraction, 1.0))
+        return PHASE_PROGRESS.get(self.phase, 0.0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "overall": self.overall}
+
+
+ProgressCallback = Callable[[ProgressEvent], None]
@@ -0,0 +1,123 @@
+"""
+Event-driven readiness checks for Google Sheets pages.
+Waits on concrete page signals instead of fixed sleeps.
+"""
+
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict
+
+from playwright.async_api import Page, TimeoutError as PlaywrightTimeoutError
+
+logger = logging.getLogger(__name__)
+
+# Grid container used by Sheets, plus a generic ARIA grid fallback
+GRID_SELECTOR = "#waffle-grid-container, .grid-container, [role='grid']"
+HEADER_SELECTOR = "div[data-header-column]"
+CELL_SELECTOR = "div[data-value]"
+
+# Resolves once the rendered cell count has not changed for `frames`
+# consecutive animation frames. The token resets state left by earlier waits.
+_STABLE_ROWS_JS = """
+({selector, frames, token}) => {
+    const count = document.querySelectorAll(selector).length;
+    let s = window.__sheetReadiness;
+    if (!s || s.token !== token) {
+        s = window.__sheetReadiness = {token, count: -1, stable: 0};
+    }
+    if (count === s.count) {
+        s.stable += 1;
+    } else {
+        s.count = count;
+        s.stable = 0;
+    }
+    return s.stable >= frames;
+}
+"""
+
+
+@dataclass
+class ReadinessTimeouts:
+    """Per-phase timeouts in milliseconds."""
+    navigation_ms: int = 30000
+    login_step_ms: int = 15000
+    grid_ms: int = 20000
+    headers_ms: int = 10000
+    rows_stable_ms: int = 10000
+    stable_frames: int = 5
+
+
+@dataclass
+class SheetReadiness:
+    """Whether the grid attached, plus the seconds spent in each phase."""
+    grid_found: bool
+    durations: Dict[str, float] = field(default_factory=dict)
+
+
+async def wait_for_grid(page: Page, timeout_ms: int) -> bool:
+    """Wait until the grid container (or any value cell) is attached."""
+    try:
+        await page.wait_for_selector(f"{GRID_SELECTOR}, {CELL_SELECTOR}", state="attached", timeout=timeout_ms)
+        return True
+    except PlaywrightTimeoutError:
+        logger.warning(f"⚠️ Grid not found within {timeout_ms} ms")
+        return False
+
+
+async def wait_for_headers(page: Page, timeout_ms: int) -> bool:
+    """Wait until at least one header cell has rendered text."""
+    try:
+        await page.wait_for_function(
+            """(selector) => Array.from(document.querySelectorAll(selector))
+                .some(el => (el.textContent || '').trim().length > 0)""",
+            arg=HEADER_SELECTOR,
+            polling="raf",
+            timeout=timeout_ms,
+        )
+        return True
+    except PlaywrightTimeoutError:
+        logger.warning(f"⚠️ Header cells not rendered within {timeout_ms} ms")
+        return False
+
+
+async def wait_for_stable_rows(page: Page, frames: int, timeout_ms: int) -> bool:
+    """Wait until the number of rendered cells is stable across animation frames."""
+    try:
+        await page.wait_for_function(
+            _STABLE_ROWS_JS,
+            arg={"selector": CELL_SELECTOR, "frames": frames, "token": uuid.uuid4().hex},
+            polling="raf",
+            timeout=timeout_ms,
+        )
+        return True
+    except PlaywrightTimeoutError:
+        logger.warning(f"⚠️ Row count still changing after {timeout_ms} ms")
+        return False
+
+
+async def wait_for_sheet_ready(page: Page, timeouts: ReadinessTimeouts) -> SheetReadiness:
+    """
+    Wait for grid, headers and a stable row count in turn.
+
+    A header or row phase that times out is logged and skipped so extraction
+    can still try with whatever has rendered; without a grid nothing else is
+    waited for and ``grid_found`` is False.
+    """
+    phases = [
+        ("grid", lambda: wait_for_grid(page, timeouts.grid_ms)),
+        ("headers", lambda: wait_for_headers(page, timeouts.headers_ms)),
+        ("rows_stable", lambda: wait_for_stable_rows(page, timeouts.stable_frames, timeouts.rows_stable_ms)),
+    ]
+    readiness = SheetReadiness(grid_found=True)
+    for name, wait in phases:
+        start = time.perf_counter()
+        ready = await wait()
+        readiness.durations[name] = round(time.perf_counter() - start, 3)
+        if name == "grid" and not ready:
+            # Nothing else can render without a grid
+            readiness.grid_found = False
+            return readiness
+    logger.info(f"✅ Sheet ready: {readiness.durations}")
+    return readiness
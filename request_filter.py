@@ -0,0 +1,249 @@
+"""
+Request interception for Sheets pages.
+Aborts or stubs requests the extraction never needs (images, fonts, media,
+avatars, analytics, logging beacons), optionally serves versioned static
+assets from a disk cache shared across runs, and counts what was saved.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+from playwright.async_api import BrowserContext, Route
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class FilterProfile:
+    """What to drop: resource types and URL regexes (aborted or answered with 204)."""
+    name: str
+    block_resource_types: FrozenSet[str] = frozenset()
+    block_url_patterns: Tuple[str, ...] = ()
+    stub_url_patterns: Tuple[str, ...] = ()
+
+
+# Analytics and logging beacons; answered with 204 so the page doesn't retry
+_BEACONS = (
+    r"google-analytics\.com/",
+    r"googletagmanager\.com/",
+    r"doubleclick\.net/",
+    r"/gen_204\b",
+    r"play\.google\.com/log\b",
+    r"docs\.google\.com/.*/(?:logImpressions|jserror|naLogImpressions)\b",
+)
+
+PROFILES: Dict[str, Optional[FilterProfile]] = {
+    "off": None,
+    # Never needed to read cells: pixels, fonts, media and telemetry
+    "minimal": FilterProfile(
+        name="minimal",
+        block_resource_types=frozenset({"image", "media", "font"}),
+        stub_url_patterns=_BEACONS,
+    ),
+    # Also drops the account widget, avatars and add-on/apps-script frames
+    "aggressive": FilterProfile(
+        name="aggressive",
+        block_resource_types=frozenset({"image", "media", "font", "manifest", "texttrack"}),
+        block_url_patterns=(
+            r"ogs\.google\.com/",
+            r"lh\d\.googleusercontent\.com/",
+            r"script\.google\.com/",
+            r"/macros/",
+            r"apis\.google\.com/js/(?:plusone|platform)",
+        ),
+        stub_url_patterns=_BEACONS,
+    ),
+}
+
+# Rough transfer size of dropped requests, by resource type. Aborted requests
+# never report a size, so bytes saved on them is an estimate.
+_TYPICAL_BYTES = {"image": 12_000, "font": 40_000, "media": 200_000, "script": 30_000,
+                  "stylesheet": 15_000, "manifest": 1_000}
+_DEFAULT_BYTES = 2_000
+
+# Versioned, immutable asset hosts that are safe to cache across runs
+_STATIC_HOSTS = re.compile(r"^https://(?:www|ssl|fonts)\.gstatic\.com/")
+_STATIC_TYPES = {"script", "stylesheet", "font", "image"}
+
+
+def get_filter_profile(name: str) -> Optional[FilterProfile]:
+    """Profile by name ("off", "minimal", "aggressive"); ValueError when unknown."""
+    key = (name or "off").lower()
+    if key not in PROFILES:
+        raise ValueError(f"Unknown request filter profile: {name}")
+    return PROFILES[key]
+
+
+class StaticAssetCache:
+    """
+    Disk cache of static asset responses keyed by URL.
+    Only versioned gstatic assets are stored, so entries never go stale;
+    the oldest files are evicted past ``max_mb``.
+    """
+
+    def __init__(self, cache_dir: str, max_mb: float = 200):
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._size = sum(p.stat().st_size for p in self.cache_dir.glob("*.body"))
+
+    @staticmethod
+    def cacheable(url: str, resource_type: str) -> bool:
+        return resource_type in _STATIC_TYPES and bool(_STATIC_HOSTS.match(url))
+
+    def _paths(self, url: str) -> Tuple[Path, Path]:
+        name = hashlib.sha256(url.encode()).hexdigest()
+        return self.cache_dir / f"{name}.body", self.cache_dir / f"{name}.json"
+
+    def get(self, url: str) -> Optional[Tuple[int, Dict[str, str], bytes]]:
+        """(status, headers, body) for a cached URL, or None."""
+        body_path, meta_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text())
+            body = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+        os.utime(body_path)
+        return meta["status"], meta["headers"], body
+
+    def put(self, url: str, status: int, headers: Dict[str, str], body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        body_path, meta_path = self._paths(url)
+        # Content-Length/encoding no longer describe the decoded body we store
+        headers = {k: v for k, v in headers.items()
+                   if k.lower() not in ("content-length", "content-encoding", "transfer-encoding")}
+        try:
+            tmp = body_path.with_suffix(".tmp")
+            tmp.write_bytes(body)
+            os.replace(tmp, body_path)
+            meta_path.write_text(json.dumps({"url": url, "status": status, "headers": headers}))
+        except OSError as e:
+            logger.debug(f"Static asset cache write failed: {e}")
+            return
+        with self._lock:
+            self._size += len(body)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        files = sorted(self.cache_dir.glob("*.body"), key=lambda p: p.stat().st_mtime)
+        for body_path in files:
+            if self._size <= self.max_bytes * 0.8:
+                break
+            try:
+                self._size -= body_path.stat().st_size
+                body_path.unlink()
+                body_path.with_suffix(".json").unlink(missing_ok=True)
+            except OSError:
+                continue
+        logger.info(f"🧹 Static asset cache trimmed to {self._size / 1e6:.1f} MB")
+
+
+@dataclass
+class FilterStats:
+    """Per-run counters; ``bytes_saved`` includes estimates for aborted requests."""
+    profile: str = "off"
+    requests: int = 0
+    blocked: int = 0
+    stubbed: int = 0
+    cache_hits: int = 0
+    cache_stores: int = 0
+    bytes_saved: int = 0
+    by_type: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def requests_saved(self) -> int:
+        return self.blocked + self.stubbed + self.cache_hits
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "requests_saved": self.requests_saved}
+
+
+class RequestFilter:
+    """Routes every request of a browser context through a FilterProfile."""
+
+    def __init__(self, profile: Optional[FilterProfile], asset_cache: Optional[StaticAssetCache] = None):
+        self.profile = profile
+        self.asset_cache = asset_cache
+        self.stats = FilterStats(profile=profile.name if profile else "off")
+        self._block = re.compile("|".join(profile.block_url_patterns)) if profile and profile.block_url_patterns else None
+        self._stub = re.compile("|".join(profile.stub_url_patterns)) if profile and profile.stub_url_patterns else None
+
+    @property
+    def active(self) -> bool:
+        return self.profile is not None or self.asset_cache is not None
+
+    async def attach(self, context: BrowserContext):
+        if self.active:
+            await context.route("**/*", self._handle)
+
+    def _dropped(self, resource_type: str):
+        self.stats.bytes_saved += _TYPICAL_BYTES.get(resource_type, _DEFAULT_BYTES)
+        self.stats.by_type[resource_type] = self.stats.by_type.get(resource_type, 0) + 1
+
+    async def _handle(self, route: Route):
+        request = route.request
+        url, resource_type = request.url, request.resource_type
+        self.stats.requests += 1
+        try:
+            if self.profile is not None and resource_type != "document":
+                if self._stub is not None and self._stub.search(url):
+                    self.stats.stubbed += 1
+                    self._dropped(resource_type)
+                    await route.fulfill(status=204, body=b"")
+                    return
+                if resource_type in self.profile.block_resource_types or (
+                        self._block is not None and self._block.search(url)):
+                    self.stats.blocked += 1
+                    self._dropped(resource_type)
+                    await route.abort("blockedbyclient")
+                    return
+
+            if self.asset_cache is not None and request.method == "GET" and \
+                    self.asset_cache.cacheable(url, resource_type):
+                await self._from_cache(route, url)
+                return
+
+            await route.continue_()
+        except Exception as e:
+            # The page may have navigated away; the request is gone either way
+            logger.debug(f"Request filter skipped {url}: {e}")
+
+    async def _from_cache(self, route: Route, url: str):
+        cached = self.asset_cache.get(url)
+        if cached is not None:
+            status, headers, body = cached
+            self.stats.cache_hits += 1
+            self.stats.bytes_saved += len(body)
+            await route.fulfill(status=status, headers=headers, body=body)
+            return
+        try:
+            response = await route.fetch()
+            body = await response.body()
+        except Exception as e:
+            # Hand the request back to the browser so the page never waits on an unresolved route
+            logger.debug(f"Asset fetch failed for {url}, continuing uncached: {e}")
+            try:
+                await route.continue_()
+            except Exception:
+                await route.abort()
+            return
+        if response.status == 200 and "no-store" not in response.headers.get("cache-control", ""):
+            self.asset_cache.put(url, response.status, response.headers, body)
+            self.stats.cache_stores += 1
+        await route.fulfill(response=response, body=body)
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"{s.requests_saved}/{s.requests} requests saved "
+                f"({s.blocked} blocked, {s.stubbed} stubbed, {s.cache_hits} cached), "
+                f"~{s.bytes_saved / 1024:,.0f} KB")
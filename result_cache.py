@@ -0,0 +1,171 @@
+"""
+Result cache for sheet totals.
+Keyed by account, spreadsheet ID, gid and target column, with TTL and LRU
+eviction and an SQLite backend so entries survive restarts.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sheet_export import SheetRef, parse_sheet_url
+from session_cache import SessionCache
+
+logger = logging.getLogger(__name__)
+
+# Async callable returning an opaque revision token for a tab (None if unknown)
+RevisionProbe = Callable[[SheetRef], Awaitable[Optional[str]]]
+
+
+@dataclass
+class CacheEntry:
+    result: Dict[str, Any]
+    revision: Optional[str]
+    stored_at: float
+
+
+def result_cache_key(sheet_url: str, target_column: str = "cost", all_tabs: bool = False,
+                     aggregations: Optional[str] = None, account: str = "") -> str:
+    """
+    Cache key for the account, sheet tab, target column and requested aggregations.
+    Totals are per account: another account may not be allowed to read the sheet.
+    """
+    ref = parse_sheet_url(sheet_url)
+    gid = "*" if all_tabs else ref.gid
+    owner = hashlib.sha256(account.strip().lower().encode()).hexdigest()[:16]
+    key = f"{owner}:{ref.spreadsheet_id}:{gid}:{target_column.strip().lower()}"
+    if aggregations:
+        key += ":" + " ".join(aggregations.lower().split())
+    return key
+
+
+class ResultCache:
+    """
+    TTL + LRU cache of automation results.
+
+    With ``path`` the cache lives in an SQLite file; without it, in memory.
+    Reads touch the entry's access time, and writes evict the least recently
+    used entries beyond ``max_entries``.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl_seconds: float = 900, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        if path:
+            db_path = Path(path).expanduser()
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            location = str(db_path)
+        else:
+            location = ":memory:"
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(location, check_same_thread=False)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                revision TEXT,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry for ``key`` unless missing or older than the TTL."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT result, revision, stored_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[2] > self.ttl_seconds:
+                self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+        return CacheEntry(result=json.loads(row[0]), revision=row[1], stored_at=row[2])
+
+    def put(self, key: str, result: Dict[str, Any], revision: Optional[str] = None):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (key, result, revision, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(result, default=str), revision, now, now),
+            )
+            # LRU eviction beyond the size bound
+            self._db.execute(
+                "DELETE FROM results WHERE key NOT IN "
+                "(SELECT key FROM results ORDER BY accessed_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self._db.commit()
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+            self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+def _cookie_header(storage_state: Dict[str, Any], host: str) -> str:
+    cookies = []
+    for cookie in storage_state.get("cookies", []):
+        domain = cookie.get("domain", "").lstrip(".")
+        if host == domain or host.endswith("." + domain):
+            cookies.append(f"{cookie['name']}={cookie['value']}")
+    return "; ".join(cookies)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Surface redirects as errors so session cookies are never sent to another URL."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+_probe_opener = urllib.request.build_opener(_NoRedirect)
+
+
+def session_revision_probe(session_cache: Optional[SessionCache], email: str,
+                           timeout: float = 5.0) -> RevisionProbe:
+    """
+    Build a probe that sends a HEAD request for the tab's export using the
+    cached session cookies (no browser). The revision is the ETag or
+    Last-Modified header; None when the server gives neither or redirects
+    (e.g. to sign-in), in which case results are not cached.
+    """
+    def probe_sync(ref: SheetRef) -> Optional[str]:
+        request = urllib.request.Request(ref.export_url("csv"), method="HEAD")
+        state = session_cache.load(email) if session_cache else None
+        if state:
+            host = ref.origin.split("://", 1)[-1].split(":")[0]
+            request.add_header("Cookie", _cookie_header(state, host))
+        try:
+            with _probe_opener.open(request, timeout=timeout) as response:
+                return response.headers.get("ETag") or response.headers.get("Last-Modified")
+        except urllib.error.HTTPError as e:
+            logger.debug(f"Revision probe got HTTP {e.code}, revision unknown")
+            return None
+        except Exception as e:
+            logger.debug(f"Revision probe failed: {e}")
+            return None
+
+    async def probe(ref: SheetRef) -> Optional[str]:
+        return await asyncio.to_thread(probe_sync, ref)
+
+    return probe
@@ -0,0 +1,92 @@
+"""
+Compact representation of the values behind a total.
+Results carry summary statistics plus the values as a base64 float64
+buffer instead of a JSON list, so payloads and the UI stay small however
+many rows were found.
+"""
+
+import base64
+import logging
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+HISTOGRAM_BINS = 30
+
+
+def encode_values(values: Iterable[float]) -> Dict[str, Any]:
+    """Columnar buffer of ``values``: little-endian float64, base64 encoded."""
+    array = np.asarray(values, dtype="<f8")
+    return {
+        "dtype": "float64",
+        "length": int(array.size),
+        "data": base64.b64encode(array.tobytes()).decode("ascii"),
+    }
+
+
+def decode_values(buffer: Dict[str, Any]) -> np.ndarray:
+    """Inverse of encode_values (read-only view over the decoded bytes)."""
+    if buffer.get("dtype") != "float64":
+        raise ValueError(f"Unsupported value buffer dtype: {buffer.get('dtype')}")
+    array = np.frombuffer(base64.b64decode(buffer["data"]), dtype="<f8")
+    if array.size != buffer.get("length", array.size):
+        raise ValueError("Value buffer length mismatch")
+    return array
+
+
+def summarize_values(values: Iterable[float], bins: int = HISTOGRAM_BINS) -> Dict[str, Any]:
+    """Count, sum, mean, min, max, median, std and a histogram in one numpy pass each."""
+    array = np.asarray(values, dtype="float64")
+    if not array.size:
+        return {"count": 0, "sum": 0.0, "mean": None, "min": None, "max": None,
+                "median": None, "std": None, "histogram": {"edges": [], "counts": []}}
+    counts, edges = np.histogram(array, bins=min(bins, max(1, int(array.size))))
+    return {
+        "count": int(array.size),
+        "sum": float(array.sum()),
+        "mean": float(array.mean()),
+        "min": float(array.min()),
+        "max": float(array.max()),
+        "median": float(np.median(array)),
+        "std": float(array.std()),
+        "histogram": {"edges": edges.tolist(), "counts": counts.tolist()},
+    }
+
+
+def attach_values(result: Dict[str, Any], values: Iterable[float]) -> Dict[str, Any]:
+    """Add ``summary`` and the ``values`` buffer to a result dict."""
+    array = np.asarray(values, dtype="float64")
+    result["summary"] = summarize_values(array)
+    result["values"] = encode_values(array)
+    return result
+
+
+def result_values(result: Dict[str, Any]) -> Optional[np.ndarray]:
+    """Values of a result, from the buffer or a legacy ``values_found`` list."""
+    if isinstance(result.get("values"), dict):
+        return decode_values(result["values"])
+    if result.get("values_found"):
+        return np.asarray(result["values_found"], dtype="float64")
+    return None
+
+
+def result_summary(result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Summary of a result, computed from legacy ``values_found`` if absent."""
+    if result.get("summary"):
+        return result["summary"]
+    values = result_values(result)
+    return summarize_values(values) if values is not None else None
+
+
+def without_buffers(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a result with value buffers elided, for logs and debug views."""
+    def strip(item: Any) -> Any:
+        if isinstance(item, dict):
+            return {k: (f"<{v.get('length', 0)} float64 values>" if k == "values" and isinstance(v, dict)
+                        else strip(v)) for k, v in item.items()}
+        if isinstance(item, list):
+            return [strip(v) for v in item]
+        return item
+    return strip(result)
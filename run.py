@@ -1,10 +1,28 @@
 import asyncio
 import logging
-from typing import Any
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, TextIO, Tuple
+import os
 import sys
+import time
+import weakref
 
-from config import get_config
+from action_trace import TraceStore
+from batch_runner import run_batch
+from browser_pool import BrowserPool, close_browser_pools, get_browser_pool
+from config import GoogleSheetConfig, get_config
 from google_sheet_automation import run_google_sheet_automation
+from incremental import IncrementalStore
+from metrics import JsonlExporter, MetricsRegistry, TraceSampler
+from progress import ProgressCallback
+from readiness import ReadinessTimeouts
+from request_filter import StaticAssetCache
+from result_cache import ResultCache, session_revision_probe
+from result_values import without_buffers
+from runtime import AsyncRuntime, get_runtime
+from session_cache import SessionCache
+
+if TYPE_CHECKING:
+    from agent_builder import AgentFallback
 
 # Fix for Windows asyncio subprocess issue
 if sys.platform == 'win32':
@@ -18,28 +36,219 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-async def _run_visible_automation() -> Any:
+def automation_options(config: GoogleSheetConfig) -> Dict[str, Any]:
+    """GoogleSheetAutomation options derived from the configuration."""
+    return {
+        "timeouts": ReadinessTimeouts(
+            navigation_ms=config.navigation_timeout_ms,
+            grid_ms=config.grid_timeout_ms,
+        ),
+        "inspect_delay": config.inspect_delay,
+        "aggregate_in_page": config.aggregate_in_page,
+        "scroll_harvest": config.scroll_harvest,
+        "harvest_time_budget": config.harvest_time_budget,
+        "harvest_viewport_height": config.harvest_viewport_height,
+        "extraction_mode": config.extraction_mode,
+        "export_format": config.export_format,
+        "target_column": config.target_column,
+        "aggregations": config.aggregations,
+        "all_tabs": config.all_tabs,
+        "incremental_store": get_incremental_store(config),
+        "request_filter": config.request_filter,
+        "static_asset_cache": get_static_asset_cache(config),
+        "trace_sampler": get_trace_sampler(config),
+        "agent_fallback": get_agent_fallback(config),
+    }
+
+
+def _pool_and_session_cache(config: GoogleSheetConfig) -> Tuple[BrowserPool, Optional[SessionCache]]:
+    """Shared browser pool for the running loop plus the session cache."""
+    pool = get_browser_pool(
+        headless=config.headless,
+        size=config.pool_size,
+        max_runs=config.max_runs_per_browser,
+        max_rss_mb=config.max_browser_rss_mb,
+    )
+    session_cache = None
+    if config.session_cache_dir:
+        session_cache = SessionCache(config.session_cache_dir, ttl_hours=config.session_ttl_hours)
+    return pool, session_cache
+
+
+_result_caches: Dict[str, ResultCache] = {}
+
+
+def get_result_cache(config: GoogleSheetConfig) -> Optional[ResultCache]:
+    """Process-wide result cache for the configured path (None when disabled)."""
+    if not config.result_cache_path:
+        return None
+    cache = _result_caches.get(config.result_cache_path)
+    if cache is None:
+        cache = ResultCache(
+            config.result_cache_path,
+            ttl_seconds=config.result_cache_ttl,
+            max_entries=config.result_cache_max_entries,
+        )
+        _result_caches[config.result_cache_path] = cache
+    return cache
+
+
+_incremental_stores: Dict[str, IncrementalStore] = {}
+
+
+def get_incremental_store(config: GoogleSheetConfig) -> Optional[IncrementalStore]:
+    """Process-wide incremental state store (None when incremental mode is off)."""
+    if not config.incremental_store_path:
+        return None
+    store = _incremental_stores.get(config.incremental_store_path)
+    if store is None:
+        store = IncrementalStore(config.incremental_store_path)
+        _incremental_stores[config.incremental_store_path] = store
+    return store
+
+
+_static_asset_caches: Dict[str, StaticAssetCache] = {}
+
+
+def get_static_asset_cache(config: GoogleSheetConfig) -> Optional[StaticAssetCache]:
+    """Process-wide static asset disk cache (None when disabled)."""
+    if not config.static_asset_cache_dir:
+        return None
+    cache = _static_asset_caches.get(config.static_asset_cache_dir)
+    if cache is None:
+        cache = StaticAssetCache(config.static_asset_cache_dir, max_mb=config.static_asset_cache_mb)
+        _static_asset_caches[config.static_asset_cache_dir] = cache
+    return cache
+
+
+_trace_samplers: Dict[str, TraceSampler] = {}
+
+
+def get_trace_sampler(config: GoogleSheetConfig) -> Optional[TraceSampler]:
+    """Process-wide Playwright trace sampler (None unless TRACE_DIR is set)."""
+    if not config.trace_dir:
+        return None
+    sampler = _trace_samplers.get(config.trace_dir)
+    if sampler is None:
+        sampler = TraceSampler(config.trace_dir, sample_rate=config.trace_sample_rate,
+                               keep=config.trace_keep, min_seconds=config.trace_min_seconds)
+        _trace_samplers[config.trace_dir] = sampler
+    return sampler
+
+
+_agent_trace_stores: Dict[str, TraceStore] = {}
+
+
+def get_agent_trace_store(config: GoogleSheetConfig) -> Optional[TraceStore]:
+    """Process-wide store of recorded agent action traces (None when disabled)."""
+    if not config.agent_trace_cache_path:
+        return None
+    store = _agent_trace_stores.get(config.agent_trace_cache_path)
+    if store is None:
+        store = TraceStore(config.agent_trace_cache_path)
+        _agent_trace_stores[config.agent_trace_cache_path] = store
+    return store
+
+
+def get_agent_fallback(config: GoogleSheetConfig) -> Optional["AgentFallback"]:
+    """Browser-agent fallback for runs the direct path can't read (None when disabled)."""
+    if not config.agent_fallback:
+        return None
+    # Imported lazily: agent_builder loads browser-use and the LLM client
+    from agent_builder import AGENT_MODES, BROWSER_USE_AVAILABLE, LLM_AVAILABLE, AgentFallback
+    if config.agent_mode not in AGENT_MODES:
+        raise ValueError(f"Unknown AGENT_MODE: {config.agent_mode} (expected {' or '.join(AGENT_MODES)})")
+    if config.agent_mode == "browser_use" and not BROWSER_USE_AVAILABLE:
+        logger.warning("⚠️ AGENT_FALLBACK is set but browser-use is not installed; fallback disabled")
+        return None
+    if not LLM_AVAILABLE and not config.agent_stub_responses:
+        logger.warning("⚠️ AGENT_FALLBACK is set but langchain-google-genai is not installed; fallback disabled")
+        return None
+    return AgentFallback.from_config(config, trace_store=get_agent_trace_store(config))
+
+
+# Phase timings of every run in this process, in Prometheus text format
+metrics_registry = MetricsRegistry()
+_metrics_exporters: Dict[str, JsonlExporter] = {}
+
+
+def record_run_metrics(config: GoogleSheetConfig, result: Dict[str, Any], sheet_url: str, wall_seconds: float):
+    """Add the caller-side wall time to the result's metrics and export them."""
+    if not isinstance(result, dict):
+        return
+    metrics = result.setdefault("metrics", {"spans": []})
+    metrics["wall_seconds"] = round(wall_seconds, 4)
+    metrics_registry.record(metrics, status=result.get("status", "unknown"), path=result.get("path"))
+    
+    if config.metrics_jsonl_path:
+        exporter = _metrics_exporters.get(config.metrics_jsonl_path)
+        if exporter is None:
+            exporter = _metrics_exporters[config.metrics_jsonl_path] = JsonlExporter(config.metrics_jsonl_path)
+        exporter.export({
+            "sheet_url": sheet_url,
+            "status": result.get("status"),
+            "source": result.get("source"),
+            "path": result.get("path"),
+            "fallback_reason": result.get("fallback_reason"),
+            "cache": result.get("cache"),
+            **metrics,
+        })
+    if config.metrics_prometheus_path:
+        # Textfile-collector style: replace the file atomically
+        path = os.path.expanduser(config.metrics_prometheus_path)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(metrics_registry.render_prometheus())
+        os.replace(tmp, path)
+
+
+def _result_cache_options(config: GoogleSheetConfig, session_cache: Optional[SessionCache]) -> Dict[str, Any]:
+    result_cache = get_result_cache(config)
+    if result_cache is None:
+        return {}
+    return {
+        "result_cache": result_cache,
+        "revision_probe": session_revision_probe(session_cache, config.email),
+    }
+
+
+async def _run_visible_automation(progress_callback: Optional[ProgressCallback] = None,
+                                  sheet_url: Optional[str] = None) -> Any:
     """
     Run real browser automation with visible Chrome window.
     Shows all steps: navigation, login, scanning, calculating.
+    ``sheet_url`` defaults to GOOGLE_SHEET_URL.
     """
     logger.info("🚀 Starting Visible Browser Automation...")
     
     try:
         config = get_config()
+        sheet_url = sheet_url or config.base_url
         logger.info(f"📝 Configuration loaded")
-        logger.info(f"   Sheet URL: {config.base_url}")
+        logger.info(f"   Sheet URL: {sheet_url}")
         logger.info(f"   Email: {config.email if hasattr(config, 'email') else 'Not set'}")
         
+        pool, session_cache = _pool_and_session_cache(config)
+        started = time.perf_counter()
+        
         # Run visible browser automation
         result = await run_google_sheet_automation(
-            sheet_url=config.base_url,
+            sheet_url=sheet_url,
             email=config.email,
             password=config.password,
-            headless=config.headless
+            headless=config.headless,
+            pool=pool,
+            session_cache=session_cache,
+            progress_callback=progress_callback,
+            **_result_cache_options(config, session_cache),
+            **automation_options(config),
         )
         
-        logger.info(f"✅ Automation complete: {result}")
+        try:
+            record_run_metrics(config, result, sheet_url, time.perf_counter() - started)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not export run metrics: {e}")
+        logger.info(f"✅ Automation complete: {without_buffers(result)}")
         return result
     
     except Exception as e:
@@ -47,19 +256,72 @@ async def _run_visible_automation() -> Any:
         raise
 
 
-def run_agent_sync() -> Any:
+_hooked_runtimes: "weakref.WeakSet[AsyncRuntime]" = weakref.WeakSet()
+
+
+def get_automation_runtime() -> AsyncRuntime:
+    """
+    The process-wide runtime that runs every automation.
+    Browser pools live on its loop, so the Playwright driver and warm browsers
+    are reused across calls and closed once when the process exits.
+    """
+    runtime = get_runtime()
+    if runtime not in _hooked_runtimes:
+        runtime.on_shutdown(close_browser_pools)
+        _hooked_runtimes.add(runtime)
+    return runtime
+
+
+def run_agent_sync(progress_callback: Optional[ProgressCallback] = None, sheet_url: Optional[str] = None) -> Any:
     """
     Synchronous wrapper for Streamlit.
-    Runs the async browser automation.
+    Runs the async browser automation on the shared runtime loop; safe to
+    call from any thread, including several at once.
     """
-    try:
-        return asyncio.run(_run_visible_automation())
-    except RuntimeError as e:
-        # Handle case where event loop already exists
-        logger.warning(f"Event loop issue: {e}, creating new loop...")
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(_run_visible_automation())
-        finally:
-            loop.close()
+    return get_automation_runtime().run(_run_visible_automation(progress_callback, sheet_url))
+
+
+def warm_up_sync():
+    """Start the Playwright driver and launch the pool's browsers before the first run."""
+    async def warm_up():
+        pool, _ = _pool_and_session_cache(get_config())
+        await pool.start()
+        browsers = [await pool.checkout() for _ in range(pool.size)]
+        for pooled in browsers:
+            await pool.checkin(pooled)
+    
+    get_automation_runtime().run(warm_up())
+
+
+async def _run_batch_automation(sheet_urls: List[str], output: TextIO,
+                                concurrency: Optional[int] = None,
+                                per_sheet_timeout: Optional[float] = None) -> Dict[str, Any]:
+    """Run the batch runner over ``sheet_urls`` with the configured pool and session cache."""
+    config = get_config()
+    pool, session_cache = _pool_and_session_cache(config)
+    options = automation_options(config)
+    return await run_batch(
+        sheet_urls,
+        email=config.email,
+        password=config.password,
+        output=output,
+        concurrency=concurrency or config.batch_concurrency,
+        per_sheet_timeout=per_sheet_timeout or config.sheet_timeout,
+        headless=config.headless,
+        pool=pool,
+        session_cache=session_cache,
+        **_result_cache_options(config, session_cache),
+        **options,
+    )
+
+
+def run_batch_sync(sheet_urls: List[str], output: TextIO,
+                   concurrency: Optional[int] = None,
+                   per_sheet_timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Synchronous wrapper for the batch runner.
+    Results are streamed to ``output`` as JSON lines; the summary is returned.
+    """
+    return get_automation_runtime().run(
+        _run_batch_automation(sheet_urls, output, concurrency, per_sheet_timeout)
+    )
@@ -0,0 +1,148 @@
+"""
+Process-wide async runtime.
+Keeps one event loop running on a background thread so async resources
+(Playwright driver, warm browsers, HTTP/LLM clients) survive between calls
+from synchronous code (Streamlit, CLI) and are closed once at exit.
+"""
+
+import asyncio
+import atexit
+import concurrent.futures
+import logging
+import threading
+from typing import Awaitable, Callable, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Async callables run on the loop at shutdown, newest first
+ShutdownHook = Callable[[], Awaitable[None]]
+
+
+class AsyncRuntime:
+    """
+    A dedicated event loop on a daemon thread.
+
+    ``submit``/``run`` are thread-safe; coroutines from different callers run
+    concurrently on the same loop, so loop-bound resources are shared.
+    """
+
+    def __init__(self, name: str = "async-runtime"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._shutdown_hooks: List[ShutdownHook] = []
+        self._closed = False
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        self.start()
+        return self._loop
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the loop thread (no-op when already running)."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Runtime is shut down")
+            if self.running:
+                return
+            ready = threading.Event()
+            self._loop = asyncio.new_event_loop()
+
+            def run_loop():
+                asyncio.set_event_loop(self._loop)
+                self._loop.call_soon(ready.set)
+                self._loop.run_forever()
+
+            self._thread = threading.Thread(target=run_loop, name=self.name, daemon=True)
+            self._thread.start()
+            ready.wait()
+            logger.info(f"🔁 Started {self.name} event loop")
+
+    def submit(self, coro: Awaitable[T]) -> "concurrent.futures.Future[T]":
+        """Schedule ``coro`` on the runtime loop; returns a thread-safe future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """Run ``coro`` on the runtime loop and block until it finishes."""
+        if self.running and threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("AsyncRuntime.run() called from the runtime loop; await instead")
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def on_shutdown(self, hook: ShutdownHook):
+        """Register an async cleanup to run on the loop before it stops."""
+        self._shutdown_hooks.append(hook)
+
+    async def _run_shutdown_hooks(self):
+        while self._shutdown_hooks:
+            hook = self._shutdown_hooks.pop()
+            try:
+                await hook()
+            except Exception as e:
+                logger.warning(f"⚠️ Runtime shutdown hook failed: {e}")
+
+    def shutdown(self, timeout: float = 30.0):
+        """Run shutdown hooks, cancel leftover tasks and stop the loop thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if not self.running:
+                return
+        loop = self._loop
+        try:
+            asyncio.run_coroutine_threadsafe(self._run_shutdown_hooks(), loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"⚠️ Runtime shutdown incomplete: {e}")
+
+        async def cancel_pending():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(cancel_pending(), loop).result(timeout)
+        except Exception:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            loop.close()
+        logger.info(f"✅ Stopped {self.name} event loop")
+
+
+_runtime: Optional[AsyncRuntime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime() -> AsyncRuntime:
+    """The process-wide runtime, started on first use and shut down at exit."""
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None or _runtime._closed:
+            _runtime = AsyncRuntime("automation-runtime")
+            atexit.register(_runtime.shutdown)
+        runtime = _runtime
+    runtime.start()
+    return runtime
+
+
+def shutdown_runtime(timeout: float = 30.0):
+    """Shut the process-wide runtime down now instead of at exit."""
+    with _runtime_lock:
+        runtime = _runtime
+    if runtime is not None:
+        runtime.shutdown(timeout)
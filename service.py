@@ -0,0 +1,354 @@
+"""
+Resident automation service.
+Serves a small local HTTP/JSON API over the sheet automation. Jobs go into a
+persistent priority queue and a fixed number of worker slots run them on the
+shared runtime, so warm browsers and logged-in sessions are reused across
+requests instead of being rebuilt per process. A full queue answers 429.
+
+    python service.py [--host 127.0.0.1] [--port 8770] [--workers N] [--no-warm]
+
+The automation signs in to whatever sheet it is given and results hold sheet
+contents, so every route but /health needs the shared token
+(``Authorization: Bearer <token>``), submissions need a JSON body, and sheets
+outside https://docs.google.com are refused unless SERVICE_ALLOWED_ORIGINS
+lists their origin. Requests whose Host header names another host (DNS
+rebinding) are refused unless SERVICE_ALLOWED_HOSTS lists it.
+
+API:
+    POST /jobs                  {"sheet_url": ..., "priority": 0, "label": ""} -> 202 job
+    GET  /jobs?status=&limit=   recent jobs, newest first
+    GET  /jobs/<id>             status and progress
+    GET  /jobs/<id>/result      result of a finished job (409 until then)
+    GET  /health                queue counts and worker slots
+    GET  /metrics               Prometheus text of run and queue metrics
+"""
+
+import argparse
+import hmac
+import json
+import logging
+import math
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+from urllib.parse import parse_qs, urlparse, urlsplit
+
+from config import get_config
+from job_queue import JobQueue, QueuedJob, QueueFull
+from jobs import DONE, FAILED, QUEUED, RUNNING, Job
+from runtime import shutdown_runtime
+from service_client import load_service_token
+from sheet_export import parse_sheet_url
+
+logger = logging.getLogger(__name__)
+
+# Called with sheet_url= and progress_callback=; returns the automation result
+Runner = Callable[..., Any]
+
+MAX_BODY_BYTES = 64 * 1024
+
+GOOGLE_SHEETS_ORIGIN = "https://docs.google.com"
+
+LOOPBACK_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+
+def _run_sheet(sheet_url: str, progress_callback: Callable) -> Any:
+    # Imported lazily so the queue and HTTP layer load without Playwright
+    from run import run_agent_sync
+    return run_agent_sync(progress_callback, sheet_url=sheet_url)
+
+
+class AutomationService:
+    """
+    HTTP front end, persistent queue and ``workers`` worker threads.
+
+    Workers all submit to the process-wide runtime, so at most ``workers``
+    automations share the warm browser pool at a time. Requests other than
+    the health check must carry ``token`` and name the bind address, a
+    loopback name or one of ``allowed_hosts`` in their Host header; sheets may
+    only come from Google Sheets or ``allowed_origins``.
+    """
+
+    def __init__(self, queue: JobQueue, token: str, workers: int = 1, runner: Optional[Runner] = None,
+                 host: str = "127.0.0.1", port: int = 8770, allowed_origins: Iterable[str] = (),
+                 allowed_hosts: Iterable[str] = ()):
+        if not token:
+            raise ValueError("The automation service needs a shared token")
+        self.queue = queue
+        self.token = token
+        self.workers = max(1, workers)
+        self.runner = runner or _run_sheet
+        self.allowed_origins = {GOOGLE_SHEETS_ORIGIN, *(o.rstrip("/").lower() for o in allowed_origins)}
+        self.allowed_hosts = {*LOOPBACK_HOSTS, host.lower(), *(h.lower() for h in allowed_hosts)}
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+        self._wakeup = threading.Condition()
+        # Progress of running jobs; finished jobs are read from the queue
+        self._live: Dict[str, Job] = {}
+        self._live_lock = threading.Lock()
+        # Appended by workers, read by HTTP threads answering 429
+        self._durations: Deque[float] = deque(maxlen=50)
+        self._durations_lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "AutomationService":
+        self.queue.recover()
+        for slot in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"service-worker-{slot}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._httpd.serve_forever, name="service-http", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        logger.info(f"🛎️ Automation service on {self.url} ({self.workers} worker slot(s))")
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        """Stop accepting requests; running jobs are requeued on the next start."""
+        self._stopping.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        for thread in self._threads:
+            thread.join(timeout)
+        logger.info("✅ Automation service stopped")
+
+    def submit(self, sheet_url: str, priority: int = 0, label: str = "") -> Dict[str, Any]:
+        """Queue a job (raises QueueFull or ValueError) and wake a free worker."""
+        origin = parse_sheet_url(sheet_url).origin.lower()
+        if origin not in self.allowed_origins:
+            raise ValueError(f"sheets from {origin} are not allowed (see SERVICE_ALLOWED_ORIGINS)")
+        job = self.queue.enqueue(sheet_url, label=label, priority=priority)
+        with self._wakeup:
+            self._wakeup.notify()
+        return self.snapshot(job)
+
+    def retry_after(self) -> int:
+        """Seconds until a queue slot is likely free, from recent run durations."""
+        with self._durations_lock:
+            durations = list(self._durations)
+        if not durations:
+            return 30
+        average = sum(durations) / len(durations)
+        return max(1, math.ceil(average / self.workers))
+
+    def snapshot(self, job: QueuedJob) -> Dict[str, Any]:
+        """Job status merged with live progress, in the shape of jobs.Job.snapshot()."""
+        with self._live_lock:
+            live = self._live.get(job.id)
+        if live is not None:
+            data = live.snapshot()
+        else:
+            end = job.finished_at or time.time()
+            data = {
+                "progress": 1.0 if job.done else 0.0,
+                "message": {QUEUED: "Waiting for a free worker", DONE: "Finished"}.get(job.status, job.error or ""),
+                "phase": job.status,
+                "rows": None,
+                "total_rows": None,
+                "elapsed": round(end - (job.started_at or end), 3),
+                "events": [],
+            }
+        data.update(job.to_dict())
+        data["queue_position"] = self.queue.position(job)
+        return data
+
+    def _worker(self):
+        while not self._stopping.is_set():
+            job = self.queue.claim()
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(timeout=1.0)
+                continue
+            self._run(job)
+
+    def _run(self, job: QueuedJob):
+        live = Job(id=job.id, label=job.label, status=RUNNING, started_at=job.started_at)
+        with self._live_lock:
+            self._live[job.id] = live
+        logger.info(f"▶️ Running job {job.id}: {job.label}")
+        try:
+            result = self.runner(sheet_url=job.sheet_url, progress_callback=live.record)
+            self.queue.finish(job.id, result)
+        except Exception as e:
+            logger.error(f"❌ Job {job.id} failed: {e}", exc_info=True)
+            self.queue.fail(job.id, str(e))
+        finally:
+            with self._durations_lock:
+                self._durations.append(time.time() - job.started_at)
+            with self._live_lock:
+                self._live.pop(job.id, None)
+
+    def health(self) -> Dict[str, Any]:
+        return {"status": "ok", "workers": self.workers, "max_queued": self.queue.max_queued,
+                "jobs": self.queue.counts()}
+
+    def render_metrics(self) -> str:
+        from run import metrics_registry
+        lines = ["# HELP sheet_agent_service_jobs Jobs in the service queue by status",
+                 "# TYPE sheet_agent_service_jobs gauge"]
+        for status, count in sorted(self.queue.counts().items()):
+            lines.append(f'sheet_agent_service_jobs{{status="{status}"}} {count}')
+        return metrics_registry.render_prometheus() + "\n".join(lines) + "\n"
+
+    def _handler_class(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                logger.debug(f"{self.address_string()} {format % args}")
+
+            def _send_json(self, status: int, payload: Any, headers: Optional[List[tuple]] = None):
+                body = json.dumps(payload, default=str).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers or []:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _error(self, status: int, message: str, headers: Optional[List[tuple]] = None):
+                self._send_json(status, {"error": message}, headers)
+
+            def _allowed(self, require_token: bool = True) -> bool:
+                """Check the Host header and (unless not required) the token; answers the error itself."""
+                try:
+                    host = urlsplit(f"//{self.headers.get('Host') or ''}").hostname
+                except ValueError:
+                    host = None
+                if host not in service.allowed_hosts:
+                    # A page served from a rebound DNS name would send its own name here
+                    self._error(403, "unexpected Host header")
+                    return False
+                scheme, _, token = (self.headers.get("Authorization") or "").partition(" ")
+                if require_token and not (scheme.lower() == "bearer" and
+                                          hmac.compare_digest(token.strip(), service.token)):
+                    self._error(401, "missing or invalid service token", [("WWW-Authenticate", "Bearer")])
+                    return False
+                return True
+
+            def do_POST(self):
+                if not self._allowed():
+                    return
+                if urlparse(self.path).path.rstrip("/") != "/jobs":
+                    self._error(404, "not found")
+                    return
+                # A JSON content type can't be sent cross-site without a CORS preflight, which is never granted
+                content_type = (self.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+                if content_type != "application/json":
+                    self._error(415, "Content-Type must be application/json")
+                    return
+                length = int(self.headers.get("Content-Length") or 0)
+                if length > MAX_BODY_BYTES:
+                    self._error(413, "request body too large")
+                    return
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                    sheet_url = str(body["sheet_url"])
+                    job = service.submit(sheet_url, priority=int(body.get("priority", 0)),
+                                         label=str(body.get("label", "")))
+                except QueueFull as e:
+                    self._error(429, str(e), [("Retry-After", str(service.retry_after()))])
+                    return
+                except (KeyError, TypeError, ValueError) as e:
+                    self._error(400, f"invalid job: {e}")
+                    return
+                self._send_json(202, job, [("Location", f"/jobs/{job['id']}")])
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                parts = [part for part in parsed.path.split("/") if part]
+                query = parse_qs(parsed.query)
+                if not self._allowed(require_token=parts != ["health"]):
+                    return
+
+                if parts == ["health"]:
+                    self._send_json(200, service.health())
+                elif parts == ["metrics"]:
+                    body = service.render_metrics().encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                elif parts == ["jobs"]:
+                    status = query.get("status", [None])[0]
+                    try:
+                        limit = int(query.get("limit", ["50"])[0])
+                    except ValueError:
+                        self._error(400, "limit must be an integer")
+                        return
+                    if limit < 1:
+                        self._error(400, "limit must be positive")
+                        return
+                    limit = min(limit, 500)
+                    jobs = service.queue.list(status=status, limit=limit)
+                    self._send_json(200, {"jobs": [service.snapshot(job) for job in jobs]})
+                elif len(parts) in (2, 3) and parts[0] == "jobs":
+                    job = service.queue.get(parts[1])
+                    if job is None:
+                        self._error(404, "unknown job")
+                    elif len(parts) == 2:
+                        self._send_json(200, service.snapshot(job))
+                    elif parts[2] != "result":
+                        self._error(404, "not found")
+                    elif not job.done:
+                        self._error(409, f"job is {job.status}")
+                    elif job.status == FAILED:
+                        self._send_json(200, {"id": job.id, "status": job.status, "error": job.error})
+                    else:
+                        self._send_json(200, {"id": job.id, "status": job.status, "result": job.result})
+                else:
+                    self._error(404, "not found")
+
+        return Handler
+
+
+def main():
+    config = get_config()
+    parser = argparse.ArgumentParser(description="Resident Google Sheet automation service")
+    parser.add_argument("--host", default=config.service_host)
+    parser.add_argument("--port", type=int, default=config.service_port)
+    parser.add_argument("--workers", type=int, default=config.service_workers, help="Concurrent automations")
+    parser.add_argument("--queue", default=config.service_queue_path, help="SQLite job queue path")
+    parser.add_argument("--no-warm", action="store_true", help="Launch browsers on the first job instead")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    token = load_service_token(config.service_token, config.service_token_path, create=True)
+    if token is None:
+        parser.error("set SERVICE_TOKEN or SERVICE_TOKEN_PATH")
+
+    if not args.no_warm:
+        from run import warm_up_sync
+        warm_up_sync()
+
+    queue = JobQueue(args.queue, max_queued=config.service_max_queued)
+    service = AutomationService(queue, token, workers=args.workers, host=args.host, port=args.port,
+                                allowed_origins=config.service_allowed_origins,
+                                allowed_hosts=config.service_allowed_hosts).start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+        # Close warm browsers now rather than from the interpreter's atexit hooks
+        shutdown_runtime()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Thin client for the resident automation service (service.py).
+Standard library only, so the Streamlit app and CLI can hand runs to a
+running service without starting Playwright themselves.
+"""
+
+import json
+import logging
+import os
+import secrets
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO
+
+from config import GoogleSheetConfig
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceError(Exception):
+    """The service answered with an error status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+class ServiceBusy(ServiceError):
+    """The service queue is full; retry after ``retry_after`` seconds."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(429, message)
+        self.retry_after = retry_after
+
+
+def load_service_token(token: Optional[str], path: Optional[str], create: bool = False) -> Optional[str]:
+    """
+    Shared secret clients send with job submissions: ``token`` when set, else
+    the one stored at ``path``. With ``create`` a missing file is written with
+    a fresh random token, readable by the current user only.
+    """
+    if token:
+        return token
+    if not path:
+        return None
+    token_file = Path(path).expanduser()
+    if token_file.exists():
+        return token_file.read_text(encoding="utf-8").strip() or None
+    if not create:
+        return None
+    token_file.parent.mkdir(parents=True, exist_ok=True)
+    token = secrets.token_urlsafe(32)
+    fd = os.open(token_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token)
+    logger.info(f"🔑 Wrote a new service token to {token_file}")
+    return token
+
+
+class RemoteJob:
+    """
+    Service job with the polling interface of jobs.Job (``status``, ``done``,
+    ``snapshot()``, ``result``); the result is fetched once, when finished.
+    """
+
+    def __init__(self, client: "ServiceClient", snapshot: Dict[str, Any]):
+        self.client = client
+        self.id = snapshot["id"]
+        self._snapshot = snapshot
+        self._result: Any = None
+        self._result_loaded = False
+
+    @property
+    def status(self) -> str:
+        return self._snapshot["status"]
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "failed")
+
+    @property
+    def error(self) -> Optional[str]:
+        return self._snapshot.get("error")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Latest status from the service (cached once the job has finished)."""
+        if not self.done:
+            self._snapshot = self.client.status(self.id)
+        return self._snapshot
+
+    @property
+    def result(self) -> Any:
+        self.snapshot()
+        if self.status == "done" and not self._result_loaded:
+            self._result = self.client.result(self.id).get("result")
+            self._result_loaded = True
+        return self._result
+
+
+class ServiceClient:
+    def __init__(self, base_url: str, timeout: float = 10.0, token: Optional[str] = None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.token = token
+
+    @classmethod
+    def from_config(cls, config: GoogleSheetConfig, base_url: Optional[str] = None) -> "ServiceClient":
+        """Client for ``base_url`` (default SERVICE_URL) using the configured token."""
+        return cls(base_url or config.service_url,
+                   token=load_service_token(config.service_token, config.service_token_path))
+
+    def _request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Any:
+        data = json.dumps(payload).encode() if payload is not None else None
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        request = urllib.request.Request(f"{self.base_url}{path}", data=data, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read() or b"null")
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get("error", e.reason)
+            except ValueError:
+                message = e.reason
+            if e.code == 429:
+                raise ServiceBusy(message, float(e.headers.get("Retry-After") or 30)) from None
+            raise ServiceError(e.code, message) from None
+
+    def healthy(self) -> bool:
+        try:
+            return self._request("GET", "/health").get("status") == "ok"
+        except (OSError, ServiceError):
+            return False
+
+    def submit(self, sheet_url: str, priority: int = 0, label: str = "") -> RemoteJob:
+        snapshot = self._request("POST", "/jobs", {"sheet_url": sheet_url, "priority": priority, "label": label})
+        return RemoteJob(self, snapshot)
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        return self._request("GET", f"/jobs/{job_id}")
+
+    def get(self, job_id: str) -> Optional[RemoteJob]:
+        try:
+            return RemoteJob(self, self.status(job_id))
+        except ServiceError as e:
+            if e.status == 404:
+                return None
+            raise
+
+    def result(self, job_id: str) -> Dict[str, Any]:
+        return self._request("GET", f"/jobs/{job_id}/result")
+
+    def jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        query = f"?limit={limit}" + (f"&status={status}" if status else "")
+        return self._request("GET", f"/jobs{query}")["jobs"]
+
+    def run(self, sheet_url: str, priority: int = 0, label: str = "", poll_interval: float = 1.0,
+            timeout: Optional[float] = None) -> Any:
+        """Submit a job and wait for its result (retries while the queue is full)."""
+        deadline = time.monotonic() + timeout if timeout else None
+        while True:
+            try:
+                job = self.submit(sheet_url, priority=priority, label=label)
+                break
+            except ServiceBusy as e:
+                if deadline and time.monotonic() + e.retry_after > deadline:
+                    raise
+                logger.info(f"⏳ Service busy, retrying in {e.retry_after:.0f}s")
+                time.sleep(e.retry_after)
+        logger.info(f"📨 Submitted job {job.id} to {self.base_url}")
+        while not job.done:
+            if deadline and time.monotonic() > deadline:
+                raise TimeoutError(f"Job {job.id} did not finish in {timeout:.0f}s")
+            time.sleep(poll_interval)
+            job.snapshot()
+        if job.status == "failed":
+            raise RuntimeError(job.error or f"Job {job.id} failed")
+        return job.result
+
+    def run_batch(self, sheet_urls: List[str], output: TextIO, timeout: Optional[float] = None,
+                  poll_interval: float = 1.0) -> Dict[str, Any]:
+        """
+        Queue every sheet, then write one JSON line per finished sheet to
+        ``output`` (same records as batch_runner.run_batch) and return a summary.
+        """
+        start = time.perf_counter()
+        jobs: Dict[str, Any] = {}
+        for index, url in enumerate(sheet_urls):
+            while True:
+                try:
+                    jobs[self.submit(url, label=f"batch #{index}").id] = (index, url)
+                    break
+                except ServiceBusy as e:
+                    time.sleep(e.retry_after)
+        logger.info(f"📚 Queued {len(jobs)} sheets on {self.base_url}")
+
+        counts = {"success": 0, "error": 0}
+        deadline = time.monotonic() + timeout if timeout else None
+        while jobs:
+            time.sleep(poll_interval)
+            for job_id in list(jobs):
+                snapshot = self.status(job_id)
+                timed_out = deadline is not None and time.monotonic() > deadline
+                if snapshot["status"] not in ("done", "failed") and not timed_out:
+                    continue
+                index, url = jobs.pop(job_id)
+                if snapshot["status"] == "done":
+                    result = self.result(job_id).get("result") or {}
+                elif timed_out:
+                    result = {"status": "error", "total_expense": 0, "message": f"Timed out (job {job_id})"}
+                else:
+                    result = {"status": "error", "total_expense": 0, "message": snapshot.get("error")}
+                record = {"index": index, "sheet_url": url, "elapsed": snapshot.get("elapsed"), **result}
+                counts["success" if record.get("status") == "success" else "error"] += 1
+                output.write(json.dumps(record, default=str) + "\n")
+                output.flush()
+
+        return {
+            "sheets": len(sheet_urls),
+            "succeeded": counts["success"],
+            "failed": counts["error"],
+            "elapsed": round(time.perf_counter() - start, 3),
+        }
@@ -0,0 +1,133 @@
+"""
+Encrypted on-disk cache of authenticated Playwright sessions.
+Stores the browser storage_state (cookies + localStorage) per account email
+so repeat runs can skip the Google login form.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# cryptography is required to persist sessions; without it the cache is disabled
+# rather than writing cookies to disk in plain text.
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+    CRYPTOGRAPHY_AVAILABLE = True
+except ImportError:
+    Fernet = None
+    InvalidToken = Exception
+    CRYPTOGRAPHY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Google cookies that carry the signed-in session
+AUTH_COOKIE_NAMES = {
+    "SID", "HSID", "SSID", "APISID", "SAPISID", "OSID",
+    "__Secure-1PSID", "__Secure-3PSID",
+}
+
+
+def session_expiry(storage_state: Dict[str, Any]) -> Optional[float]:
+    """
+    Return the earliest expiry (epoch seconds) of the auth cookies in a
+    storage_state, or None when no persistent auth cookie is present.
+    """
+    expiries = [
+        cookie["expires"]
+        for cookie in storage_state.get("cookies", [])
+        if cookie.get("name") in AUTH_COOKIE_NAMES and cookie.get("expires", -1) > 0
+    ]
+    return min(expiries) if expiries else None
+
+
+class SessionCache:
+    """Encrypted storage_state cache keyed by account email."""
+
+    def __init__(self, cache_dir: str, ttl_hours: float = 168, key: Optional[bytes] = None):
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.ttl_seconds = int(ttl_hours * 3600)
+        self._fernet = None
+
+        if not CRYPTOGRAPHY_AVAILABLE:
+            logger.warning("⚠️ cryptography not installed, session cache disabled")
+            return
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._fernet = Fernet(key or self._load_or_create_key())
+
+    @property
+    def enabled(self) -> bool:
+        return self._fernet is not None
+
+    def _load_or_create_key(self) -> bytes:
+        env_key = os.getenv("SESSION_CACHE_KEY")
+        if env_key:
+            return env_key.encode()
+
+        key_path = self.cache_dir / ".key"
+        if key_path.exists():
+            return key_path.read_bytes().strip()
+
+        key = Fernet.generate_key()
+        fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+        return key
+
+    def _path(self, email: str) -> Path:
+        digest = hashlib.sha256(email.strip().lower().encode()).hexdigest()
+        return self.cache_dir / f"{digest}.session"
+
+    def load(self, email: str) -> Optional[Dict[str, Any]]:
+        """Return the cached storage_state for ``email`` if present and unexpired."""
+        if not self.enabled or not email:
+            return None
+
+        path = self._path(email)
+        if not path.exists():
+            return None
+
+        try:
+            # Fernet tokens carry their creation time, so the TTL is enforced on decrypt
+            payload = json.loads(self._fernet.decrypt(path.read_bytes(), ttl=self.ttl_seconds))
+        except (InvalidToken, ValueError) as e:
+            logger.info(f"🗑️ Discarding unreadable or expired session cache: {e.__class__.__name__}")
+            self.invalidate(email)
+            return None
+
+        state = payload.get("storage_state")
+        expires_at = session_expiry(state or {})
+        if not state or (expires_at is not None and expires_at <= time.time()):
+            logger.info("🗑️ Cached session cookies have expired")
+            self.invalidate(email)
+            return None
+
+        logger.info("🔓 Loaded cached session")
+        return state
+
+    def save(self, email: str, storage_state: Dict[str, Any]):
+        """Encrypt and store ``storage_state`` for ``email``."""
+        if not self.enabled or not email:
+            return
+
+        payload = json.dumps({"saved_at": time.time(), "storage_state": storage_state}).encode()
+        path = self._path(email)
+        tmp_path = path.with_suffix(".tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(self._fernet.encrypt(payload))
+        os.replace(tmp_path, path)
+        logger.info("🔒 Session saved to cache")
+
+    def invalidate(self, email: str):
+        """Forget the cached session for ``email``."""
+        if not email:
+            return
+        try:
+            self._path(email).unlink()
+        except FileNotFoundError:
+            pass
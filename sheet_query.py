@@ -0,0 +1,133 @@
+"""
+Aggregation pushdown through the Google Visualization query endpoint.
+Sends queries like ``select sum(C), count(C)`` and reads back only the
+aggregated values instead of every cell.
+"""
+
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence
+from urllib.parse import quote
+
+from playwright.async_api import APIRequestContext, Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+
+from aggregation import HeaderIndex
+from sheet_export import SheetRef
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_AGGREGATIONS = ("sum", "count", "min", "max", "avg")
+
+
+class QueryError(Exception):
+    """The query endpoint rejected the request or returned an error."""
+
+
+class QueryTransport(ABC):
+    """Fetches a query URL and returns the response text. Subclass to plug in a fake."""
+
+    @abstractmethod
+    async def fetch(self, url: str) -> str:
+        """Response body for ``url``; raises QueryError when the endpoint is unusable."""
+
+
+class PlaywrightQueryTransport(QueryTransport):
+    """Sends queries through a browser context so its session cookies apply."""
+
+    def __init__(self, request: APIRequestContext, timeout_ms: int = 30000):
+        self.request = request
+        self.timeout_ms = timeout_ms
+
+    async def fetch(self, url: str) -> str:
+        try:
+            response = await self.request.get(url, timeout=self.timeout_ms)
+            if not response.ok:
+                raise QueryError(f"Query endpoint returned HTTP {response.status}")
+            if "text/html" in response.headers.get("content-type", ""):
+                raise QueryError("Query endpoint redirected to an HTML page (login or access request)")
+            return await response.text()
+        except (PlaywrightError, PlaywrightTimeoutError) as e:
+            raise QueryError(f"Query request failed: {e}") from e
+
+
+def column_letter(index: int) -> str:
+    """Convert a 0-based column index to a sheet column letter (0 -> A, 26 -> AA)."""
+    if index < 0:
+        raise ValueError(f"Invalid column index: {index}")
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+def build_query(column: str, functions: Sequence[str]) -> str:
+    """Build ``select f1(col), f2(col)`` for the given aggregation functions."""
+    unknown = [f for f in functions if f not in SUPPORTED_AGGREGATIONS]
+    if unknown:
+        raise ValueError(f"Unsupported aggregation(s): {', '.join(unknown)}")
+    return "select " + ", ".join(f"{f}({column})" for f in functions)
+
+
+def query_url(ref: SheetRef, tq: str) -> str:
+    return f"{ref.base_url}/gviz/tq?tqx=out:json&headers=1&gid={ref.gid}&tq={quote(tq)}"
+
+
+def parse_response(text: str) -> Dict[str, Any]:
+    """Unwrap ``google.visualization.Query.setResponse({...});`` into a dict."""
+    start = text.find("{")
+    end = text.rfind("}")
+    if start < 0 or end < start:
+        raise QueryError("Unrecognised query response")
+    try:
+        payload = json.loads(text[start:end + 1])
+    except json.JSONDecodeError as e:
+        raise QueryError(f"Malformed query response: {e}")
+
+    if payload.get("status") == "error":
+        errors = payload.get("errors") or [{}]
+        raise QueryError(errors[0].get("detailed_message") or errors[0].get("message") or "Query failed")
+    return payload
+
+
+class SheetQuery:
+    """Runs visualization queries against one tab."""
+
+    def __init__(self, transport: QueryTransport, ref: SheetRef):
+        self.transport = transport
+        self.ref = ref
+        self._columns: Optional[List[Dict[str, Any]]] = None
+
+    async def execute(self, tq: str) -> Dict[str, Any]:
+        logger.info(f"🔎 Query: {tq}")
+        return parse_response(await self.transport.fetch(query_url(self.ref, tq)))
+
+    async def columns(self) -> List[Dict[str, Any]]:
+        """Column ids and header labels, fetched once without any rows."""
+        if self._columns is None:
+            payload = await self.execute("select * limit 0")
+            self._columns = payload.get("table", {}).get("cols", [])
+        return self._columns
+
+    async def resolve_column(self, name: str) -> Optional[Dict[str, str]]:
+        """Find the column for header ``name`` with the same matching rules as the grid paths."""
+        columns = await self.columns()
+        index = HeaderIndex([(col.get("label") or "").strip() for col in columns])
+        position = index.find(name)
+        if position is None:
+            return None
+        return {"letter": columns[position].get("id") or column_letter(position), "label": index.label(position)}
+
+    async def aggregate(self, letter: str, functions: Sequence[str] = ("sum", "count")) -> Dict[str, Any]:
+        """Run the aggregations server-side and return ``{function: value}``."""
+        payload = await self.execute(build_query(letter, functions))
+        rows = payload.get("table", {}).get("rows", [])
+        cells = rows[0].get("c", []) if rows else []
+        values = {}
+        for function, cell in zip(functions, cells):
+            values[function] = cell.get("v") if cell else None
+        for function in functions:
+            values.setdefault(function, None)
+        return values
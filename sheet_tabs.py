@@ -0,0 +1,123 @@
+"""
+Worksheet tab discovery for Google Sheets.
+Finds every tab (gid + name) of the loaded spreadsheet in one round trip.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import List
+
+from playwright.async_api import Page, TimeoutError as PlaywrightTimeoutError
+
+from readiness import GRID_SELECTOR
+
+logger = logging.getLogger(__name__)
+
+TAB_SELECTOR = ".docs-sheet-tab, [data-sheet-gid], [data-gid]"
+
+# Tabs expose their gid through a data attribute or an id like
+# "sheet-button-123"; as a last resort gid links in the page are used.
+_DISCOVER_TABS_JS = """
+(tabSelector) => {
+    const tabs = [];
+    const seen = new Set();
+    const add = (gid, name) => {
+        if (gid === null || gid === undefined || gid === '' || seen.has(String(gid))) return;
+        seen.add(String(gid));
+        tabs.push({gid: String(gid), name: (name || '').trim()});
+    };
+    for (const el of document.querySelectorAll(tabSelector)) {
+        let gid = el.getAttribute('data-sheet-gid') || el.getAttribute('data-gid');
+        if (!gid && el.id) {
+            const m = el.id.match(/sheet-button-(\\d+)/);
+            if (m) gid = m[1];
+        }
+        const nameEl = el.querySelector('.docs-sheet-tab-name');
+        add(gid, (nameEl || el).textContent);
+    }
+    if (!tabs.length) {
+        for (const a of document.querySelectorAll('a[href*="gid="]')) {
+            const m = a.getAttribute('href').match(/[#?&]gid=(\\d+)/);
+            if (m) add(m[1], a.textContent);
+        }
+    }
+    return tabs;
+}
+"""
+
+# Watches the current grid so the switch can tell the new tab's cells from
+# the old ones: the grid is replaced, detached or has its cells re-rendered
+_WATCH_GRID_JS = """
+(gridSelector) => {
+    const grid = document.querySelector(gridSelector);
+    const watch = {grid, changed: false};
+    if (grid) {
+        new MutationObserver((_, observer) => { watch.changed = true; observer.disconnect(); })
+            .observe(grid, {childList: true, subtree: true, characterData: true});
+    }
+    window.__sheetTabSwitch = watch;
+}
+"""
+
+# Switched once the URL shows the new gid and the watched grid has changed
+_TAB_SWITCHED_JS = """
+({gid, gridSelector}) => {
+    if (!new RegExp('[#&?]gid=' + gid + '(&|$)').test(location.href)) return false;
+    const watch = window.__sheetTabSwitch;
+    if (!watch || !watch.grid) return document.querySelector(gridSelector) !== null;
+    return watch.changed || !watch.grid.isConnected || document.querySelector(gridSelector) !== watch.grid;
+}
+"""
+
+# The tab is already showing: its gid is in the URL or its button is the active one
+_TAB_ACTIVE_JS = """
+({gid, activeSelector}) => new RegExp('[#&?]gid=' + gid + '(&|$)').test(location.href)
+    || document.querySelector(activeSelector) !== null
+"""
+
+
+@dataclass(frozen=True)
+class SheetTab:
+    """One worksheet of a spreadsheet."""
+    gid: str
+    name: str = ""
+
+
+async def discover_tabs(page: Page, timeout_ms: int = 10000) -> List[SheetTab]:
+    """Return every worksheet tab of the loaded spreadsheet (may be empty)."""
+    try:
+        await page.wait_for_selector(TAB_SELECTOR, state="attached", timeout=timeout_ms)
+    except PlaywrightTimeoutError:
+        logger.warning("⚠️ No sheet tab bar found")
+
+    raw_tabs = await page.evaluate(_DISCOVER_TABS_JS, TAB_SELECTOR)
+    tabs = [SheetTab(gid=tab["gid"], name=tab["name"]) for tab in raw_tabs]
+    logger.info(f"🗂️ Found {len(tabs)} tabs: {', '.join(t.name or t.gid for t in tabs)}")
+    return tabs
+
+
+async def switch_to_tab(page: Page, tab: SheetTab, timeout_ms: int = 10000):
+    """
+    Activate ``tab`` in the already-loaded workbook (no page reload).
+
+    Returns once the URL shows the tab's gid and the grid has been replaced or
+    re-rendered, so readiness checks that follow see the new tab's cells and
+    not the previous tab's. Raises PlaywrightTimeoutError otherwise.
+    """
+    selector = (f'[data-sheet-gid="{tab.gid}"], [data-gid="{tab.gid}"], '
+                f'#sheet-button-{tab.gid}')
+    active = ", ".join(f"{part.strip()}.docs-sheet-active-tab" for part in selector.split(","))
+    if await page.evaluate(_TAB_ACTIVE_JS, {"gid": tab.gid, "activeSelector": active}):
+        return
+    await page.evaluate(_WATCH_GRID_JS, GRID_SELECTOR)
+    await page.click(selector, timeout=timeout_ms)
+    try:
+        # Sheets reflects the active tab in the URL fragment
+        await page.wait_for_function(
+            _TAB_SWITCHED_JS,
+            arg={"gid": tab.gid, "gridSelector": GRID_SELECTOR},
+            timeout=timeout_ms,
+        )
+    except PlaywrightTimeoutError:
+        logger.warning(f"⚠️ Grid did not switch to tab gid={tab.gid}")
+        raise
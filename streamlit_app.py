@@ -4,11 +4,19 @@ from dotenv import load_dotenv
 import time
 import json
 import pandas as pd
+from typing import Any, Optional
 
+from config import get_config
+from jobs import JobRunner
+from result_values import result_summary, result_values, without_buffers
 from run import run_agent_sync
+from service_client import ServiceBusy, ServiceClient, ServiceError
+from upload_ingest import ColumnStats, UploadCache, content_hash, parse_upload, read_preview
 
 load_dotenv()
 
+VALUES_PAGE_SIZE = 500
+
 st.set_page_config(
     page_title="🤖 Google Sheet Expense Agent", 
     layout="wide",
@@ -175,56 +183,71 @@ st.write("Upload a local file and we will calculate the total from your 'cost' c
 
 uploaded_file = st.file_uploader("Choose a CSV or Excel file", type=["csv", "xlsx", "xls"], accept_multiple_files=False)
 
+@st.cache_resource
+def get_upload_cache() -> UploadCache:
+    """Parsed uploads shared by every session, keyed by content hash."""
+    return UploadCache(max_bytes=int(os.getenv("UPLOAD_CACHE_MB", "256")) * 1024 * 1024)
+
+
 if uploaded_file:
     try:
-        # Read file
-        if uploaded_file.name.lower().endswith(".csv"):
-            df = pd.read_csv(uploaded_file)
+        upload_cache = get_upload_cache()
+        # Hash once per uploaded file, not on every rerun of the script
+        cached_digest = st.session_state.get("upload_digest")
+        if cached_digest and cached_digest[0] == uploaded_file.file_id:
+            digest = cached_digest[1]
         else:
-            df = pd.read_excel(uploaded_file)
+            digest = content_hash(uploaded_file)
+            st.session_state["upload_digest"] = (uploaded_file.file_id, digest)
+        parsed = upload_cache.get(digest)
+
+        if parsed is None:
+            # Preview from the first rows only while the whole file is summarized
+            preview_slot = st.empty()
+            preview_slot.dataframe(read_preview(uploaded_file, uploaded_file.name))
+            read_progress = st.progress(0.0, text="Reading file...")
+            parsed = parse_upload(
+                uploaded_file,
+                uploaded_file.name,
+                chunk_rows=int(os.getenv("UPLOAD_CHUNK_ROWS", "100000")),
+                progress=lambda fraction, rows: read_progress.progress(fraction, text=f"Read {rows:,} rows"),
+                total_bytes=uploaded_file.size,
+                digest=digest,
+            )
+            upload_cache.put(parsed)
+            read_progress.empty()
+            preview_slot.empty()
 
         st.success("File loaded successfully. Preview below.")
-        st.dataframe(df.head())
-
-        # Detect cost column automatically
-        cost_candidates = [c for c in df.columns if str(c).strip().lower() == "cost"]
-        numeric_cols = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
-        default_cost_col = cost_candidates[0] if cost_candidates else (numeric_cols[0] if numeric_cols else None)
+        st.dataframe(parsed.preview)
 
+        # Column summaries were all computed in the same pass, so switching is instant
         cost_col = st.selectbox(
             "Select the cost column",
-            options=df.columns,
-            index=df.columns.get_loc(default_cost_col) if default_cost_col in df.columns else 0,
-        ) if len(df.columns) else None
+            options=parsed.columns,
+            index=parsed.columns.index(parsed.default_column) if parsed.default_column in parsed.columns else 0,
+        ) if parsed.columns else None
 
         if cost_col:
-            # Coerce to numeric and drop NaNs
-            cost_series = pd.to_numeric(df[cost_col], errors="coerce").dropna()
-            values = cost_series.tolist()
+            stats = parsed.stats.get(cost_col, ColumnStats())
 
-            if not values:
+            if not stats.count:
                 st.error("No numeric values found in the selected column.")
             else:
-                total = sum(values)
-                avg = total / len(values)
-                max_val = max(values)
-
                 st.markdown("---")
                 st.subheader("📊 Upload Results")
 
                 m1, m2, m3, m4 = st.columns(4)
                 with m1:
-                    st.metric("Total", f"${total:,.2f}")
+                    st.metric("Total", f"${stats.sum:,.2f}")
                 with m2:
-                    st.metric("Entries", len(values))
+                    st.metric("Entries", f"{stats.count:,}")
                 with m3:
-                    st.metric("Average", f"${avg:,.2f}")
+                    st.metric("Average", f"${stats.mean:,.2f}")
                 with m4:
-                    st.metric("Max", f"${max_val:,.2f}")
+                    st.metric("Max", f"${stats.max:,.2f}")
 
-                st.markdown("---")
-                st.write("**All values found:**")
-                st.dataframe(pd.DataFrame({"cost": values}))
+                st.caption(f"{stats.rows:,} rows read; {stats.rows - stats.count:,} non-numeric or empty cells skipped")
 
     except Exception as e:
         st.error(f"Failed to process file: {e}")
@@ -252,10 +275,164 @@ with col_info:
     2. Navigates to your Sheet URL
     3. Logs in if needed
     4. Scans for 'cost' column
-    5. Results display here
+    5. Live progress shows here while the run continues in the background
+    6. Results display here
     """)
 
+@st.cache_resource
+def get_job_runner() -> JobRunner:
+    """Automation jobs shared by every session; one worker per pooled browser."""
+    return JobRunner(max_workers=int(os.getenv("BROWSER_POOL_SIZE", "1")))
+
+
+@st.cache_resource
+def get_service_client() -> Optional[ServiceClient]:
+    """Automation service client when SERVICE_URL is set; runs then happen in the service."""
+    config = get_config()
+    return ServiceClient.from_config(config) if config.service_url else None
+
+
+def get_job(job_id: str):
+    """Job handle from the service or the in-process runner (same polling interface)."""
+    client = get_service_client()
+    if client is not None:
+        return client.get(job_id)
+    return get_job_runner().get(job_id)
+
+
+def render_values_table(values, page_size: int = VALUES_PAGE_SIZE):
+    """One page of values at a time, so the browser never holds them all."""
+    pages = max(1, -(-len(values) // page_size))
+    page = 1
+    if pages > 1:
+        page = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1, step=1)
+    start = (int(page) - 1) * page_size
+    chunk = values[start:start + page_size]
+    st.dataframe(
+        pd.DataFrame({"entry": range(start + 1, start + len(chunk) + 1), "cost": chunk}),
+        hide_index=True,
+        use_container_width=True,
+        column_config={"cost": st.column_config.NumberColumn(format="$%.2f")},
+    )
+
+
+def render_result(result: Any, debug_container):
+    """Show an automation result: status, total, aggregations, values and raw JSON."""
+    if isinstance(result, dict):
+        # Status
+        status = result.get("status", "unknown")
+        if status == "success":
+            st.success(f"✅ Status: {status.upper()}")
+        else:
+            st.error(f"❌ Status: {status.upper()}")
+
+        # Main metric - Total Expense
+        col_metric, col_details = st.columns([2, 2])
+
+        with col_metric:
+            if "total_expense" in result:
+                total = result['total_expense']
+                st.metric(
+                    "💰 Total Expense",
+                    f"${total:,.2f}" if isinstance(total, (int, float)) else total
+                )
+
+        with col_details:
+            if "message" in result:
+                st.write(f"**Message:** {result['message']}")
+
+            if result.get("cache") == "cached":
+                cached_at = time.strftime("%H:%M:%S", time.localtime(result.get("cached_at", 0)))
+                st.info(f"♻️ Served from cache (computed at {cached_at}, sheet unchanged)")
+
+            if "count" in result:
+                st.write(f"**Entries Found:** {result['count']}")
+            
+            if result.get("path") == "agent":
+                st.info(f"🤖 Read by the browser agent ({result.get('fallback_reason', 'fallback')})")
+            
+            if result.get("network"):
+                network = result["network"]
+                st.caption(
+                    f"🚦 Request filter ({network['profile']}): {network['requests_saved']} of "
+                    f"{network['requests']} requests saved, ~{network['bytes_saved'] / 1024:,.0f} KB"
+                )
+            
+            phases = (result.get("metrics") or {}).get("phases")
+            if phases:
+                st.caption("⏱️ " + " · ".join(f"{name} {seconds:.2f}s" for name, seconds in phases.items()))
+
+        # Extra aggregations (AGGREGATIONS in .env)
+        if result.get("aggregations"):
+            st.markdown("---")
+            st.subheader("🧮 Aggregations")
+            for agg in result["aggregations"]:
+                if "error" in agg:
+                    st.warning(f"{agg['aggregate']}: {agg['error']}")
+                elif "groups" in agg:
+                    st.write(f"**{agg['aggregate']}**")
+                    st.dataframe(pd.DataFrame(
+                        list(agg["groups"].items()), columns=[agg.get("by", "group"), agg["function"]]
+                    ))
+                else:
+                    value = agg["value"]
+                    st.metric(agg["aggregate"], f"{value:,.2f}" if isinstance(value, (int, float)) else "—")
+
+        # Values found: summary, histogram and a paged table
+        summary = result_summary(result)
+        if summary and summary["count"]:
+            st.markdown("---")
+            st.subheader("💾 Cost Values Found")
+            
+            summary_col1, summary_col2, summary_col3, summary_col4 = st.columns(4)
+            with summary_col1:
+                st.metric("📈 Number of Entries", f"{summary['count']:,}")
+            with summary_col2:
+                st.metric("📊 Average Cost", f"${summary['mean']:,.2f}")
+            with summary_col3:
+                st.metric("⬇️ Lowest Cost", f"${summary['min']:,.2f}")
+            with summary_col4:
+                st.metric("⬆️ Highest Cost", f"${summary['max']:,.2f}")
+            
+            histogram = summary.get("histogram") or {}
+            if histogram.get("counts"):
+                edges = histogram["edges"]
+                st.bar_chart(pd.DataFrame(
+                    {"entries": histogram["counts"]},
+                    index=[f"{low:,.0f}–{high:,.0f}" for low, high in zip(edges, edges[1:])],
+                ))
+            
+            values = result_values(result)
+            if values is not None and len(values):
+                render_values_table(values)
+        
+        # Debug info
+        with debug_container:
+            with st.expander("🔧 Debug Info (Raw Result)"):
+                st.json(without_buffers(result))
+    else:
+        st.write(result)
+
+
 if run_button:
+    # Runs in the background; this session only keeps the job handle
+    sheet_url = os.getenv("GOOGLE_SHEET_URL", "")
+    client = get_service_client()
+    try:
+        if client is not None:
+            job = client.submit(sheet_url, label=sheet_url)
+        else:
+            job = get_job_runner().submit(run_agent_sync, label=sheet_url)
+        st.session_state["automation_job"] = job.id
+    except ServiceBusy as e:
+        st.warning(f"⏳ The automation service is busy; try again in about {e.retry_after:.0f}s")
+    except (OSError, ServiceError) as e:
+        st.error(f"❌ Could not reach the automation service: {e}")
+
+job_id = st.session_state.get("automation_job")
+job = get_job(job_id) if job_id else None
+
+if job is not None:
     st.markdown("---")
     
     # Create containers for different sections
@@ -264,112 +441,30 @@ if run_button:
     result_container = st.container()
     debug_container = st.container()
     
-    with progress_container:
-        st.info("⏳ **Browser Automation Started...**")
-        st.markdown("""
-        **Process:**
-        1. Opening Chrome browser (watch for window popup) 🌐
-        2. Navigating to Google Sheet 📍
-        3. Handling login (if needed) 🔐
-        4. Waiting for page to load ⏱️
-        5. Finding 'cost' column 🔍
-        6. Reading all cost values 💰
-        7. Calculating total 🧮
-        """)
-        
-        progress_bar = st.progress(0)
-        status_text = st.empty()
+    snapshot = job.snapshot()
     
-    try:
-        # Update status
-        status_text.write("**Status:** Starting automation...")
-        progress_bar.progress(10)
-        
-        # Run the agent
-        status_text.write("**Status:** Running browser automation (this may take 30-60 seconds)...")
-        progress_bar.progress(50)
-        
-        result = run_agent_sync()
-        
-        # Update progress
-        progress_bar.progress(100)
-        status_text.write("**Status:** ✅ Automation completed successfully!")
-        
-        # Clear progress container and show results
-        progress_container.empty()
-        
-        with status_container:
-            st.success("✅ **Browser Automation Completed Successfully!**")
-        
-        # Display results
-        with result_container:
-            st.markdown("---")
-            st.subheader("📊 Results")
-            
-            if isinstance(result, dict):
-                # Status
-                status = result.get("status", "unknown")
-                if status == "success":
-                    st.success(f"✅ Status: {status.upper()}")
-                else:
-                    st.error(f"❌ Status: {status.upper()}")
-                
-                # Main metric - Total Expense
-                col_metric, col_details = st.columns([2, 2])
-                
-                with col_metric:
-                    if "total_expense" in result:
-                        total = result['total_expense']
-                        st.metric(
-                            "💰 Total Expense",
-                            f"${total:,.2f}" if isinstance(total, (int, float)) else total
-                        )
-                
-                with col_details:
-                    if "message" in result:
-                        st.write(f"**Message:** {result['message']}")
-                    
-                    if "count" in result:
-                        st.write(f"**Entries Found:** {result['count']}")
-                
-                # Show all values found
-                if "values_found" in result and result["values_found"]:
-                    st.markdown("---")
-                    st.subheader("💾 Individual Cost Values Found:")
-                    
-                    values_col1, values_col2, values_col3 = st.columns(3)
-                    
-                    for idx, value in enumerate(result["values_found"]):
-                        with [values_col1, values_col2, values_col3][idx % 3]:
-                            st.metric(f"Entry {idx + 1}", f"${value:.2f}")
-                    
-                    # Summary
-                    st.markdown("---")
-                    summary_col1, summary_col2, summary_col3 = st.columns(3)
-                    with summary_col1:
-                        st.metric("📈 Number of Entries", len(result["values_found"]))
-                    with summary_col2:
-                        if len(result["values_found"]) > 0:
-                            avg = sum(result["values_found"]) / len(result["values_found"])
-                            st.metric("📊 Average Cost", f"${avg:.2f}")
-                    with summary_col3:
-                        if len(result["values_found"]) > 0:
-                            max_val = max(result["values_found"])
-                            st.metric("⬆️ Highest Cost", f"${max_val:.2f}")
-                
-                # Debug info
-                with debug_container:
-                    with st.expander("🔧 Debug Info (Raw Result)"):
-                        st.json(result)
+    if not job.done:
+        with progress_container:
+            if snapshot["status"] == "queued":
+                ahead = snapshot.get("queue_position", 0) if get_service_client() else get_job_runner().queue_position(job)
+                st.info(f"⏳ **Queued** ({ahead} run(s) ahead of yours)...")
             else:
-                st.write(result)
-    
-    except Exception as e:
-        status_container.empty()
+                st.info("⏳ **Browser Automation Running...**")
+            st.progress(snapshot["progress"], text=snapshot["message"])
+            if snapshot["total_rows"]:
+                st.caption(f"Rows read: {snapshot['rows']:,} of ~{snapshot['total_rows']:,}")
+            with st.expander("📜 Progress log"):
+                for event in snapshot["events"]:
+                    st.write(f"`{event['phase']}` {event['message']}")
         
+        # Poll the job; the run itself continues on a worker thread
+        time.sleep(0.5)
+        st.rerun()
+    
+    elif job.status == "failed":
         with status_container:
             st.error(f"❌ **Automation Failed**")
-            st.error(f"Error: {str(e)}")
+            st.error(f"Error: {snapshot['error']}")
         
         with debug_container:
             st.error("**Please check:**")
@@ -380,6 +475,17 @@ if run_button:
             - ✅ Email and password are correct
             - ✅ Check terminal for detailed error logs
             """)
+    
+    else:
+        with status_container:
+            st.success("✅ **Browser Automation Completed Successfully!**")
+            st.caption(f"Finished in {snapshot['elapsed']:.1f}s")
+        
+        # Display results
+        with result_container:
+            st.markdown("---")
+            st.subheader("📊 Results")
+            render_result(job.result, debug_container)
 
 st.markdown("---")
 
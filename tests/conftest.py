@@ -0,0 +1,55 @@
+import asyncio
+import sys
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+# The project is a flat set of modules; make them and the benchmark helpers importable
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "benchmarks")]
+
+from fake_sheets import FakeSheetsServer  # noqa: E402
+
+
+class UrllibResponse:
+    """The parts of a Playwright APIResponse the export and query paths read."""
+
+    def __init__(self, status: int, headers, body: bytes):
+        self.status = status
+        self.ok = 200 <= status < 300
+        self.headers = {name.lower(): value for name, value in headers.items()}
+        self._body = body
+
+    async def body(self) -> bytes:
+        return self._body
+
+    async def text(self) -> str:
+        return self._body.decode("utf-8")
+
+
+class UrllibRequest:
+    """Stand-in for a Playwright APIRequestContext backed by urllib (follows redirects)."""
+
+    async def get(self, url: str, timeout: float = 30000) -> UrllibResponse:
+        return await asyncio.to_thread(self._get, url, timeout / 1000)
+
+    @staticmethod
+    def _get(url: str, timeout: float) -> UrllibResponse:
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                return UrllibResponse(response.status, response.headers, response.read())
+        except urllib.error.HTTPError as e:
+            return UrllibResponse(e.code, e.headers, e.read())
+
+
+@pytest.fixture
+def fake_sheets():
+    with FakeSheetsServer(rows=50, tabs=2, require_login=False) as server:
+        yield server
+
+
+@pytest.fixture
+def http_request():
+    return UrllibRequest()
@@ -1,6 +1,8 @@
 """
-Mock browser-use module for testing Streamlit UI.
-Replace this with real browser-use once available.
+Stand-in for the browser-use package in tests.
+
+Kept under tests/ so it never shadows a real installation: tests register it
+as ``browser_use`` and ``browser_use.browser`` in sys.modules.
 """
 
 class BrowserProfile:
@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from action_trace import ActionTrace, TraceStep, TraceStore, named_key, steps_from_history
+
+
+class Action:
+    def __init__(self, name, **params):
+        self.data = {name: params}
+
+    def model_dump(self, exclude_unset=False):
+        return self.data
+
+
+def _history(*actions, url="https://docs.google.com/spreadsheets/d/abc/edit#gid=0"):
+    items = [SimpleNamespace(model_output=SimpleNamespace(action=list(actions)),
+                             state=SimpleNamespace(interacted_element=[], url=url)),
+             SimpleNamespace(model_output=None, state=SimpleNamespace(url=url))]
+    return SimpleNamespace(history=items)
+
+
+@pytest.mark.parametrize("keys, expected", [
+    ("Enter", "Enter"),
+    ("pagedown", "PageDown"),
+    ("ctrl+Home", "Control+Home"),
+    ("Delete", None),
+    ("a", None),
+    ("hunter2", None),
+    ("Control+a", None),
+])
+def test_named_key(keys, expected):
+    assert named_key(keys) == expected
+
+
+def test_navigation_keys_are_recorded():
+    steps = steps_from_history(_history(Action("send_keys", keys="ctrl+end"), Action("scroll_down", amount=300)))
+    assert [(s.op, s.args) for s in steps] == [("keys", {"keys": "Control+End"}), ("scroll", {"pixels": 300})]
+    assert steps[-1].expect_gid == "0"
+
+
+def test_typed_text_aborts_the_trace():
+    assert steps_from_history(_history(Action("send_keys", keys="secret-password"))) is None
+
+
+def test_trace_store_round_trip():
+    store = TraceStore()
+    trace = ActionTrace("abc", "fp", [TraceStep("keys", {"keys": "PageDown"}), TraceStep("total", {"column": "Cost"})])
+    store.put(trace)
+    loaded = store.get("abc", "fp")
+    assert loaded.steps == trace.steps and loaded.column == "Cost"
+    store.invalidate("abc", "fp")
+    assert store.get("abc", "fp") is None and len(store) == 0
@@ -0,0 +1,168 @@
+import asyncio
+import importlib.util
+import json
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("playwright")
+
+import agent_builder
+from agent_builder import AgentBudget, LowCostAgent, ReplayLLM, TokenUsageCallback, _history_usage
+from config import get_config
+
+SHEET_URL = "https://docs.google.com/spreadsheets/d/abc/edit#gid=0"
+
+
+class FakeMouse:
+    def __init__(self):
+        self.wheels = []
+
+    async def wheel(self, dx, dy):
+        self.wheels.append((dx, dy))
+
+
+class FakePage:
+    url = SHEET_URL
+
+    def __init__(self):
+        self.mouse = FakeMouse()
+
+
+@pytest.fixture(autouse=True)
+def fake_observation(monkeypatch):
+    async def observe_page(page):
+        return {"tabs": ["Sheet1"], "active_gid": "0", "columns": {"Amount (USD)": ["1.00", "2.50"]}}
+
+    monkeypatch.setattr(agent_builder, "observe_page", observe_page)
+
+
+def _reply(action, **args):
+    return json.dumps({"action": action, **args})
+
+
+async def _read_column(label):
+    if label != "Amount (USD)":
+        return {"status": "error", "total_expense": 0, "message": f"No '{label}' column"}
+    return {"status": "success", "total_expense": 3.5, "message": "ok"}
+
+
+def _run(llm, budget):
+    agent = LowCostAgent(llm, budget)
+    return asyncio.run(agent.run(FakePage(), SHEET_URL, "cost", "header_not_found", _read_column))
+
+
+def test_agent_totals_the_column_it_picks():
+    llm = ReplayLLM([_reply("scroll", direction="right"), _reply("total", column="Nope"),
+                     _reply("total", column="Amount (USD)")])
+    outcome = _run(llm, AgentBudget(max_steps=10, max_tokens=100000, max_seconds=10))
+
+    assert outcome["stopped"] is None
+    assert outcome["column"] == "Amount (USD)"
+    assert outcome["result"]["total_expense"] == 3.5
+    assert [(s.op, s.args) for s in outcome["trace_steps"]] == [("scroll", {"pixels": 0, "dx": 800})]
+    usage = outcome["usage"]
+    assert usage["steps"] == llm.calls == 3
+    assert usage["input_tokens"] > 0 and usage["output_tokens"] > 0
+    assert [s["action"] for s in usage["step_usage"]] == ["scroll", "total", "total"]
+
+
+def test_step_budget_stops_the_agent():
+    llm = ReplayLLM([_reply("scroll", direction="down")] * 10)
+    outcome = _run(llm, AgentBudget(max_steps=3, max_tokens=100000, max_seconds=10))
+    assert outcome["stopped"] == "steps"
+    assert outcome["result"] is None
+    assert llm.calls == 3
+
+
+def test_token_budget_counts_output_tokens():
+    llm = ReplayLLM([_reply("scroll", direction="down")] * 10)
+    first = _run(ReplayLLM(llm.responses[:1]), AgentBudget(max_steps=1, max_tokens=100000, max_seconds=10))
+    step = first["usage"]["step_usage"][0]
+
+    # Enough for one step's input tokens alone, not for input plus output
+    outcome = _run(llm, AgentBudget(max_steps=10, max_tokens=step["input_tokens"] + 1, max_seconds=10))
+    assert outcome["stopped"] == "tokens"
+    assert llm.calls == 1
+
+
+def test_time_budget_covers_observation(monkeypatch):
+    async def slow_observe_page(page):
+        await asyncio.sleep(5)
+
+    monkeypatch.setattr(agent_builder, "observe_page", slow_observe_page)
+    llm = ReplayLLM([_reply("total", column="Amount (USD)")])
+    started = time.perf_counter()
+    outcome = _run(llm, AgentBudget(max_steps=10, max_tokens=100000, max_seconds=0.2))
+    assert outcome["stopped"] == "time"
+    assert llm.calls == 0
+    assert time.perf_counter() - started < 2
+
+
+def test_time_budget_covers_column_reads():
+    async def slow_read_column(label):
+        await asyncio.sleep(5)
+
+    agent = LowCostAgent(ReplayLLM([_reply("total", column="Amount (USD)")]),
+                         AgentBudget(max_steps=10, max_tokens=100000, max_seconds=0.2))
+    outcome = asyncio.run(agent.run(FakePage(), SHEET_URL, "cost", "header_not_found", slow_read_column))
+    assert outcome["stopped"] == "time"
+    assert outcome["result"] is None
+    assert outcome["usage"]["steps"] == 1
+
+
+def test_browser_use_usage_includes_output_tokens():
+    callback = TokenUsageCallback()
+    message = SimpleNamespace(usage_metadata={"input_tokens": 120, "output_tokens": 30})
+    callback.on_llm_end(SimpleNamespace(generations=[[SimpleNamespace(message=message)]]))
+    assert (callback.input_tokens, callback.output_tokens) == (120, 30)
+
+    meta = SimpleNamespace(step_number=1, input_tokens=100, output_tokens=20, step_start_time=1.0, step_end_time=2.5)
+    history = SimpleNamespace(history=[SimpleNamespace(metadata=meta, model_output=None)])
+    step = _history_usage(history)[0]
+    assert (step.input_tokens, step.output_tokens, step.seconds) == (100, 20, 1.5)
+
+
+def _load_agent_builder(monkeypatch, browser_use):
+    """A fresh agent_builder imported with ``browser_use`` installed or missing."""
+    monkeypatch.setitem(sys.modules, "browser_use", browser_use)
+    monkeypatch.setitem(sys.modules, "browser_use.browser", browser_use)
+    spec = importlib.util.spec_from_file_location("agent_builder", agent_builder.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.setitem(sys.modules, "agent_builder", module)
+    return module
+
+
+def _fallback_config(tmp_path, mode):
+    stub = tmp_path / "responses.jsonl"
+    stub.write_text('{"action": "total", "column": "Amount (USD)"}\n')
+    config = get_config()
+    config.agent_fallback = True
+    config.agent_mode = mode
+    config.agent_stub_responses = str(stub)
+    config.agent_trace_cache_path = None
+    return config
+
+
+def test_browser_use_mode_selected_when_installed(monkeypatch, tmp_path):
+    import fake_browser_use
+    import run
+
+    module = _load_agent_builder(monkeypatch, fake_browser_use)
+    assert module.BROWSER_USE_AVAILABLE
+    assert module.Agent is fake_browser_use.Agent
+    fallback = run.get_agent_fallback(_fallback_config(tmp_path, "browser_use"))
+    assert isinstance(fallback, module.AgentFallback)
+    assert fallback.mode == "browser_use"
+
+
+def test_browser_use_mode_disabled_when_missing(monkeypatch, tmp_path):
+    import run
+
+    # None in sys.modules makes the import raise ImportError
+    module = _load_agent_builder(monkeypatch, None)
+    assert not module.BROWSER_USE_AVAILABLE
+    assert run.get_agent_fallback(_fallback_config(tmp_path, "browser_use")) is None
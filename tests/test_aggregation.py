@@ -0,0 +1,50 @@
+import pytest
+
+pytest.importorskip("playwright")
+
+from aggregation import AggregateSpec, HeaderIndex, aggregate_grid, normalize_header, parse_aggregate_specs
+from extraction import GridData
+
+GRID = GridData(
+    headers=["Date", "Category", "Cost ($)", "Cost center"],
+    rows=[1, 2, 3, 4, 5],
+    columns=[
+        ["d1", "d2", "d3", "d4", "d5"],
+        ["Food", "Travel", "Food ", "Travel", None],
+        ["$10.00", "20", "(5.00)", "n/a", "1,000"],
+        ["A", "B", "A", "B", "C"],
+    ],
+)
+
+
+def test_header_index_prefers_exact_match():
+    assert normalize_header("  Cost ($) ") == "cost"
+    index = HeaderIndex(GRID.headers)
+    assert index.find("COST") == 2
+    assert index.find("center") == 3
+    assert index.find("amount") is None
+    assert index.label(9) == ""
+
+
+def test_parse_specs():
+    assert parse_aggregate_specs("total cost by category, avg cost,") == [
+        AggregateSpec("sum", "cost", "category"),
+        AggregateSpec("mean", "cost"),
+    ]
+    with pytest.raises(ValueError):
+        parse_aggregate_specs("median cost")
+
+
+def test_aggregates_share_one_pass():
+    results = aggregate_grid(GRID, parse_aggregate_specs(
+        "sum cost, count cost, min cost, max cost, mean cost, sum cost by category, sum amount"))
+    values = {r["aggregate"]: r.get("value") for r in results}
+    assert values["sum cost"] == 1025.0
+    assert values["count cost"] == 4
+    assert (values["min cost"], values["max cost"]) == (-5.0, 1000.0)
+    assert values["mean cost"] == pytest.approx(256.25)
+
+    grouped = results[5]
+    assert grouped["column"] == "Cost ($)" and grouped["by"] == "Category"
+    assert grouped["groups"] == {"Food": 5.0, "Travel": 20.0, "": 1000.0}
+    assert results[6]["error"] == "No 'amount' column found in sheet"
@@ -0,0 +1,86 @@
+import asyncio
+import io
+import json
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("playwright")
+
+import batch_runner
+from batch_runner import read_sheet_urls, run_batch
+
+
+class FakePool:
+    def __init__(self):
+        self.browser = SimpleNamespace(is_connected=lambda: True)
+        self.checked_in = []
+
+    async def checkout(self):
+        return SimpleNamespace(browser=self.browser)
+
+    async def checkin(self, pooled, healthy=True):
+        self.checked_in.append(healthy)
+
+
+class FakeSessionCache:
+    def __init__(self):
+        self.state = None
+
+    def load(self, email):
+        return self.state
+
+
+@pytest.fixture
+def fake_runs(monkeypatch):
+    """Replaces the automation: URLs name the outcome ("ok-5", "slow", "boom")."""
+    calls = {"active": 0, "peak": 0, "order": []}
+
+    async def run(url, email, password, session_cache=None, **options):
+        calls["order"].append(url)
+        calls["active"] += 1
+        calls["peak"] = max(calls["peak"], calls["active"])
+        try:
+            await asyncio.sleep(0.05)
+            if url == "slow":
+                await asyncio.sleep(10)
+            if url == "boom":
+                raise RuntimeError("page crashed")
+            if session_cache is not None:
+                session_cache.state = {"cookies": []}
+            return {"status": "success", "total_expense": float(url.split("-")[1]), "message": "ok"}
+        finally:
+            calls["active"] -= 1
+
+    monkeypatch.setattr(batch_runner, "run_google_sheet_automation", run)
+    return calls
+
+
+def test_read_sheet_urls_skips_blanks_and_comments():
+    assert read_sheet_urls(["# sheets", "", "  https://a  ", "https://b\n"]) == ["https://a", "https://b"]
+
+
+def test_batch_streams_one_line_per_sheet(fake_runs):
+    output = io.StringIO()
+    pool = FakePool()
+    urls = ["ok-1", "boom", "ok-2", "slow", "ok-3"]
+    summary = asyncio.run(run_batch(urls, "a@example.com", "pw", output, concurrency=2,
+                                    per_sheet_timeout=0.5, pool=pool))
+
+    records = {r["sheet_url"]: r for r in map(json.loads, output.getvalue().splitlines())}
+    assert set(records) == set(urls)
+    assert records["ok-2"]["total_expense"] == 2.0 and records["ok-2"]["index"] == 2
+    assert records["boom"]["message"] == "page crashed"
+    assert records["slow"]["message"].startswith("Timed out")
+    assert (summary["sheets"], summary["succeeded"], summary["failed"]) == (5, 3, 2)
+    assert fake_runs["peak"] == 2
+    assert pool.checked_in == [True]
+
+
+def test_first_sheet_logs_in_alone_without_cached_session(fake_runs):
+    output = io.StringIO()
+    asyncio.run(run_batch(["ok-1", "ok-2", "ok-3"], "a@example.com", "pw", output, concurrency=3,
+                          pool=FakePool(), session_cache=FakeSessionCache()))
+    assert fake_runs["order"][0] == "ok-1"
+    # The other sheets only started once the first had stored the session
+    assert fake_runs["peak"] == 2
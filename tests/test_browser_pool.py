@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("playwright")
+
+import browser_pool
+from browser_pool import BrowserPool
+
+
+class FakeBrowser:
+    version = "fake"
+
+    def __init__(self):
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    async def close(self):
+        self.connected = False
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.launched = []
+        self.chromium = self
+
+    async def start(self):
+        return self
+
+    async def launch(self, **options):
+        browser = FakeBrowser()
+        self.launched.append(browser)
+        return browser
+
+    async def stop(self):
+        pass
+
+
+@pytest.fixture
+def fake_playwright(monkeypatch):
+    driver = FakePlaywright()
+    monkeypatch.setattr(browser_pool, "async_playwright", lambda: driver)
+    return driver
+
+
+def test_discard_wakes_waiting_checkout(fake_playwright):
+    async def scenario():
+        pool = BrowserPool(size=1, headless=True)
+        first = await pool.checkout()
+        waiter = asyncio.create_task(pool.checkout(timeout=2))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        await pool.checkin(first, healthy=False)
+        second = await waiter
+        assert second is not first
+        assert len(fake_playwright.launched) == 2
+        assert pool.stats()["launched"] == 1
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_checkin_hands_browser_to_waiter(fake_playwright):
+    async def scenario():
+        pool = BrowserPool(size=1, headless=True)
+        first = await pool.checkout()
+        waiter = asyncio.create_task(pool.checkout(timeout=2))
+        await asyncio.sleep(0)
+
+        await pool.checkin(first)
+        assert await waiter is first
+        assert len(fake_playwright.launched) == 1
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_checkout_times_out_when_pool_is_busy(fake_playwright):
+    async def scenario():
+        pool = BrowserPool(size=1, headless=True)
+        await pool.checkout()
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.checkout(timeout=0.05)
+        await pool.close()
+
+    asyncio.run(scenario())
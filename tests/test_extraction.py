@@ -0,0 +1,73 @@
+import json
+import shutil
+import subprocess
+
+import pytest
+
+pytest.importorskip("playwright")
+
+import extraction
+from extraction import GridData, parse_values
+
+# Minimal DOM for the grid scripts: header and cell elements with attributes
+# and layout boxes; everything else in the scripts is plain JavaScript
+FAKE_DOM_JS = """
+globalThis.window = globalThis;
+window.scrollY = 0;
+const element = ({attrs = {}, text = '', rect = {left: 0, right: 0, top: 0}, parent = null}) => ({
+    getAttribute: (name) => name in attrs ? String(attrs[name]) : null,
+    getBoundingClientRect: () => rect,
+    textContent: text,
+    parentElement: parent,
+});
+const header = (column, text, left) =>
+    element({attrs: {'data-header-column': column}, text, rect: {left, right: left + 100, top: 0}});
+const cell = (attrs, value, rect) => element({attrs: {...attrs, 'data-value': value}, rect});
+const HEADERS = [header(0, 'Date', 0), header(1, 'Cost', 100)];
+const CELLS = [
+    cell({'data-row': 2, 'data-column': 1}, '$1,000.50'),
+    cell({'data-row': 1, 'data-column': 0}, '2024-01-01'),
+    cell({'data-row': 1, 'data-column': 1}, '(20.50)'),
+    // No attributes: the column comes from the header span, the row from the offset
+    cell({}, 'INV 1001', {left: 110, right: 190, top: 300}),
+    cell({'data-row': 3, 'data-column': 7}, 'stray'),
+];
+globalThis.document = {
+    querySelectorAll: (selector) => selector === 'header' ? HEADERS : CELLS,
+};
+"""
+
+
+def _run(script, arg):
+    source = f"{FAKE_DOM_JS}\nconsole.log(JSON.stringify(({script.strip()})({json.dumps(arg)})));\n"
+    output = subprocess.run(["node", "-e", source], capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+needs_node = pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+
+
+@needs_node
+def test_extract_grid_is_columnar_and_row_ordered():
+    payload = _run(extraction._EXTRACT_GRID_JS, {"headerSelector": "header", "cellSelector": "cell"})
+    grid = GridData(**payload)
+    assert grid.headers == ["Date", "Cost"]
+    assert grid.rows == [-301, 1, 2]
+    assert grid.column(1) == ["INV 1001", "(20.50)", "$1,000.50"]
+    assert grid.column(0) == [None, "2024-01-01", None]
+    assert grid.loose == ["stray"]
+
+
+@needs_node
+def test_aggregate_in_page_parses_formatted_cells():
+    totals = _run(extraction._AGGREGATE_JS, {"headerSelector": "header", "cellSelector": "cell", "column": 1})
+    assert totals == {"sum": 980.0, "count": 2, "min": -20.5, "max": 1000.5}
+
+
+def test_grid_data_helpers():
+    grid = GridData(headers=["A", "B"], rows=[1, 2], columns=[["1", None], ["x", "3"]], loose=["4", ""])
+    assert grid.row_count == 2
+    assert grid.column(5) == []
+    assert grid.all_values() == ["1", "x", "3", "4"]
+    assert parse_values(grid.all_values()) == [1.0, 3.0, 4.0]
+    assert parse_values([]) == []
@@ -0,0 +1,65 @@
+import json
+import re
+import shutil
+import subprocess
+import urllib.error
+import urllib.request
+
+import pytest
+
+import fake_sheets
+from fake_sheets import FakeSheetsServer, row_values
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def _open(url, cookie=None, method="GET"):
+    request = urllib.request.Request(url, method=method, headers={"Cookie": cookie} if cookie else {})
+    try:
+        with urllib.request.build_opener(NoRedirect).open(request, timeout=10) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def test_sheet_requires_the_session_cookie():
+    with FakeSheetsServer(rows=5) as server:
+        status, headers, _ = _open(f"{server.origin}/spreadsheets/d/x/export?format=csv&gid=0")
+        assert status == 302 and headers["Location"].startswith("/accounts/signin?continue=")
+
+        status, headers, _ = _open(f"{server.origin}/accounts/session", method="POST")
+        cookie = headers["Set-Cookie"].split(";")[0]
+        status, _, body = _open(f"{server.origin}/spreadsheets/d/x/export?format=csv&gid=0", cookie=cookie)
+        assert status == 200 and body.startswith(b"Date,Category,Description,Cost")
+
+
+def test_endpoints_serve_the_known_totals(fake_sheets):
+    base = f"{fake_sheets.origin}/spreadsheets/d/x"
+    status, _, body = _open(f"{base}/export?format=csv&gid=1001")
+    assert status == 200 and len(body.decode().splitlines()) == fake_sheets.rows + 1
+
+    status, _, body = _open(f"{base}/gviz/tq?gid=1001&tq=" + urllib.request.quote("select sum(D), count(A)"))
+    payload = json.loads(re.search(r"setResponse\((.*)\);", body.decode()).group(1))
+    cells = payload["table"]["rows"][0]["c"]
+    assert cells == [{"v": fake_sheets.expected_total(1)}, {"v": fake_sheets.rows}]
+
+    assert _open(f"{base}/export?format=csv&gid=99")[0] == 400
+    assert _open(f"{base}/export?format=pdf&gid=0")[0] == 400
+    status, headers, body = _open(f"{base}/edit", method="HEAD")
+    assert status == 200 and body == b"" and int(headers["Content-Length"]) > 0
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_page_renders_the_same_values_as_the_exports():
+    page = fake_sheets._SHEET_HTML % {"sheet_id": "x", "rows": 0, "row_height": 21, "headers": "[]",
+                                      "categories": json.dumps(fake_sheets.CATEGORIES),
+                                      "tab_gids": "[]", "tabs": ""}
+    helpers = page[page.index("const pad"):page.index("let tab")]
+    cases = [(tab, row) for tab in range(2) for row in (0, 1, 3, 999, 12345)]
+    script = (f"const CATEGORIES = {json.dumps(fake_sheets.CATEGORIES)};\n{helpers}\n"
+              f"console.log(JSON.stringify({json.dumps(cases)}.map(([t, r]) => rowValues(t, r))));")
+    output = subprocess.run(["node", "-e", script], capture_output=True, text=True, check=True).stdout
+    assert json.loads(output) == [row_values(tab, row) for tab, row in cases]
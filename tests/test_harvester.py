@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from harvester import _GridAccumulator, harvest_grid
+
+
+def _payload(rows, values, headers=("Item", "Cost"), at_bottom=False, seen=0):
+    return {
+        "headers": list(headers),
+        "rows": rows,
+        "columns": [[f"item {r}" for r in rows], values][:len(headers)],
+        "loose": [],
+        "newRows": len(rows),
+        "seenRows": seen,
+        "atBottom": at_bottom,
+        "scrollFraction": 0.5,
+        "stats": {"sum": 0, "count": 0, "min": None, "max": None},
+    }
+
+
+class ScriptedPage:
+    """Returns one prepared step payload per evaluate call, repeating the last."""
+
+    def __init__(self, payloads):
+        self.payloads = list(payloads)
+        self.evaluations = 0
+        self.viewport_size = {"width": 1280, "height": 720}
+        self.viewports = []
+
+    async def evaluate(self, script, args):
+        self.evaluations += 1
+        return self.payloads.pop(0) if len(self.payloads) > 1 else self.payloads[0]
+
+    async def set_viewport_size(self, size):
+        self.viewports.append(size)
+        self.viewport_size = size
+
+
+def test_accumulator_keeps_first_copy_and_orders_rows():
+    acc = _GridAccumulator()
+    acc.merge(_payload([3, 1], ["30", "10"], headers=("Item",)))
+    acc.merge(_payload([2, 3], ["20", "overwritten"]))
+    grid = acc.to_grid()
+    assert grid.headers == ["Item", "Cost"]
+    assert grid.rows == [1, 2, 3]
+    assert grid.column(0) == ["item 1", "item 2", "item 3"]
+    # Row 3 first arrived before the Cost header was known
+    assert grid.column(1) == [None, "20", None]
+
+
+def test_harvest_stops_after_quiet_steps_at_bottom():
+    page = ScriptedPage([
+        _payload([0, 1], ["1", "2"], seen=2),
+        _payload([2], ["3"], at_bottom=True, seen=3),
+        _payload([], [], at_bottom=True, seen=3),
+    ])
+    progress = []
+    result = asyncio.run(harvest_grid(page, stable_steps=2, viewport_height=2000,
+                                      on_step=lambda seen, fraction: progress.append((seen, fraction))))
+    assert result.complete
+    assert result.steps == 4
+    assert result.grid.column(1) == ["1", "2", "3"]
+    assert progress[-1] == (3, 1.0)
+    assert page.viewports == [{"width": 1280, "height": 2000}, {"width": 1280, "height": 720}]
+
+
+def test_harvest_out_of_steps_is_incomplete():
+    page = ScriptedPage([_payload([i], [str(i)], seen=i + 1) for i in range(10)])
+    result = asyncio.run(harvest_grid(page, max_steps=3))
+    assert not result.complete
+    assert result.steps == 3
+    assert page.evaluations == 3
+    assert result.grid.rows == [0, 1, 2]
+    assert result.stats is None
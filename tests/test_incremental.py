@@ -0,0 +1,64 @@
+import pytest
+
+pytest.importorskip("playwright")
+
+from extraction import GridData
+from incremental import IncrementalStore, fold_prefix, fold_tail, full_fold, incremental_key
+from sheet_export import SheetRef
+
+
+def _grid(costs, first_row=1):
+    rows = list(range(first_row, first_row + len(costs)))
+    return GridData(headers=["Item", "Cost"], rows=rows,
+                    columns=[[f"item {r}" for r in rows], list(costs)])
+
+
+def test_key_normalizes_column():
+    assert incremental_key(SheetRef("https://docs.google.com", "abc", "7"), " Cost ") == "abc:7:cost"
+
+
+def test_prefix_fold_reads_only_appended_rows():
+    first = full_fold(_grid(["1", "2", "3"]), "export", column=1)
+    assert (first.mode, first.state.total, first.state.last_row) == ("full", 6.0, 3)
+
+    appended = fold_prefix(first.state, _grid(["1", "2", "3", "$4.50", "n/a"]), "export", column=1)
+    assert appended.mode == "incremental"
+    assert appended.new_rows == 2 and appended.new_values == [4.5]
+    assert appended.state.total == 10.5 and appended.state.count == 4
+    # The stored state is not modified in place
+    assert first.state.total == 6.0
+
+
+def test_prefix_fold_recomputes_when_earlier_rows_change():
+    state = full_fold(_grid(["1", "2", "3"]), "export", column=1).state
+    edited = fold_prefix(state, _grid(["1", "20", "3", "4"]), "export", column=1)
+    assert edited.mode == "full" and edited.state.total == 28.0
+
+    deleted = fold_prefix(state, _grid(["1", "3", "4"]), "export", column=1)
+    assert deleted.mode == "full"
+
+    other_source = fold_prefix(state, _grid(["1", "2", "3", "4"]), "dom", column=1)
+    assert other_source.mode == "full"
+
+
+def test_tail_fold_checks_overlap():
+    state = full_fold(_grid([str(i) for i in range(1, 11)]), "dom", column=1).state
+    assert state.resume_row == 6
+
+    tail = _grid(["6", "7", "8", "9", "10", "11"], first_row=6)
+    result = fold_tail(state, tail, column=1)
+    assert result.new_rows == 1 and result.state.total == 66.0
+
+    changed = _grid(["6", "7", "80", "9", "10", "11"], first_row=6)
+    assert fold_tail(state, changed, column=1) is None
+
+
+def test_store_round_trip(tmp_path):
+    path = tmp_path / "incremental.db"
+    state = full_fold(_grid(["1", "2"]), "export", column=1).state
+    IncrementalStore(str(path)).put("k", state)
+
+    store = IncrementalStore(str(path))
+    assert store.get("k") == state
+    store.invalidate("k")
+    assert store.get("k") is None
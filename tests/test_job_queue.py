@@ -0,0 +1,71 @@
+import pytest
+
+from job_queue import JobQueue, QueueFull
+from jobs import DONE, FAILED, QUEUED, RUNNING
+
+SHEET = "https://docs.google.com/spreadsheets/d/abc/edit"
+
+
+def test_claim_prefers_priority_then_age():
+    queue = JobQueue()
+    low = queue.enqueue(SHEET, label="low")
+    high = queue.enqueue(SHEET, label="high", priority=5)
+    low_later = queue.enqueue(SHEET, label="low later")
+
+    assert queue.position(high) == 0
+    assert queue.position(low_later) == 2
+    assert [queue.claim().id for _ in range(3)] == [high.id, low.id, low_later.id]
+    assert queue.claim() is None
+    assert queue.counts()[RUNNING] == 3
+
+
+def test_enqueue_raises_queue_full():
+    queue = JobQueue(max_queued=2)
+    queue.enqueue(SHEET)
+    queue.enqueue(SHEET)
+    with pytest.raises(QueueFull) as excinfo:
+        queue.enqueue(SHEET)
+    assert excinfo.value.queued == 2
+
+    # Running jobs no longer count against the limit
+    queue.claim()
+    queue.enqueue(SHEET)
+
+
+def test_finish_and_fail_store_outcomes():
+    queue = JobQueue(keep_finished=1)
+    first, second = queue.enqueue(SHEET), queue.enqueue(SHEET)
+    queue.finish(queue.claim().id, {"status": "success", "total_expense": 12.5})
+    assert queue.get(first.id).result == {"status": "success", "total_expense": 12.5}
+
+    queue.fail(queue.claim().id, "boom")
+    assert (queue.get(second.id).status, queue.get(second.id).error) == (FAILED, "boom")
+    # Only the newest finished job is kept
+    assert queue.get(first.id) is None
+
+
+def test_recover_requeues_interrupted_jobs(tmp_path):
+    path = tmp_path / "jobs.sqlite3"
+    queue = JobQueue(str(path))
+    job = queue.enqueue(SHEET)
+    queue.claim()
+
+    restarted = JobQueue(str(path))
+    assert restarted.recover() == 1
+    recovered = restarted.get(job.id)
+    assert (recovered.status, recovered.started_at, recovered.attempts) == (QUEUED, None, 1)
+    assert restarted.claim().id == job.id
+
+
+def test_recover_fails_jobs_past_max_attempts():
+    queue = JobQueue(max_attempts=2)
+    job = queue.enqueue(SHEET)
+    queue.claim()
+    assert queue.recover() == 1
+    queue.claim()
+
+    assert queue.recover() == 0
+    failed = queue.get(job.id)
+    assert failed.status == FAILED and failed.done
+    assert "Interrupted 2 times" in failed.error
+    assert queue.counts()[QUEUED] == 0 and queue.counts()[DONE] == 0
@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+from jobs import DONE, FAILED, QUEUED, JobRunner
+from progress import ProgressEvent
+
+
+def _wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_progress_overall_spans_row_phase():
+    assert ProgressEvent("login", "Signing in").overall == 0.25
+    assert ProgressEvent("rows", "Reading", rows=50, fraction=0.5).overall == pytest.approx(0.675)
+    assert ProgressEvent("rows", "Reading", fraction=2.0).overall == pytest.approx(0.95)
+    assert ProgressEvent("unknown", "?").to_dict()["overall"] == 0.0
+
+
+def test_job_reports_progress_and_result():
+    runner = JobRunner()
+    release = threading.Event()
+
+    def target(sheet, progress_callback):
+        progress_callback(ProgressEvent("rows", "Reading rows", rows=10, total_rows=40, fraction=0.25))
+        release.wait(5)
+        return {"sheet": sheet, "total_expense": 3.0}
+
+    try:
+        job = runner.submit(target, "s1", label="s1")
+        waiting = runner.submit(target, "s2")
+        assert waiting.status == QUEUED and runner.queue_position(waiting) == 0
+
+        # The first job is running with its last event in the snapshot
+        _wait_until(lambda: job.snapshot()["rows"] == 10)
+        snapshot = job.snapshot()
+        assert snapshot["status"] == "running" and snapshot["total_rows"] == 40
+        assert snapshot["progress"] == ProgressEvent("rows", "", fraction=0.25).overall
+
+        release.set()
+        runner.shutdown(wait=True)
+        assert job.status == DONE and job.result["sheet"] == "s1"
+        assert job.snapshot()["progress"] == 1.0
+        assert runner.get(job.id) is job
+    finally:
+        release.set()
+        runner.shutdown(wait=True)
+
+
+def test_failed_job_keeps_error_and_old_jobs_are_pruned():
+    runner = JobRunner(keep_finished=2)
+
+    def boom(progress_callback):
+        raise RuntimeError("no grid")
+
+    failed = runner.submit(boom)
+    runner.shutdown(wait=True)
+    assert failed.status == FAILED and failed.snapshot()["error"] == "no grid"
+
+    runner = JobRunner(keep_finished=2)
+    finished = []
+    for _ in range(4):
+        job = runner.submit(lambda progress_callback: None)
+        _wait_until(lambda: job.done)
+        finished.append(job)
+    latest = runner.submit(lambda progress_callback: None)
+    runner.shutdown(wait=True)
+    # Finished jobs beyond keep_finished are dropped, oldest first, on submit
+    assert runner.jobs() == finished[2:] + [latest]
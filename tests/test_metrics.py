@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+import pytest
+
+from metrics import JsonlExporter, MetricsRegistry, RunMetrics, TraceSampler, annotate, timed
+
+
+class Automation:
+    def __init__(self):
+        self.metrics = RunMetrics("run1")
+
+    @timed("harvest", strategy="scroll")
+    async def harvest(self, rows):
+        annotate(rows=rows, steps=3)
+        return rows
+
+    @timed("export")
+    async def export(self):
+        raise RuntimeError("blocked")
+
+
+def test_spans_nest_and_record_annotations():
+    automation = Automation()
+    metrics = automation.metrics
+    with metrics.span("navigate", retries=1) as span:
+        assert span.retries == 1
+        asyncio.run(automation.harvest(120))
+    with pytest.raises(RuntimeError):
+        asyncio.run(automation.export())
+    # Outside any span annotate is a no-op
+    annotate(rows=1)
+
+    spans = {span["name"]: span for span in metrics.to_dict()["spans"]}
+    assert spans["harvest"]["rows"] == 120
+    assert spans["harvest"]["attrs"] == {"strategy": "scroll", "steps": 3}
+    assert spans["export"]["status"] == "error"
+    assert spans["navigate"]["retries"] == 1 and "rows" not in spans["navigate"]
+    assert spans["navigate"]["duration"] >= spans["harvest"]["duration"]
+    assert set(metrics.phase_totals()) == {"navigate", "harvest", "export"}
+
+
+def test_registry_renders_prometheus_histograms():
+    registry = MetricsRegistry()
+    registry.record({"wall_seconds": 3.0, "spans": [{"name": "harvest", "duration": 0.3, "rows": 100}]})
+    registry.record({"total_seconds": 0.2, "spans": [{"name": "harvest", "duration": 7.0, "rows": 50}]},
+                    status="error")
+    text = registry.render_prometheus()
+    assert 'sheet_agent_runs_total{status="error"} 1' in text
+    assert 'sheet_agent_phase_duration_seconds_bucket{phase="harvest",le="0.5"} 1' in text
+    assert 'sheet_agent_phase_duration_seconds_bucket{phase="harvest",le="10"} 2' in text
+    assert 'sheet_agent_phase_duration_seconds_count{phase="run"} 2' in text
+    assert 'sheet_agent_phase_duration_seconds_sum{phase="harvest"} 7.300000' in text
+    assert 'sheet_agent_phase_rows_total{phase="harvest"} 150' in text
+
+
+def test_jsonl_exporter_appends(tmp_path):
+    exporter = JsonlExporter(str(tmp_path / "runs" / "metrics.jsonl"))
+    exporter.export({"run_id": "a"})
+    exporter.export({"run_id": "b"})
+    lines = (tmp_path / "runs" / "metrics.jsonl").read_text().splitlines()
+    assert [json.loads(line)["run_id"] for line in lines] == ["a", "b"]
+
+
+def test_trace_sampler_keeps_slowest(tmp_path):
+    sampler = TraceSampler(str(tmp_path), sample_rate=1.0, keep=2, min_seconds=1.0)
+    assert sampler.should_trace()
+    assert sampler.claim("fast", 0.5) is None
+
+    kept = {}
+    for run_id, duration in [("a", 2.0), ("b", 5.0)]:
+        kept[run_id] = sampler.claim(run_id, duration)
+        kept[run_id].write_bytes(b"zip")
+    assert sampler.claim("c", 1.5) is None
+    assert sampler.claim("d", 9.0) is not None
+    assert not kept["a"].exists() and kept["b"].exists()
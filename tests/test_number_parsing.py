@@ -0,0 +1,74 @@
+import json
+import math
+import shutil
+import subprocess
+
+import pytest
+
+import number_parsing
+from number_parsing import NUMBER_PARSER_JS, parse_number_list, parse_numbers
+
+CASES = [
+    ("1234.5", 1234.5),
+    ("$1,234.50", 1234.5),
+    ("(120.00)", -120.0),
+    ("1.234,50 €", 1234.5),
+    ("1 234,50", 1234.5),
+    ("1\u00a0234,50", 1234.5),
+    ("1\u202f234", 1234.0),
+    ("1'234.5", 1234.5),
+    ("1,234", 1234.0),
+    ("1,234,567", 1234567.0),
+    ("1.234.567", 1234567.0),
+    ("12,5", 12.5),
+    ("USD 12", 12.0),
+    ("EUR -3", -3.0),
+    ("kr 12", 12.0),
+    ("5-", -5.0),
+    ("-$5", -5.0),
+    ("12%", 0.12),
+    (".5", 0.5),
+    ("1e3", 1000.0),
+    # Identifiers, phone numbers and malformed text are not amounts
+    ("INV 1001", None),
+    ("ABC1", None),
+    ("1.5.3", None),
+    ("1,2,3", None),
+    ("--5", None),
+    ("-5-", None),
+    ("555 123 4567", None),
+    ("12 34", None),
+    ("total", None),
+    ("", None),
+]
+
+
+def _expected(value):
+    return math.nan if value is None else value
+
+
+@pytest.mark.parametrize("dtype", ["string", "string[pyarrow]"])
+def test_parse_numbers_table(monkeypatch, dtype):
+    if dtype == "string[pyarrow]":
+        pytest.importorskip("pyarrow")
+    monkeypatch.setattr(number_parsing, "_STRING_DTYPE", dtype)
+    parsed = parse_numbers([text for text, _ in CASES])
+    for (text, expected), value in zip(CASES, parsed):
+        assert value == pytest.approx(_expected(expected), nan_ok=True), text
+
+
+def test_parse_number_list_drops_non_numbers():
+    assert parse_number_list(["$1.50", None, "n/a", 2, "INV 7"]) == [1.5, 2.0]
+
+
+def test_explicit_decimal_comma():
+    assert parse_numbers(["1.234", "1,5"], decimal=",").tolist() == [1234.0, 1.5]
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_js_port_matches_pandas():
+    texts = [text for text, _ in CASES]
+    script = NUMBER_PARSER_JS + f"\nconsole.log(JSON.stringify({json.dumps(texts)}.map(parseNumber)));\n"
+    output = subprocess.run(["node", "-e", script], capture_output=True, text=True, check=True).stdout
+    for text, js, py in zip(texts, json.loads(output), parse_numbers(texts)):
+        assert (math.nan if js is None else js) == pytest.approx(py, nan_ok=True), text
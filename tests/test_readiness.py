@@ -0,0 +1,74 @@
+import asyncio
+import json
+import shutil
+import subprocess
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+import readiness
+from readiness import ReadinessTimeouts, wait_for_sheet_ready
+
+
+class FakePage:
+    """Times out the waits whose selector or script is listed in ``missing``."""
+
+    def __init__(self, missing=()):
+        self.missing = missing
+        self.waits = []
+
+    async def wait_for_selector(self, selector, state=None, timeout=None):
+        self.waits.append("grid")
+        if "grid" in self.missing:
+            raise PlaywrightTimeoutError("timed out")
+
+    async def wait_for_function(self, script, arg=None, polling=None, timeout=None):
+        phase = "rows_stable" if script is readiness._STABLE_ROWS_JS else "headers"
+        self.waits.append(phase)
+        if phase in self.missing:
+            raise PlaywrightTimeoutError("timed out")
+
+
+def test_all_phases_waited_in_order():
+    page = FakePage()
+    ready = asyncio.run(wait_for_sheet_ready(page, ReadinessTimeouts()))
+    assert ready.grid_found
+    assert page.waits == ["grid", "headers", "rows_stable"]
+    assert set(ready.durations) == {"grid", "headers", "rows_stable"}
+
+
+def test_missing_grid_skips_later_phases():
+    page = FakePage(missing=("grid",))
+    ready = asyncio.run(wait_for_sheet_ready(page, ReadinessTimeouts()))
+    assert not ready.grid_found
+    assert page.waits == ["grid"]
+
+
+def test_slow_headers_do_not_block_extraction():
+    page = FakePage(missing=("headers",))
+    ready = asyncio.run(wait_for_sheet_ready(page, ReadinessTimeouts()))
+    assert ready.grid_found
+    assert page.waits == ["grid", "headers", "rows_stable"]
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_stable_rows_needs_consecutive_unchanged_frames():
+    # Cell counts seen on successive animation frames
+    counts = [3, 5, 5, 5, 5, 8, 8, 8, 8]
+    script = f"""
+globalThis.window = globalThis;
+const counts = {json.dumps(counts)};
+let frame = 0;
+globalThis.document = {{querySelectorAll: () => ({{length: counts[frame]}})}};
+const stable = {readiness._STABLE_ROWS_JS.strip()};
+const results = [];
+for (frame = 0; frame < counts.length; frame++) {{
+    results.push(stable({{selector: 'div', frames: 3, token: 't'}}));
+}}
+console.log(JSON.stringify(results));
+"""
+    output = subprocess.run(["node", "-e", script], capture_output=True, text=True, check=True).stdout
+    assert json.loads(output) == [False, False, False, False, True, False, False, False, True]
@@ -0,0 +1,101 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from request_filter import RequestFilter, StaticAssetCache, get_filter_profile
+
+FONT_URL = "https://fonts.gstatic.com/s/roboto/v30/font.woff2"
+SCRIPT_URL = "https://www.gstatic.com/_/docs/js/k=abc/sheets.js"
+
+
+class FakeResponse:
+    def __init__(self, status=200, body=b"asset", headers=None):
+        self.status = status
+        self.headers = headers or {"content-type": "text/javascript", "content-length": "5"}
+        self._body = body
+
+    async def body(self):
+        return self._body
+
+
+class FakeRoute:
+    def __init__(self, url, resource_type, fetch=None):
+        self.request = SimpleNamespace(url=url, resource_type=resource_type, method="GET")
+        self._fetch = fetch
+        self.outcome = None
+
+    async def fulfill(self, status=None, headers=None, body=None, response=None):
+        self.outcome = ("fulfill", status or response.status, body)
+
+    async def abort(self, reason="failed"):
+        self.outcome = ("abort", reason)
+
+    async def continue_(self):
+        self.outcome = ("continue",)
+
+    async def fetch(self):
+        if isinstance(self._fetch, Exception):
+            raise self._fetch
+        return self._fetch
+
+
+def _handle(request_filter, route):
+    asyncio.run(request_filter._handle(route))
+    return route.outcome
+
+
+def test_profiles_by_name():
+    assert get_filter_profile("off") is None
+    assert get_filter_profile("Minimal").name == "minimal"
+    with pytest.raises(ValueError):
+        get_filter_profile("everything")
+
+
+def test_minimal_profile_blocks_and_stubs():
+    request_filter = RequestFilter(get_filter_profile("minimal"))
+    assert _handle(request_filter, FakeRoute("https://a/logo.png", "image")) == ("abort", "blockedbyclient")
+    assert _handle(request_filter, FakeRoute("https://www.google-analytics.com/collect", "xhr"))[:2] == ("fulfill", 204)
+    assert _handle(request_filter, FakeRoute("https://docs.google.com/spreadsheets/d/x/edit", "document")) == ("continue",)
+    assert _handle(request_filter, FakeRoute("https://docs.google.com/x/bind", "xhr")) == ("continue",)
+
+    stats = request_filter.stats.to_dict()
+    assert (stats["requests"], stats["blocked"], stats["stubbed"], stats["requests_saved"]) == (4, 1, 1, 2)
+    assert stats["by_type"] == {"image": 1, "xhr": 1}
+
+
+def test_static_assets_are_served_from_disk_on_later_runs(tmp_path):
+    cache = StaticAssetCache(str(tmp_path))
+    first = RequestFilter(None, cache)
+    assert _handle(first, FakeRoute(SCRIPT_URL, "script", FakeResponse())) == ("fulfill", 200, b"asset")
+    assert first.stats.cache_stores == 1
+
+    # A new run (new filter, same directory) never reaches the network
+    second = RequestFilter(None, StaticAssetCache(str(tmp_path)))
+    assert _handle(second, FakeRoute(SCRIPT_URL, "script", RuntimeError("offline"))) == ("fulfill", 200, b"asset")
+    assert second.stats.cache_hits == 1
+    assert "content-length" not in cache.get(SCRIPT_URL)[1]
+
+
+def test_uncacheable_and_failed_fetches(tmp_path):
+    cache = StaticAssetCache(str(tmp_path))
+    request_filter = RequestFilter(None, cache)
+    assert not cache.cacheable("https://docs.google.com/static/app.js", "script")
+
+    no_store = FakeResponse(headers={"cache-control": "no-store"})
+    _handle(request_filter, FakeRoute(FONT_URL, "font", no_store))
+    assert cache.get(FONT_URL) is None
+
+    # A fetch failure hands the request back to the browser
+    assert _handle(request_filter, FakeRoute(SCRIPT_URL, "script", RuntimeError("reset"))) == ("continue",)
+
+
+def test_asset_cache_evicts_oldest(tmp_path):
+    cache = StaticAssetCache(str(tmp_path), max_mb=0.001)
+    for i in range(5):
+        cache.put(f"{SCRIPT_URL}?v={i}", 200, {}, b"x" * 300)
+    assert cache._size <= cache.max_bytes
+    assert cache.get(f"{SCRIPT_URL}?v=4") is not None
+    assert cache.get(f"{SCRIPT_URL}?v=0") is None
@@ -0,0 +1,212 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("playwright")
+
+import google_sheet_automation
+from result_cache import ResultCache, result_cache_key, session_revision_probe
+from sheet_export import parse_sheet_url
+
+SHEET = "https://docs.google.com/spreadsheets/d/abc/edit#gid=7"
+
+
+def test_key_covers_account_tab_column_and_aggregations():
+    key = result_cache_key(SHEET, "Cost ", account="a@example.com")
+    assert key.endswith(":abc:7:cost")
+    assert key == result_cache_key(SHEET, "cost", account="A@example.com ")
+    assert key != result_cache_key(SHEET, "cost", account="b@example.com")
+    assert result_cache_key(SHEET, all_tabs=True, account="a").split(":")[2] == "*"
+    assert result_cache_key(SHEET, aggregations="Sum  cost", account="a").endswith(":cost:sum cost")
+
+
+def test_entries_expire_after_ttl():
+    cache = ResultCache(ttl_seconds=0.05)
+    cache.put("k", {"total_expense": 1}, "r1")
+    entry = cache.get("k")
+    assert (entry.result, entry.revision) == ({"total_expense": 1}, "r1")
+    time.sleep(0.1)
+    assert cache.get("k") is None and len(cache) == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    path = str(tmp_path / "results.sqlite3")
+    cache = ResultCache(path, max_entries=2)
+    cache.put("a", {}, "r")
+    time.sleep(0.01)
+    cache.put("b", {}, "r")
+    time.sleep(0.01)
+    cache.get("a")
+    cache.put("c", {}, "r")
+    assert cache.get("b") is None
+
+    reopened = ResultCache(path, max_entries=2)
+    assert reopened.get("a") is not None and reopened.get("c") is not None
+
+
+class _Server:
+    """HEAD endpoint answering with an ETag or a redirect, recording cookies it receives."""
+
+    def __init__(self, redirect_to=None):
+        self.cookies = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_HEAD(self):
+                server.cookies.append(self.headers.get("Cookie"))
+                if redirect_to:
+                    self.send_response(302)
+                    self.send_header("Location", redirect_to)
+                else:
+                    self.send_response(200)
+                    self.send_header("ETag", '"rev-1"')
+                self.end_headers()
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.origin = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _Sessions:
+    def load(self, email):
+        return {"cookies": [{"name": "SID", "value": "secret", "domain": "127.0.0.1"}]}
+
+
+def test_probe_reads_etag_with_session_cookie():
+    server = _Server()
+    try:
+        probe = session_revision_probe(_Sessions(), "a@example.com")
+        ref = parse_sheet_url(f"{server.origin}/spreadsheets/d/abc/edit")
+        assert asyncio.run(probe(ref)) == '"rev-1"'
+        assert server.cookies == ["SID=secret"]
+    finally:
+        server.close()
+
+
+def test_probe_does_not_follow_redirects_with_cookies():
+    elsewhere = _Server()
+    redirecting = _Server(redirect_to=f"http://localhost:{elsewhere.httpd.server_address[1]}/steal")
+    try:
+        probe = session_revision_probe(_Sessions(), "a@example.com")
+        ref = parse_sheet_url(f"{redirecting.origin}/spreadsheets/d/abc/edit")
+        assert asyncio.run(probe(ref)) is None
+        assert elsewhere.cookies == []
+    finally:
+        redirecting.close()
+        elsewhere.close()
+
+
+class FakeAutomation:
+    results = []
+    runs = 0
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def run(self):
+        FakeAutomation.runs += 1
+        return dict(FakeAutomation.results.pop(0))
+
+
+@pytest.fixture
+def fake_automation(monkeypatch):
+    FakeAutomation.results, FakeAutomation.runs = [], 0
+    monkeypatch.setattr(google_sheet_automation, "GoogleSheetAutomation", FakeAutomation)
+    return FakeAutomation
+
+
+def _run(cache, probe, email="a@example.com", **options):
+    return asyncio.run(google_sheet_automation.run_google_sheet_automation(
+        SHEET, email, "pw", result_cache=cache, revision_probe=probe, **options))
+
+
+def _probe(*revisions):
+    revisions = list(revisions)
+
+    async def probe(ref):
+        return revisions.pop(0)
+    return probe
+
+
+def test_cached_total_is_served_per_account(fake_automation):
+    cache = ResultCache()
+    fake_automation.results = [{"status": "success", "total_expense": 5.0},
+                               {"status": "success", "total_expense": 7.0}]
+    assert _run(cache, _probe("r1"))["cache"] == "fresh"
+    hit = _run(cache, _probe("r1"))
+    assert (hit["cache"], hit["total_expense"]) == ("cached", 5.0)
+
+    # Same sheet, another account: not served from the first account's entry
+    other = _run(cache, _probe("r1"), email="b@example.com")
+    assert (other["cache"], other["total_expense"]) == ("fresh", 7.0)
+
+
+def test_revision_is_probed_before_the_run(fake_automation):
+    cache = ResultCache()
+    fake_automation.results = [{"status": "success", "total_expense": 5.0},
+                               {"status": "success", "total_expense": 6.0}]
+    # The sheet is edited while the first run reads it: r1 before, r2 after
+    _run(cache, _probe("r1"))
+    again = _run(cache, _probe("r2"))
+    assert (again["cache"], again["total_expense"]) == ("fresh", 6.0)
+
+
+def test_results_without_revision_are_not_cached(fake_automation):
+    cache = ResultCache()
+    fake_automation.results = [{"status": "success", "total_expense": 5.0}]
+    _run(cache, _probe(None))
+    assert len(cache) == 0
+
+
+@pytest.mark.parametrize("result", [
+    {"status": "success", "total_expense": 5.0, "complete": False},
+    {"status": "success", "total_expense": 5.0, "complete": False,
+     "tabs": [{"status": "success", "complete": True}, {"status": "error"}]},
+    {"status": "error", "total_expense": 0},
+])
+def test_partial_or_failed_results_are_not_cached(fake_automation, result):
+    cache = ResultCache()
+    fake_automation.results = [result]
+    _run(cache, _probe("r1"))
+    assert len(cache) == 0
+
+
+@pytest.mark.parametrize("tab_results, complete", [
+    ([{"status": "success", "total_expense": 1.0, "complete": True}, {"status": "success", "total_expense": 2.0}], True),
+    ([{"status": "success", "total_expense": 1.0, "complete": False}, {"status": "success", "total_expense": 2.0}], False),
+    ([{"status": "success", "total_expense": 1.0}, {"status": "error", "total_expense": 0}], False),
+])
+def test_all_tabs_completeness_combines_tabs(monkeypatch, tab_results, complete):
+    from sheet_tabs import SheetTab
+
+    automation = google_sheet_automation.GoogleSheetAutomation(SHEET, "a@example.com", "pw", all_tabs=True)
+    results = iter(tab_results)
+
+    async def navigate():
+        return True
+
+    async def nothing(*args, **kwargs):
+        return None
+
+    async def discover_tabs(page, timeout_ms):
+        return [SheetTab(gid="0", name="A"), SheetTab(gid="1", name="B")]
+
+    async def total_for_tab(tab, ref):
+        return next(results)
+
+    monkeypatch.setattr(automation, "navigate_to_sheet", navigate)
+    monkeypatch.setattr(automation, "ensure_logged_in", nothing)
+    monkeypatch.setattr(automation, "_total_for_tab", total_for_tab)
+    monkeypatch.setattr(google_sheet_automation, "discover_tabs", discover_tabs)
+    result = asyncio.run(automation._total_all_tabs())
+    assert result["complete"] is complete
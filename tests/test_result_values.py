@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from result_values import (
+    attach_values,
+    decode_values,
+    encode_values,
+    result_summary,
+    result_values,
+    summarize_values,
+    without_buffers,
+)
+
+
+def test_encode_decode_round_trip():
+    values = [1.5, -2.25, 0.0, 1e12]
+    buffer = encode_values(values)
+    assert buffer["dtype"] == "float64" and buffer["length"] == 4
+    assert decode_values(buffer).tolist() == values
+
+
+def test_decode_rejects_bad_buffers():
+    buffer = encode_values([1.0, 2.0])
+    with pytest.raises(ValueError):
+        decode_values({**buffer, "length": 3})
+    with pytest.raises(ValueError):
+        decode_values({**buffer, "dtype": "int64"})
+
+
+def test_summary_statistics():
+    summary = summarize_values([1.0, 2.0, 3.0, 10.0])
+    assert summary["count"] == 4
+    assert summary["sum"] == 16.0
+    assert summary["median"] == 2.5
+    assert (summary["min"], summary["max"]) == (1.0, 10.0)
+    assert sum(summary["histogram"]["counts"]) == 4
+    assert summarize_values([])["mean"] is None
+
+
+def test_attach_and_read_back():
+    result = attach_values({"status": "success", "total_expense": 6.0}, [1.0, 2.0, 3.0])
+    assert result["summary"]["sum"] == 6.0
+    assert result_values(result).tolist() == [1.0, 2.0, 3.0]
+    assert result_summary(result) is result["summary"]
+
+
+def test_legacy_values_found():
+    result = {"values_found": [4.0, 5.0]}
+    assert result_values(result).tolist() == [4.0, 5.0]
+    assert result_summary(result)["sum"] == 9.0
+    assert result_values({}) is None and result_summary({}) is None
+
+
+def test_without_buffers_elides_nested_values():
+    tab = attach_values({"tab": "B"}, np.arange(1000.0))
+    result = attach_values({"status": "success", "tabs": [tab]}, np.arange(5.0))
+    stripped = without_buffers(result)
+    assert stripped["values"] == "<5 float64 values>"
+    assert stripped["tabs"][0]["values"] == "<1000 float64 values>"
+    assert stripped["summary"] == result["summary"]
+    assert isinstance(result["values"], dict)
@@ -0,0 +1,77 @@
+import asyncio
+import concurrent.futures
+import threading
+
+import pytest
+
+from runtime import AsyncRuntime
+
+
+@pytest.fixture
+def runtime():
+    runtime = AsyncRuntime("test-runtime")
+    yield runtime
+    runtime.shutdown(timeout=5)
+
+
+def test_calls_share_one_loop(runtime):
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    first = runtime.run(current_loop())
+    second = runtime.submit(current_loop()).result(5)
+    assert first is second is runtime.loop
+    assert runtime.running
+
+
+def test_concurrent_callers_run_together(runtime):
+    barrier = asyncio.Event()
+
+    async def wait_then_release(release):
+        if release:
+            barrier.set()
+        await asyncio.wait_for(barrier.wait(), 5)
+        return release
+
+    with concurrent.futures.ThreadPoolExecutor(2) as pool:
+        results = list(pool.map(lambda release: runtime.run(wait_then_release(release)), [False, True]))
+    assert results == [False, True]
+
+
+def test_run_times_out_and_cancels(runtime):
+    cancelled = threading.Event()
+
+    async def forever():
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(concurrent.futures.TimeoutError):
+        runtime.run(forever(), timeout=0.1)
+    assert cancelled.wait(5)
+
+
+def test_run_from_the_loop_is_refused(runtime):
+    async def nested():
+        return runtime.run(asyncio.sleep(0))
+
+    with pytest.raises(RuntimeError):
+        runtime.run(nested())
+
+
+def test_shutdown_runs_hooks_newest_first(runtime):
+    order = []
+
+    async def hook(name):
+        order.append(name)
+
+    runtime.start()
+    runtime.on_shutdown(lambda: hook("pool"))
+    runtime.on_shutdown(lambda: hook("driver"))
+    runtime.shutdown(timeout=5)
+    assert order == ["driver", "pool"]
+    assert not runtime.running
+    with pytest.raises(RuntimeError):
+        runtime.start()
@@ -0,0 +1,142 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from job_queue import JobQueue
+from service import AutomationService
+from service_client import ServiceClient, ServiceError, load_service_token
+
+TOKEN = "test-token"
+SHEET = "https://docs.google.com/spreadsheets/d/abc/edit"
+
+
+@pytest.fixture
+def service():
+    release = threading.Event()
+
+    def runner(sheet_url, progress_callback):
+        release.wait(5)
+        return {"status": "success", "total_expense": 1.5, "sheet_url": sheet_url}
+
+    service = AutomationService(JobQueue(max_queued=2), TOKEN, runner=runner, port=0,
+                                allowed_origins=["http://127.0.0.1:8765/"])
+    # Workers are not started, so jobs stay queued unless a test runs them
+    service._thread = threading.Thread(target=service._httpd.serve_forever, daemon=True)
+    service._thread.start()
+    service.release = release
+    yield service
+    release.set()
+    service._httpd.shutdown()
+    service._httpd.server_close()
+
+
+def _post(service, body, headers):
+    request = urllib.request.Request(f"{service.url}/jobs", data=body, method="POST", headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_submission_needs_token(service):
+    body = json.dumps({"sheet_url": SHEET}).encode()
+    status, _ = _post(service, body, {"Content-Type": "application/json"})
+    assert status == 401
+    status, _ = _post(service, body, {"Content-Type": "application/json", "Authorization": "Bearer wrong"})
+    assert status == 401
+    assert service.queue.counts()["queued"] == 0
+
+
+def _get(service, path, headers=None):
+    request = urllib.request.Request(f"{service.url}{path}", headers=headers or {})
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+@pytest.mark.parametrize("path", ["/jobs", "/jobs/{id}", "/jobs/{id}/result", "/metrics"])
+def test_reads_need_token(service, path):
+    job = ServiceClient(service.url, token=TOKEN).submit(SHEET)
+    path = path.format(id=job.id)
+    assert _get(service, path) == 401
+    assert _get(service, path, {"Authorization": "Bearer wrong"}) == 401
+    if path != "/metrics":
+        assert _get(service, path, {"Authorization": f"Bearer {TOKEN}"}) in (200, 409)
+
+
+def test_health_needs_no_token(service):
+    assert _get(service, "/health") == 200
+    assert ServiceClient(service.url).healthy()
+
+
+def test_foreign_host_header_is_refused(service):
+    # What a DNS-rebound page would send; the token is present to show the Host check is separate
+    headers = {"Host": "attacker.example:8770", "Authorization": f"Bearer {TOKEN}"}
+    assert _get(service, "/health", headers) == 403
+    assert _get(service, "/jobs", headers) == 403
+    status, _ = _post(service, json.dumps({"sheet_url": SHEET}).encode(),
+                      {**headers, "Content-Type": "application/json"})
+    assert status == 403
+    assert _get(service, "/jobs", {"Host": "localhost", "Authorization": f"Bearer {TOKEN}"}) == 200
+
+
+def test_submission_needs_json_content_type(service):
+    # The shape of a cross-site form or fetch() POST that skips the CORS preflight
+    body = json.dumps({"sheet_url": SHEET}).encode()
+    status, _ = _post(service, body, {"Content-Type": "text/plain", "Authorization": f"Bearer {TOKEN}"})
+    assert status == 415
+
+
+def test_only_allowed_origins_are_queued(service):
+    client = ServiceClient(service.url, token=TOKEN)
+    with pytest.raises(ServiceError) as excinfo:
+        client.submit("https://attacker.example/spreadsheets/d/abc/edit")
+    assert excinfo.value.status == 400
+
+    assert client.submit(SHEET).status == "queued"
+    assert client.submit("http://127.0.0.1:8765/spreadsheets/d/bench/edit#gid=0").status == "queued"
+
+
+def test_full_queue_answers_429(service):
+    client = ServiceClient(service.url, token=TOKEN)
+    client.submit(SHEET)
+    client.submit(SHEET, priority=3)
+    with pytest.raises(ServiceError) as excinfo:
+        client.submit(SHEET)
+    assert excinfo.value.status == 429 and excinfo.value.retry_after == 30
+
+
+def test_jobs_limit_is_validated(service):
+    client = ServiceClient(service.url, token=TOKEN)
+    client.submit(SHEET)
+    assert len(client.jobs(limit=1)) == 1
+    for limit in ("abc", "0"):
+        with pytest.raises(ServiceError) as excinfo:
+            client._request("GET", f"/jobs?limit={limit}")
+        assert excinfo.value.status == 400
+
+
+def test_worker_runs_job_to_result(service):
+    client = ServiceClient(service.url, token=TOKEN)
+    job = client.submit(SHEET)
+    service.release.set()
+    service._run(service.queue.claim())
+    assert job.result == {"status": "success", "total_expense": 1.5, "sheet_url": SHEET}
+    assert service.retry_after() >= 1
+
+
+def test_load_service_token(tmp_path):
+    path = tmp_path / "service.token"
+    assert load_service_token("explicit", str(path)) == "explicit"
+    assert load_service_token(None, str(path)) is None
+    created = load_service_token(None, str(path), create=True)
+    assert created and path.stat().st_mode & 0o777 == 0o600
+    assert load_service_token(None, str(path)) == created
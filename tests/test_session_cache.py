@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+pytest.importorskip("cryptography")
+
+from cryptography.fernet import Fernet
+
+from session_cache import SessionCache, session_expiry
+
+
+def _state(expires):
+    return {
+        "cookies": [
+            {"name": "SID", "value": "s", "expires": expires},
+            {"name": "NID", "value": "n", "expires": expires - 1000},
+        ],
+        "origins": [],
+    }
+
+
+def test_expiry_is_earliest_auth_cookie():
+    state = {"cookies": [{"name": "SID", "expires": 200}, {"name": "HSID", "expires": 100},
+                         {"name": "NID", "expires": 50}, {"name": "SSID", "expires": -1}]}
+    assert session_expiry(state) == 100
+    assert session_expiry({"cookies": [{"name": "NID", "expires": 50}]}) is None
+
+
+def test_round_trip_is_encrypted_and_per_account(tmp_path):
+    cache = SessionCache(str(tmp_path), key=Fernet.generate_key())
+    state = _state(time.time() + 3600)
+    cache.save("User@Example.com", state)
+
+    assert cache.load("user@example.com") == state
+    assert cache.load("other@example.com") is None
+    files = list(tmp_path.glob("*.session"))
+    assert len(files) == 1
+    # Fernet tokens are URL-safe base64, so the quoted JSON name can only leak in plaintext
+    assert b'"SID"' not in files[0].read_bytes()
+
+
+def test_expired_cookies_are_discarded(tmp_path):
+    cache = SessionCache(str(tmp_path), key=Fernet.generate_key())
+    cache.save("a@example.com", _state(time.time() - 10))
+    assert cache.load("a@example.com") is None
+    assert not list(tmp_path.glob("*.session"))
+
+
+def test_wrong_key_invalidates(tmp_path):
+    SessionCache(str(tmp_path), key=Fernet.generate_key()).save("a@example.com", _state(time.time() + 3600))
+    assert SessionCache(str(tmp_path), key=Fernet.generate_key()).load("a@example.com") is None
+    assert not list(tmp_path.glob("*.session"))
+
+
+def test_key_file_is_created_once(tmp_path, monkeypatch):
+    monkeypatch.delenv("SESSION_CACHE_KEY", raising=False)
+    first = SessionCache(str(tmp_path))
+    first.save("a@example.com", _state(time.time() + 3600))
+    assert (tmp_path / ".key").stat().st_mode & 0o777 == 0o600
+    assert SessionCache(str(tmp_path)).load("a@example.com") is not None
@@ -0,0 +1,125 @@
+import asyncio
+import csv
+import io
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from playwright.async_api import Error as PlaywrightError
+
+from fake_sheets import FakeSheetsServer
+from number_parsing import parse_number_list
+from sheet_export import ExportBlocked, download_export, export_grid, parse_sheet_url
+
+SHEET_URL = "https://docs.google.com/spreadsheets/d/abc_123/edit#gid=7"
+ROWS = [["Date", "Cost"], ["2024-01-01", "1.50"], ["", ""], ["2024-01-03", "2.25", "note"]]
+
+
+class StaticResponse:
+    def __init__(self, status=200, body=b"", content_type="text/csv"):
+        self.status = status
+        self.ok = 200 <= status < 300
+        self.headers = {"content-type": content_type}
+        self._body = body
+
+    async def body(self):
+        return self._body
+
+
+class StaticRequest:
+    """Answers every GET with one prepared response and records the URLs."""
+
+    def __init__(self, response):
+        self.response = response
+        self.urls = []
+
+    async def get(self, url, timeout=None):
+        self.urls.append(url)
+        if isinstance(self.response, Exception):
+            raise self.response
+        return self.response
+
+
+def _csv(rows):
+    out = io.StringIO()
+    csv.writer(out).writerows(rows)
+    return out.getvalue().encode("utf-8")
+
+
+def test_parse_sheet_url_keeps_origin_and_gid():
+    ref = parse_sheet_url(SHEET_URL)
+    assert ref.origin == "https://docs.google.com"
+    assert (ref.spreadsheet_id, ref.gid) == ("abc_123", "7")
+    assert parse_sheet_url("http://127.0.0.1:8765/spreadsheets/d/x/edit?gid=3").gid == "3"
+    with pytest.raises(ValueError):
+        parse_sheet_url("https://example.com/doc")
+
+
+def test_csv_export_is_columnar():
+    request = StaticRequest(StaticResponse(body=b"\xef\xbb\xbf" + _csv(ROWS)))
+    grid = asyncio.run(export_grid(request, parse_sheet_url(SHEET_URL), fmt="csv"))
+    assert request.urls == ["https://docs.google.com/spreadsheets/d/abc_123/export?format=csv&gid=7"]
+    assert grid.headers == ["Date", "Cost"]
+    assert grid.rows == [2, 4]
+    assert grid.columns[1] == ["1.50", "2.25"]
+    assert grid.loose == ["note"]
+
+
+def test_xlsx_export_is_columnar():
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    for row in ROWS:
+        workbook.active.append(row)
+    out = io.BytesIO()
+    workbook.save(out)
+    grid = asyncio.run(export_grid(StaticRequest(StaticResponse(body=out.getvalue())),
+                                   parse_sheet_url(SHEET_URL), fmt="xlsx"))
+    assert grid.rows == [2, 4]
+    assert grid.columns[1] == ["1.50", "2.25"]
+
+
+@pytest.mark.parametrize("response, message", [
+    (StaticResponse(status=403), "HTTP 403"),
+    (StaticResponse(body=b"<html>", content_type="text/html; charset=utf-8"), "HTML page"),
+    (PlaywrightError("net::ERR_CONNECTION_RESET"), "ERR_CONNECTION_RESET"),
+])
+def test_unusable_exports_are_blocked(response, message):
+    with pytest.raises(ExportBlocked, match=message):
+        asyncio.run(download_export(StaticRequest(response), parse_sheet_url(SHEET_URL)))
+
+
+def _column_total(grid, header):
+    values = grid.columns[grid.headers.index(header)]
+    return round(sum(parse_number_list(values)), 2)
+
+
+@pytest.mark.parametrize("tab", [0, 1])
+def test_csv_export_totals_match_fake_sheet(fake_sheets, http_request, tab):
+    ref = parse_sheet_url(fake_sheets.sheet_url(tab=tab))
+    assert ref.origin == fake_sheets.origin
+    grid = asyncio.run(export_grid(http_request, ref, fmt="csv"))
+    assert grid.headers == ["Date", "Category", "Description", "Cost"]
+    assert grid.row_count == fake_sheets.rows
+    assert _column_total(grid, "Cost") == fake_sheets.expected_total(tab)
+
+
+def test_xlsx_export_totals_match_fake_sheet(fake_sheets, http_request):
+    pytest.importorskip("openpyxl")
+    ref = parse_sheet_url(fake_sheets.sheet_url())
+    grid = asyncio.run(export_grid(http_request, ref, fmt="xlsx"))
+    assert grid.row_count == fake_sheets.rows
+    assert _column_total(grid, "Cost") == fake_sheets.expected_total()
+
+
+def test_export_behind_login_is_blocked(http_request):
+    with FakeSheetsServer(rows=5) as server:
+        ref = parse_sheet_url(server.sheet_url())
+        with pytest.raises(ExportBlocked, match="HTML page"):
+            asyncio.run(download_export(http_request, ref))
+
+
+def test_export_of_unknown_tab_is_blocked(fake_sheets, http_request):
+    ref = parse_sheet_url(fake_sheets.sheet_url()).with_gid("999")
+    with pytest.raises(ExportBlocked, match="HTTP 400"):
+        asyncio.run(download_export(http_request, ref))
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from fake_sheets import FakeSheetsServer
+from sheet_export import parse_sheet_url
+from sheet_query import (PlaywrightQueryTransport, QueryError, QueryTransport, SheetQuery, build_query,
+                         column_letter)
+
+SHEET_URL = "https://docs.google.com/spreadsheets/d/x/edit#gid=0"
+
+
+class StaticTransport(QueryTransport):
+    def __init__(self, cols, rows="[]"):
+        self.payload = '{"status": "ok", "table": {"cols": %s, "rows": %s}}' % (cols, rows)
+        self.urls = []
+
+    async def fetch(self, url):
+        self.urls.append(url)
+        return f"google.visualization.Query.setResponse({self.payload});"
+
+
+class StaticResponse:
+    def __init__(self, status=200, text="", content_type="application/json"):
+        self.status = status
+        self.ok = 200 <= status < 300
+        self.headers = {"content-type": content_type}
+        self._text = text
+
+    async def text(self):
+        return self._text
+
+
+class StaticRequest:
+    def __init__(self, response):
+        self.response = response
+
+    async def get(self, url, timeout=None):
+        if isinstance(self.response, Exception):
+            raise self.response
+        return self.response
+
+
+def _query(transport):
+    return SheetQuery(transport, parse_sheet_url(SHEET_URL))
+
+
+def _fake_query(server, http_request, tab=0):
+    return SheetQuery(PlaywrightQueryTransport(http_request), parse_sheet_url(server.sheet_url(tab=tab)))
+
+
+def test_transport_is_abstract():
+    with pytest.raises(TypeError):
+        QueryTransport()
+
+
+def test_column_letter():
+    assert [column_letter(i) for i in (0, 25, 26, 701)] == ["A", "Z", "AA", "ZZ"]
+    assert build_query("D", ["sum", "count"]) == "select sum(D), count(D)"
+
+
+def test_resolve_column_and_aggregate():
+    cols = '[{"id": "A", "label": "Date"}, {"id": "B", "label": "Cost ($)"}]'
+    query = _query(StaticTransport(cols, rows='[{"c": [{"v": 42.5}, {"v": 3}]}]'))
+    assert asyncio.run(query.resolve_column("cost")) == {"letter": "B", "label": "Cost ($)"}
+    assert asyncio.run(query.resolve_column("Amount")) is None
+    assert asyncio.run(query.aggregate("B", ("sum", "count", "max"))) == {"sum": 42.5, "count": 3, "max": None}
+    assert "tq=select%20sum%28B%29" in query.transport.urls[-1]
+
+
+@pytest.mark.parametrize("response, message", [
+    (StaticResponse(status=403), "HTTP 403"),
+    (StaticResponse(text="<html>Sign in</html>", content_type="text/html"), "HTML page"),
+    (PlaywrightTimeoutError("Timeout 30000ms exceeded"), "Timeout"),
+])
+def test_unusable_endpoint_raises_query_error(response, message):
+    query = _query(PlaywrightQueryTransport(StaticRequest(response)))
+    with pytest.raises(QueryError, match=message):
+        asyncio.run(query.columns())
+
+
+def test_resolve_column_prefers_exact_header():
+    cols = '[{"id": "A", "label": "Cost centre"}, {"id": "B", "label": "Cost ($)"}]'
+    query = _query(StaticTransport(cols))
+    assert asyncio.run(query.resolve_column("Cost")) == {"letter": "B", "label": "Cost ($)"}
+
+
+@pytest.mark.parametrize("tab", [0, 1])
+def test_aggregate_matches_fake_sheet(fake_sheets, http_request, tab):
+    async def scenario():
+        query = _fake_query(fake_sheets, http_request, tab)
+        column = await query.resolve_column("cost")
+        assert column == {"letter": "D", "label": "Cost"}
+        return await query.aggregate(column["letter"], ("sum", "count"))
+
+    values = asyncio.run(scenario())
+    assert values == {"sum": fake_sheets.expected_total(tab), "count": fake_sheets.rows}
+
+
+def test_query_behind_login_raises(http_request):
+    with FakeSheetsServer(rows=5) as server:
+        with pytest.raises(QueryError, match="HTML page"):
+            asyncio.run(_fake_query(server, http_request).columns())
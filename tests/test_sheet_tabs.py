@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+import sheet_tabs
+from sheet_tabs import SheetTab, switch_to_tab
+
+
+class FakePage:
+    def __init__(self, active=False, switches=True):
+        self.active = active
+        self.switches = switches
+        self.calls = []
+
+    async def evaluate(self, script, arg=None):
+        if script is sheet_tabs._TAB_ACTIVE_JS:
+            self.calls.append("active?")
+            return self.active
+        self.calls.append("watch")
+
+    async def click(self, selector, timeout=None):
+        self.calls.append("click")
+
+    async def wait_for_function(self, script, arg=None, timeout=None):
+        assert script is sheet_tabs._TAB_SWITCHED_JS
+        self.calls.append(("wait", arg["gid"]))
+        if not self.switches:
+            raise PlaywrightTimeoutError("timed out")
+
+
+def test_switch_watches_grid_before_clicking():
+    page = FakePage()
+    asyncio.run(switch_to_tab(page, SheetTab(gid="1001", name="B")))
+    assert page.calls == ["active?", "watch", "click", ("wait", "1001")]
+
+
+def test_active_tab_is_not_clicked():
+    page = FakePage(active=True)
+    asyncio.run(switch_to_tab(page, SheetTab(gid="0", name="A")))
+    assert page.calls == ["active?"]
+
+
+def test_switch_fails_when_grid_keeps_previous_tab():
+    page = FakePage(switches=False)
+    with pytest.raises(PlaywrightTimeoutError):
+        asyncio.run(switch_to_tab(page, SheetTab(gid="1001", name="B")))
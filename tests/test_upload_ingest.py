@@ -0,0 +1,93 @@
+import io
+
+import pytest
+
+from upload_ingest import ColumnStats, UploadCache, content_hash, parse_upload, read_preview
+
+CSV = b'Date,Cost,Note\n2024-01-01,"$1,200.50",a\n2024-01-02,3.5,b\n2024-01-03,,c\n2024-01-04,(2.00),d\n'
+
+
+def _parse(data=CSV, name="expenses.csv", **kwargs):
+    return parse_upload(io.BytesIO(data), name, **kwargs)
+
+
+def test_stats_are_the_same_for_any_chunk_size():
+    whole = _parse(chunk_rows=100)
+    chunked = _parse(chunk_rows=1)
+    for parsed in (whole, chunked):
+        cost = parsed.stats["Cost"]
+        assert (cost.rows, cost.count) == (4, 3)
+        assert cost.sum == pytest.approx(1202.0)
+        assert (cost.min, cost.max) == (-2.0, 1200.5)
+        assert parsed.stats["Note"].count == 0
+    assert whole.default_column == "Cost"
+    assert whole.columns == ["Date", "Cost", "Note"]
+
+
+def test_default_column_falls_back_to_first_numeric():
+    parsed = _parse(b"Name,Amount\na,1\nb,2\n", "other.csv")
+    assert parsed.default_column == "Amount"
+    assert parsed.stats["Amount"].mean == 1.5
+
+
+def test_progress_reaches_the_end():
+    calls = []
+    _parse(chunk_rows=2, progress=lambda fraction, rows: calls.append((fraction, rows)), total_bytes=len(CSV))
+    assert [rows for _, rows in calls] == [2, 4]
+    assert calls[-1][0] == pytest.approx(1.0)
+
+
+def test_xlsx_upload_matches_csv():
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for row in (["Cost", "Note"], ["$1,200.50", "a"], [3.5, "b"], [None, "c"], ["(2.00)", "d"]):
+        sheet.append(row)
+    data = io.BytesIO()
+    workbook.save(data)
+
+    parsed = _parse(data.getvalue(), "expenses.xlsx", chunk_rows=2)
+    assert parsed.stats["Cost"].sum == pytest.approx(1202.0)
+    assert parsed.stats["Cost"].count == 3
+    assert list(read_preview(io.BytesIO(data.getvalue()), "expenses.xlsx").columns) == ["Cost", "Note"]
+
+
+def test_content_hash_rewinds_the_file():
+    file = io.BytesIO(CSV)
+    assert content_hash(file) == content_hash(io.BytesIO(CSV)) != content_hash(io.BytesIO(CSV + b"x"))
+    assert file.tell() == 0
+
+
+def test_cache_over_byte_limit_keeps_the_newest_entry():
+    cache = UploadCache(max_bytes=10)
+    first = _parse()
+    cache.put(first)
+    assert cache.get(first.digest) is first
+
+    second = _parse(b"Cost\n1\n2\n", "small.csv")
+    cache.put(second)
+    assert len(cache) == 1
+    assert cache.get(first.digest) is None
+    kept = cache.get(second.digest)
+    assert kept.stats["Cost"].sum == 3.0 and kept.stats["Cost"].count == 2
+
+
+def test_cache_evicts_least_recently_used():
+    a, b, c = (_parse(f"Cost\n{i}\n".encode(), f"{i}.csv") for i in range(3))
+    cache = UploadCache(max_bytes=a.nbytes * 2 + 1)
+    cache.put(a)
+    cache.put(b)
+    cache.get(a.digest)
+    cache.put(c)
+    assert cache.get(b.digest) is None
+    assert cache.get(a.digest) is a and cache.get(c.digest) is c
+    assert cache.nbytes <= cache.max_bytes
+
+
+def test_column_stats_ignore_nan():
+    import numpy as np
+
+    stats = ColumnStats()
+    stats.update(np.array([np.nan, 2.0, 4.0]), 3)
+    stats.update(np.array([np.nan]), 1)
+    assert (stats.rows, stats.count, stats.sum, stats.min, stats.max) == (4, 2, 6.0, 2.0, 4.0)
@@ -0,0 +1,266 @@
+"""
+Streaming ingestion of uploaded CSV/Excel files.
+Reads the file in chunks (pandas chunked CSV reads, openpyxl read-only rows
+for xlsx), summarizes every column in one pass and memoizes the result by
+content hash so reruns and column switches don't re-read the file.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import IO, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from number_parsing import parse_numbers
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_ROWS = 100_000
+
+# progress(fraction 0..1, rows read so far)
+ProgressCallback = Callable[[float, int], None]
+
+
+@dataclass
+class ColumnStats:
+    """Running sum/count/min/max over the numeric values of one column."""
+    rows: int = 0
+    count: int = 0
+    sum: float = 0.0
+    min: Optional[float] = None
+    max: Optional[float] = None
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def update(self, numbers: np.ndarray, rows: int):
+        """Fold one parsed chunk (NaN = not a number) into the totals."""
+        self.rows += rows
+        values = numbers[~np.isnan(numbers)]
+        if not len(values):
+            return
+        self.count += len(values)
+        self.sum += float(values.sum())
+        low, high = float(values.min()), float(values.max())
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+
+def _file_kind(name: str) -> str:
+    lower = name.lower()
+    if lower.endswith(".csv"):
+        return "csv"
+    if lower.endswith(".xlsx"):
+        return "xlsx"
+    return "excel"
+
+
+def read_preview(file: IO[bytes], name: str, rows: int = 5) -> pd.DataFrame:
+    """First ``rows`` rows of the upload, without reading the rest of the file."""
+    kind = _file_kind(name)
+    file.seek(0)
+    try:
+        if kind == "csv":
+            return pd.read_csv(file, nrows=rows)
+        if kind == "xlsx":
+            sheet_rows = _iter_xlsx_rows(file)
+            try:
+                header = _header_names(next(sheet_rows, ()))
+                body = [values for _, values in zip(range(rows), sheet_rows)]
+            finally:
+                sheet_rows.close()
+            return pd.DataFrame(body, columns=header)
+        return pd.read_excel(file, nrows=rows)
+    finally:
+        file.seek(0)
+
+
+def _header_names(values: tuple) -> List[str]:
+    """Column names the way pandas labels them (blank headers become "Unnamed: i")."""
+    return [str(v) if v is not None else f"Unnamed: {i}" for i, v in enumerate(values)]
+
+
+def _iter_xlsx_rows(file: IO[bytes], min_col: Optional[int] = None,
+                    max_col: Optional[int] = None, min_row: int = 1) -> Iterator[tuple]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        yield from sheet.iter_rows(min_row=min_row, min_col=min_col, max_col=max_col, values_only=True)
+    finally:
+        workbook.close()
+
+
+def _xlsx_row_count(file: IO[bytes]) -> Optional[int]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True)
+    try:
+        return workbook.worksheets[0].max_row
+    finally:
+        workbook.close()
+        file.seek(0)
+
+
+def _chunks(values: Iterator, size: int) -> Iterator[List]:
+    chunk = []
+    for value in values:
+        chunk.append(value)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _iter_chunks(
+    file: IO[bytes],
+    name: str,
+    chunk_rows: int,
+    total_bytes: Optional[int] = None,
+) -> Iterator[Tuple[Dict[str, Sequence], int, float]]:
+    """Yield ({column: raw values}, rows, fraction read) for every chunk of the file."""
+    kind = _file_kind(name)
+    file.seek(0)
+
+    if kind == "csv":
+        total_bytes = total_bytes or getattr(file, "size", None)
+        for chunk in pd.read_csv(file, chunksize=chunk_rows):
+            fraction = min(file.tell() / total_bytes, 1.0) if total_bytes else 0.0
+            yield {str(c): chunk[c] for c in chunk.columns}, len(chunk), fraction
+
+    elif kind == "xlsx":
+        total_rows = max((_xlsx_row_count(file) or 1) - 1, 1)
+        sheet_rows = _iter_xlsx_rows(file)
+        try:
+            names = _header_names(next(sheet_rows, ()))
+            rows_read = 0
+            for chunk in _chunks(sheet_rows, chunk_rows):
+                rows_read += len(chunk)
+                columns = {n: [row[i] if i < len(row) else None for row in chunk] for i, n in enumerate(names)}
+                yield columns, len(chunk), min(rows_read / total_rows, 1.0)
+        finally:
+            sheet_rows.close()
+
+    else:
+        # Legacy .xls has no streaming reader
+        frame = pd.read_excel(file)
+        yield {str(c): frame[c] for c in frame.columns}, len(frame), 1.0
+
+    file.seek(0)
+
+
+def content_hash(file: IO[bytes], block_size: int = 1 << 20) -> str:
+    """Digest of the file's bytes, read in blocks."""
+    digest = hashlib.blake2b(digest_size=20)
+    file.seek(0)
+    for block in iter(lambda: file.read(block_size), b""):
+        digest.update(block)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+@dataclass
+class ParsedUpload:
+    """Everything the upload UI needs, computed in one pass over the file."""
+    digest: str
+    name: str
+    preview: pd.DataFrame
+    columns: List[str]
+    stats: Dict[str, ColumnStats]
+    default_column: Optional[str] = None
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.preview.memory_usage(deep=True).sum()) + 512 * len(self.columns)
+
+
+def parse_upload(
+    file: IO[bytes],
+    name: str,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    progress: Optional[ProgressCallback] = None,
+    total_bytes: Optional[int] = None,
+    digest: Optional[str] = None,
+) -> ParsedUpload:
+    """
+    Summarize every column of an uploaded file in one chunked pass.
+
+    Only the per-column summaries are kept, so memory stays at one chunk
+    regardless of file size.
+
+    Args:
+        file: Binary file object (e.g. a Streamlit UploadedFile)
+        name: File name, used to pick the reader
+        chunk_rows: Rows parsed per batch
+        progress: Called after every chunk with (fraction, rows read)
+        total_bytes: File size, used for CSV progress
+        digest: Content hash, if already computed
+    """
+    digest = digest or content_hash(file)
+    preview = read_preview(file, name)
+    stats: Dict[str, ColumnStats] = {}
+    rows = 0
+
+    for columns, chunk_len, fraction in _iter_chunks(file, name, chunk_rows, total_bytes):
+        for column, raw in columns.items():
+            numbers = parse_numbers(raw)
+            stats.setdefault(column, ColumnStats()).update(numbers, chunk_len)
+        rows += chunk_len
+        if progress:
+            progress(fraction, rows)
+
+    columns = [str(c) for c in preview.columns] or list(stats)
+
+    # Default to a "cost" column, else the first column holding numbers
+    default_column = next((c for c in columns if c.strip().lower() == "cost"), None)
+    if default_column is None:
+        default_column = next((c for c in columns if c in stats and stats[c].count), None)
+
+    logger.info(f"📥 Parsed {rows:,} rows x {len(columns)} columns from {name}")
+    return ParsedUpload(digest=digest, name=name, preview=preview, columns=columns, stats=stats,
+                        default_column=default_column)
+
+
+class UploadCache:
+    """
+    LRU of ParsedUpload keyed by content hash, bounded by a memory budget.
+    Thread-safe so one instance can be shared by every session.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, ParsedUpload]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(entry.nbytes for entry in self._entries.values())
+
+    def get(self, digest: str) -> Optional[ParsedUpload]:
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self._entries.move_to_end(digest)
+            return entry
+
+    def put(self, parsed: ParsedUpload):
+        with self._lock:
+            self._entries[parsed.digest] = parsed
+            self._entries.move_to_end(parsed.digest)
+            total = sum(entry.nbytes for entry in self._entries.values())
+            while total > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                total -= evicted.nbytes
+                logger.info(f"🧹 Evicted cached upload {evicted.name}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)